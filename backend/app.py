@@ -5,6 +5,12 @@ from flask_cors import CORS
 from dotenv import load_dotenv
 from configs.app_config import Config
 from models import db
+from services.auth_services.token_versions import TokenVersions
+from services.system_services.archive_service import ArchiveService
+from services.system_services.document_cleanup import DocumentReconciler
+from services.system_services.lazy_imports import LazyImports
+from services.system_services.readiness import Readiness
+from services.system_services.metrics import Metrics
 
 from controllers import controllers_registers
 
@@ -27,7 +33,10 @@ def create_app(app_name=str, init_db:bool =True):
     # Initialize extensions
     db.init_app(app)
     jwt = JWTManager(app)
-    CORS(app, origins=Config.CORS_ORIGINS, max_age=25, vary_header=True, supports_credentials=True, methods=['GET','POST','PUT','DELETE','OPTIONS'])
+    TokenVersions.register(jwt)
+    Metrics.init_app(app)
+    CORS(app, origins=Config.CORS_ORIGINS, max_age=25, vary_header=True, supports_credentials=True, methods=['GET','POST','PUT','DELETE','OPTIONS'],
+         expose_headers=['X-Next-Cursor'])
     
     # Initialize API
     api = Api(app)
@@ -35,18 +44,43 @@ def create_app(app_name=str, init_db:bool =True):
     # Register all controller blueprints
     controllers_registers(api)
     
-    # Initialize database and run migrations
+    # Initialize database and run migrations (a single version check once migrated)
     if init_db:
-        from migrations.init_db import init_db
-        init_db(app)
+        from migrations.versioning import migrate
+        migrate(app)
+
+    if Config.PRELOAD_HEAVY_MODULES:
+        LazyImports.preload()
     
     @app.route('/health')
     def health():
         """Health check"""
         return {'status': 'healthy'}
+
+    @app.route('/ready')
+    def ready():
+        """Readiness check (database and vector store reachable, not draining)"""
+        is_ready, checks = Readiness.check()
+        return {'status': 'ready' if is_ready else 'unavailable', 'checks': checks}, 200 if is_ready else 503
     
     return app
 
+def start_background_jobs(app):
+    """
+    Start the periodic jobs in the serving process.
+    Called per worker after the fork (serve.py), never in create_app: a
+    preloading master would otherwise run them and keep database handles
+    open across forks (the reconciler also creates a Chroma client).
+    Each pass takes a file lock, so several workers never archive or
+    reconcile at the same time.
+    """
+    if Config.ARCHIVE_ENABLED:
+        ArchiveService.start_scheduler(app)
+
+    if Config.RECONCILE_ENABLED:
+        DocumentReconciler.start_scheduler(app)
+
 if __name__ == '__main__':
     app = create_app(app_name="ONeApp", init_db=True)
+    start_background_jobs(app)
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,121 @@
+"""
+Access matrix benchmark - 1,000 components x 100 roles
+
+Usage:
+    python benchmarks/bench_access_matrix.py [--components 1000] [--roles 100] [--domains 10]
+                                             [--mappings-per-role 200] [--lookups 20000]
+
+Builds an AccessMatrixSnapshot from synthetic templates and role mappings
+(no database) and times, per lookup, the component list and the
+navigation for users holding 1, 5 and 20 roles. The same answers are
+computed with per-role sets (the shape of the previous per-role queries,
+minus the database round trips) as a reference, and both are checked to
+agree. Exits 1 on a mismatch.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from services.ui_services.access_matrix import AccessMatrixSnapshot
+
+
+def synthetic(components, roles, domains, mappings_per_role, seed=7):
+    rng = random.Random(seed)
+    templates = [
+        {
+            'template_id': template_id,
+            'name': f'component_{template_id}',
+            'domain_id': template_id % domains or None,
+            'nav': {'name': f'component_{template_id}', 'domain_id': template_id % domains or None}
+        }
+        for template_id in range(1, components + 1)
+    ]
+    mappings = [
+        (f'role_{role}', template_id)
+        for role in range(roles)
+        for template_id in rng.sample(range(1, components + 1), min(mappings_per_role, components))
+    ]
+    return templates, mappings
+
+
+def reference(templates, mappings):
+    """Per-role template sets, unioned per lookup"""
+    by_role = {}
+    for role_name, template_id in mappings:
+        by_role.setdefault(role_name, set()).add(template_id)
+    by_id = {t['template_id']: t for t in templates}
+
+    def component_names(role_names):
+        ids = set()
+        for role_name in role_names:
+            ids |= by_role.get(role_name, set())
+        return [by_id[i]['name'] for i in sorted(ids)]
+
+    def navigation(role_names, domain_id):
+        ids = set()
+        for role_name in role_names:
+            ids |= by_role.get(role_name, set())
+        return [dict(by_id[i]['nav']) for i in sorted(ids) if by_id[i]['domain_id'] == domain_id]
+
+    return component_names, navigation
+
+
+def per_lookup_us(func, cases, lookups):
+    started = time.perf_counter()
+    for i in range(lookups):
+        func(*cases[i % len(cases)])
+    return (time.perf_counter() - started) / lookups * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Access matrix benchmark')
+    parser.add_argument('--components', type=int, default=1000)
+    parser.add_argument('--roles', type=int, default=100)
+    parser.add_argument('--domains', type=int, default=10)
+    parser.add_argument('--mappings-per-role', type=int, default=200)
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+
+    templates, mappings = synthetic(args.components, args.roles, args.domains, args.mappings_per_role)
+    started = time.perf_counter()
+    snapshot = AccessMatrixSnapshot(templates, mappings)
+    print(f"snapshot build: {(time.perf_counter() - started) * 1000:.1f} ms "
+          f"({args.components} components, {args.roles} roles, {len(mappings)} mappings)")
+
+    ref_components, ref_navigation = reference(templates, mappings)
+    rng = random.Random(11)
+    failures = []
+
+    print(f"{'roles/user':>10} {'lookup':<11} {'matrix us':>10} {'sets us':>10}")
+    for roles_per_user in (1, 5, 20):
+        users = [tuple(f'role_{r}' for r in rng.sample(range(args.roles), roles_per_user)) for _ in range(200)]
+        component_cases = [(roles,) for roles in users]
+        navigation_cases = [(roles, rng.randrange(args.domains) or None) for roles in users]
+
+        for roles, domain_id in navigation_cases[:20]:
+            if snapshot.component_names(roles) != ref_components(roles):
+                failures.append(f'component list differs for {roles}')
+            if snapshot.navigation(roles, domain_id) != ref_navigation(roles, domain_id):
+                failures.append(f'navigation differs for {roles} in domain {domain_id}')
+
+        for name, matrix, ref, cases in (
+            ('components', snapshot.component_names, ref_components, component_cases),
+            ('navigation', snapshot.navigation, ref_navigation, navigation_cases),
+        ):
+            print(f"{roles_per_user:>10} {name:<11} {per_lookup_us(matrix, cases, args.lookups):>10.1f} "
+                  f"{per_lookup_us(ref, cases, args.lookups):>10.1f}")
+
+    for message in failures[:10]:
+        print(f"FAIL {message}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
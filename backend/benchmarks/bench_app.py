@@ -0,0 +1,52 @@
+"""
+Benchmark app runner - the production server with web search pointed at the stub
+
+Started by run_benchmarks.py; expects BENCH_SEARCH_URL and the usual app
+settings (DATABASE_URI, OPENAI_BASE_URL, WEB_BIND, ...) in the environment.
+LLM and embedding calls need no patching: the OpenAI client already
+honours OPENAI_BASE_URL.
+
+Adds GET /bench/navigation/legacy, the navigation handler as it was
+before NavigationCache (ComponentService.get_navigation per request, no
+ETag), so both paths can be driven against the same server.
+"""
+import os
+import sys
+from urllib.parse import quote
+from urllib.request import urlopen
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _stub_search(self, query, run_manager=None):
+    with urlopen(f"{os.environ['BENCH_SEARCH_URL']}?q={quote(query)}", timeout=30) as response:
+        return response.read().decode('utf-8')
+
+
+def _legacy_navigation():
+    from flask_jwt_extended import get_jwt
+    from services.ui_services.component_service import ComponentService
+
+    claims = get_jwt()
+    return {'navigation': ComponentService.get_navigation(claims.get('role'), claims.get('domain_id'))}
+
+
+def main():
+    # Both RAGService and ChatService search through DuckDuckGoSearchRun
+    from langchain_community.tools import DuckDuckGoSearchRun
+    DuckDuckGoSearchRun._run = _stub_search
+
+    from flask_jwt_extended import jwt_required
+    from serve import ProductionServer
+
+    class BenchServer(ProductionServer):
+        def load(self):
+            app = super().load()
+            app.add_url_rule('/bench/navigation/legacy', 'bench_navigation_legacy', jwt_required()(_legacy_navigation))
+            return app
+
+    BenchServer().run()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Connection pool strategy benchmark (DuckDB)
+
+Usage:
+    python benchmarks/bench_db_pool.py [--threads 8] [--queries 500] [--rows 100000]
+
+Creates a DuckDB file in a temp directory with --rows rows, then for each
+DB_POOL_MODE (null, thread, queue) builds the engine exactly as the app
+does (build_engine_options) and runs --queries checkout+query+release
+cycles on each of --threads threads: a point lookup and a small
+aggregate, the shapes of the per-request queries. Reports p50/p95/p99
+per cycle and queries per second for each mode. For endpoint latency
+under each mode use run_benchmarks.py --db-pool-mode.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from sqlalchemy import create_engine, text
+from configs.app_config import build_engine_options
+
+MODES = ('null', 'thread', 'queue')
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_mode(uri, mode, threads, queries, rows):
+    engine = create_engine(uri, **build_engine_options(uri, pool_mode=mode))
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(seed):
+        local = []
+        for i in range(queries):
+            started = time.perf_counter()
+            with engine.connect() as conn:
+                conn.execute(text('SELECT payload FROM bench WHERE id = :id'), {'id': (seed * queries + i) % rows}).all()
+                conn.execute(text('SELECT count(*) FROM bench WHERE id < :id'), {'id': i % rows}).scalar()
+            local.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - started
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        'qps': round(len(latencies) / wall, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DuckDB pool strategy benchmark')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--queries', type=int, default=500, help='Cycles per thread')
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_pool_')
+    uri = f"duckdb:///{os.path.join(data_dir, 'bench.duckdb')}"
+    try:
+        engine = create_engine(uri, **build_engine_options(uri, pool_mode='null'))
+        with engine.begin() as conn:
+            conn.execute(text(
+                'CREATE TABLE bench AS SELECT range AS id, md5(range::VARCHAR) AS payload FROM range(:rows)'
+            ), {'rows': args.rows})
+        engine.dispose()
+
+        print(f"{'mode':<8} {'qps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for mode in MODES:
+            result = run_mode(uri, mode, args.threads, args.queries, args.rows)
+            print(f"{mode:<8} {result['qps']:>9} {result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Multi-worker write load test for DuckDB (single writer vs direct writes)
+
+Usage:
+    python benchmarks/bench_db_writer.py [--workers 8] [--ops 200] [--rows-per-op 5]
+
+Creates a fresh DuckDB database in a temp directory (normal migrations),
+then runs --workers processes that each append --ops small batches of
+guardrail log rows, twice:
+
+    writer - through DBWriter with DB_WRITER_SOCKET pointing at one
+             dedicated writer process (the multi-worker deployment)
+    direct - every process opening the database and committing itself
+
+For each mode it reports per-append p50/p95/p99, rows per second, failed
+appends and the rows actually stored. Exits 1 when the writer mode loses
+or fails any append.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.dirname(HERE)
+sys.path.insert(0, BACKEND)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _rows(mode, worker, op, rows_per_op):
+    return [
+        {
+            'user_id': worker,
+            'guardrail_id': None,
+            'detected_rule': 'bench',
+            'content_snippet': f'{mode} worker {worker} op {op} row {row}',
+            'action_taken': f'bench-{mode}'
+        }
+        for row in range(rows_per_op)
+    ]
+
+
+def _worker(mode, worker, ops, rows_per_op, socket_path, results):
+    if socket_path:
+        os.environ['DB_WRITER_SOCKET'] = socket_path
+    from sqlalchemy import create_engine
+    from configs.app_config import Config, build_engine_options
+    from models import GuardrailsLog
+    from services.system_services.db_writer import DBWriter
+
+    engine = None
+    if mode == 'direct':
+        engine = create_engine(
+            Config.SQLALCHEMY_DATABASE_URI, **build_engine_options(Config.SQLALCHEMY_DATABASE_URI, pool_mode='null')
+        )
+
+    latencies = []
+    failed = 0
+    errors = set()
+    for op in range(ops):
+        rows = _rows(mode, worker, op, rows_per_op)
+        started = time.perf_counter()
+        try:
+            if mode == 'writer':
+                ok = DBWriter.insert(GuardrailsLog.__table__, rows, wait=True)
+            else:
+                with engine.begin() as conn:
+                    conn.execute(GuardrailsLog.__table__.insert(), rows)
+                ok = True
+        except Exception as e:
+            ok = False
+            errors.add(str(e).splitlines()[0][:120])
+        latencies.append((time.perf_counter() - started) * 1000)
+        if not ok:
+            failed += 1
+    results.put((latencies, failed, sorted(errors)[:3]))
+
+
+def run_mode(mode, args, socket_path=None):
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=_worker, args=(mode, worker, args.ops, args.rows_per_op, socket_path, results))
+        for worker in range(args.workers)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    wall = time.perf_counter() - started
+
+    latencies = sorted(latency for worker_latencies, _, _ in collected for latency in worker_latencies)
+    failed = sum(worker_failed for _, worker_failed, _ in collected)
+    errors = sorted({error for _, _, worker_errors in collected for error in worker_errors})[:3]
+    return {
+        'appends': len(latencies),
+        'failed': failed,
+        'errors': errors,
+        'rows_per_second': round((len(latencies) - failed) * args.rows_per_op / wall, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+    }
+
+
+def _stored(mode):
+    from sqlalchemy import create_engine, text
+    from configs.app_config import Config, build_engine_options
+
+    engine = create_engine(
+        Config.SQLALCHEMY_DATABASE_URI, **build_engine_options(Config.SQLALCHEMY_DATABASE_URI, pool_mode='null')
+    )
+    with engine.connect() as conn:
+        count = conn.execute(
+            text('SELECT count(*) FROM guardrails_schema.guardrails_logs WHERE action_taken = :action'),
+            {'action': f'bench-{mode}'}
+        ).scalar()
+    engine.dispose()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Multi-worker DuckDB write load test')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--ops', type=int, default=200, help='Appends per worker')
+    parser.add_argument('--rows-per-op', type=int, default=5)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_writer_')
+    socket_path = os.path.join(data_dir, 'db_writer.sock')
+    os.environ.update(
+        DATABASE_URI=f"duckdb:///{os.path.join(data_dir, 'bench.duckdb')}",
+        MIGRATION_LOCK_PATH=os.path.join(data_dir, '.migrate.lock'),
+        DB_POOL_MODE='null',
+        DB_WRITER_SOCKET='',
+        ARCHIVE_ENABLED='False',
+        RECONCILE_ENABLED='False',
+    )
+
+    writer = None
+    failures = []
+    try:
+        from app import create_app
+        from models import db
+        app = create_app(app_name='WriterBench', init_db=True)
+        with app.app_context():
+            db.engine.dispose()
+
+        writer = subprocess.Popen(
+            [sys.executable, '-m', 'services.system_services.db_writer'],
+            cwd=BACKEND, env=dict(os.environ, DB_WRITER_SOCKET=socket_path)
+        )
+        deadline = time.monotonic() + 30
+        while not os.path.exists(socket_path):
+            if writer.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError('DB writer process did not start')
+            time.sleep(0.1)
+
+        expected = args.workers * args.ops * args.rows_per_op
+        print(f"{'mode':<8} {'appends':>8} {'failed':>7} {'rows/s':>9} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'stored':>8}/{expected}")
+
+        results = {'writer': run_mode('writer', args, socket_path)}
+        writer.terminate()
+        writer.wait(timeout=30)
+        writer = None
+        results['direct'] = run_mode('direct', args)
+
+        for mode, result in results.items():
+            stored = _stored(mode)
+            print(f"{mode:<8} {result['appends']:>8} {result['failed']:>7} {result['rows_per_second']:>9} "
+                  f"{result['p50_ms']:>8} {result['p95_ms']:>8} {result['p99_ms']:>8} {stored:>8}"
+                  + (f"  errors: {result['errors']}" if result['errors'] else ''))
+            if mode == 'writer' and (result['failed'] or stored != expected):
+                failures.append(f'writer mode stored {stored} of {expected} rows ({result["failed"]} failed appends)')
+    finally:
+        if writer is not None and writer.poll() is None:
+            writer.terminate()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    for message in failures:
+        print(f"FAIL {message}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
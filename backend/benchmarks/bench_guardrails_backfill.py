@@ -0,0 +1,111 @@
+"""
+Guardrails backfill benchmark and consistency check
+
+Usage:
+    python benchmarks/bench_guardrails_backfill.py [--rows 50000] [--chunk-size 5000] [--workers 4]
+
+Creates a fresh DuckDB database in a temp directory (normal migrations,
+which seed the default guardrail rules), inserts --rows chat rows of which
+every tenth contains an email address, then:
+
+  1. runs a backfill from id 0 and reports rows per second,
+  2. checks that a second start is refused while the first job runs,
+  3. runs a second backfill from id 0 (resume=False) and checks that the
+     number of stored backfill findings is unchanged.
+
+Exits 1 when a check fails.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+
+def _wait(backfill, timeout=600):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = backfill.status()
+        if status['state'] != 'running':
+            return status
+        time.sleep(0.2)
+    raise RuntimeError(f'Backfill still running after {timeout}s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Guardrails backfill benchmark')
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_backfill_')
+    os.environ.update(
+        DATABASE_URI=f"duckdb:///{os.path.join(data_dir, 'bench.duckdb')}",
+        MIGRATION_LOCK_PATH=os.path.join(data_dir, '.migrate.lock'),
+        GUARDRAILS_BACKFILL_LOCK_PATH=os.path.join(data_dir, '.backfill.lock'),
+        ARCHIVE_ENABLED='False',
+        RECONCILE_ENABLED='False',
+    )
+
+    from app import create_app
+    from models import db, ChatHistory, GuardrailsLog
+    from services.guardrails_services.guardrails_backfill import GuardrailsBackfill
+
+    failures = []
+    app = create_app(app_name='BackfillBench', init_db=True)
+    try:
+        with app.app_context():
+            db.session.bulk_insert_mappings(ChatHistory, [
+                {
+                    'user_id': 1,
+                    'message': f'question {i}' + (f' reach me at user{i}@example.com' if i % 10 == 0 else ''),
+                    'response': f'answer {i}',
+                    'chat_type': 'rag'
+                }
+                for i in range(args.rows)
+            ])
+            db.session.commit()
+
+            def backfill_findings():
+                count = db.session.query(db.func.count(GuardrailsLog.id)).filter_by(action_taken='backfill').scalar()
+                db.session.rollback()
+                return count
+
+            started = time.perf_counter()
+            GuardrailsBackfill.start(app, resume=False, chunk_size=args.chunk_size, workers=args.workers)
+            try:
+                GuardrailsBackfill.start(app, resume=False)
+                failures.append('second start was accepted while a job was running')
+            except ValueError:
+                pass
+            first = _wait(GuardrailsBackfill)
+            elapsed = time.perf_counter() - started
+            first_count = backfill_findings()
+            print(f"first run:  {first['state']}, {first['scanned']} rows, {first_count} findings, "
+                  f"{first['scanned'] / elapsed:.0f} rows/s")
+            if first['state'] != 'completed':
+                failures.append(f"first run ended {first['state']}: {first.get('error')}")
+
+            GuardrailsBackfill.start(app, resume=False, chunk_size=args.chunk_size, workers=args.workers)
+            second = _wait(GuardrailsBackfill)
+            second_count = backfill_findings()
+            print(f"second run: {second['state']}, {second['scanned']} rows, {second_count} findings")
+            if second_count != first_count:
+                failures.append(f'rescan changed stored findings from {first_count} to {second_count}')
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    for message in failures:
+        print(f"FAIL {message}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
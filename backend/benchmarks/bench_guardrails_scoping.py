@@ -0,0 +1,129 @@
+"""
+Guardrails scoping benchmark - per-direction, per-domain rule sets
+
+Usage:
+    python benchmarks/bench_guardrails_scoping.py [--domains 10] [--rules-per-domain 20]
+                                                  [--global-rules 8] [--checks 5000]
+
+Compiles a synthetic rule set without a database: --global-rules PII
+rules (email, phone, card numbers, ...) that apply everywhere, plus
+--rules-per-domain keyword rules for each of --domains domains, spread
+over input, output and both. It then times the regex work of one check
+(the check_content loop, without logging) for input and output messages
+of ~1 KB in random domains:
+
+    all    - every enabled rule, on both sides (before scoping)
+    scoped - GuardrailsEvaluator.rules_for(check_type, domain_id)
+
+and checks that the scoped matches equal the unscoped matches of the
+rules relevant to that direction and domain. Exits 1 on a mismatch.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from types import SimpleNamespace
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from services.guardrails_services.guardrails_evaluator import CompiledRule, GuardrailsEvaluator
+
+PII_PATTERNS = [
+    r'[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}',
+    r'\b\+?\d{1,3}[ -]?\(?\d{3}\)?[ -]?\d{3}[ -]?\d{4}\b',
+    r'\b(?:\d[ -]?){13,16}\b',
+    r'\b\d{3}-\d{2}-\d{4}\b',
+    r'\b[A-Z]{2}\d{2}[A-Z0-9]{11,30}\b',
+    r'\bpassword\s*[:=]\s*\S+',
+    r'\b(?:api[_-]?key|secret)\s*[:=]\s*\S+',
+    r'\b\d{1,3}(?:\.\d{1,3}){3}\b',
+]
+WORDS = ('quarterly report revenue forecast customer ticket deploy release incident roadmap budget '
+         'contract invoice vendor policy review meeting summary latency cluster database backup').split()
+
+
+def synthetic_rules(domains, rules_per_domain, global_rules, rng):
+    """Compiled rules with their scope, ids in creation order"""
+    rules = []
+    for i in range(global_rules):
+        pattern = PII_PATTERNS[i % len(PII_PATTERNS)]
+        rules.append(CompiledRule(
+            SimpleNamespace(id=len(rules) + 1, rule_type=f'pii_{i}', severity='high', pattern=pattern),
+            {'applies_to': 'both', 'domain_id': None}
+        ))
+    for domain_id in range(1, domains + 1):
+        for i in range(rules_per_domain):
+            terms = '|'.join(f'{domain_id}-{i}-{j}-{word}' for j, word in enumerate(rng.sample(WORDS, 6)))
+            rules.append(CompiledRule(
+                SimpleNamespace(id=len(rules) + 1, rule_type=f'domain_{domain_id}_{i}',
+                                severity=rng.choice(('high', 'medium', 'low')), pattern=rf'\b(?:{terms})\b'),
+                {'applies_to': ('input', 'output', 'both')[i % 3], 'domain_id': domain_id}
+            ))
+    return rules
+
+
+def message(rng, size=1000):
+    words = []
+    while sum(len(w) + 1 for w in words) < size:
+        words.append(rng.choice(WORDS))
+        if rng.random() < 0.01:
+            words.append(f'user{rng.randrange(1000)}@example.com')
+    return ' '.join(words)
+
+
+def matches(rules, content):
+    """The check_content regex loop: (rule id, match span) pairs"""
+    return [(rule.id, match.span()) for rule in rules for match in rule.regex.finditer(content)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Guardrails scoping benchmark')
+    parser.add_argument('--domains', type=int, default=10)
+    parser.add_argument('--rules-per-domain', type=int, default=20)
+    parser.add_argument('--global-rules', type=int, default=8)
+    parser.add_argument('--checks', type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    rules = synthetic_rules(args.domains, args.rules_per_domain, args.global_rules, rng)
+    # Stand in for a loaded rule set so rules_for buckets it like in the app
+    GuardrailsEvaluator._rules = rules
+    GuardrailsEvaluator._buckets = {}
+    GuardrailsEvaluator._loaded_at = float('inf')
+
+    messages = [message(rng) for _ in range(200)]
+    cases = [(rng.choice(('input', 'output')), rng.randint(1, args.domains), rng.choice(messages))
+             for _ in range(args.checks)]
+
+    failures = []
+    for check_type, domain_id, content in cases[:100]:
+        expected = [m for m in matches(rules, content)
+                    if rules[m[0] - 1].applies(check_type, domain_id)]
+        if matches(GuardrailsEvaluator.rules_for(check_type, domain_id), content) != expected:
+            failures.append(f'{check_type} check in domain {domain_id} differs')
+
+    print(f"{len(rules)} rules ({args.global_rules} global, {args.rules_per_domain} x {args.domains} domains), "
+          f"{args.checks} checks of ~1 KB")
+    print(f"{'mode':<7} {'rules/check':>11} {'us/check':>9} {'checks/s':>9}")
+    for mode in ('all', 'scoped'):
+        rule_count = 0
+        started = time.perf_counter()
+        for check_type, domain_id, content in cases:
+            selected = rules if mode == 'all' else GuardrailsEvaluator.rules_for(check_type, domain_id)
+            rule_count += len(selected)
+            matches(selected, content)
+        elapsed = time.perf_counter() - started
+        print(f"{mode:<7} {rule_count / len(cases):>11.1f} {elapsed / len(cases) * 1e6:>9.1f} "
+              f"{len(cases) / elapsed:>9.0f}")
+
+    for message_text in failures[:10]:
+        print(f"FAIL {message_text}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+OTP backend contract checks and throughput benchmark
+
+Usage:
+    python benchmarks/bench_otp_backends.py [--processes 8] [--operations 2000]
+
+Every backend is run through the same checks:
+
+    - a stored OTP verifies once and is then consumed
+    - a wrong OTP fails and OTP_MAX_ATTEMPTS wrong guesses lock the key out
+    - an expired OTP fails
+    - storing again replaces the previous OTP
+
+The SQLite backend is also checked across processes (stored in one worker,
+verified in another; of --processes concurrent correct guesses exactly one
+succeeds), which is what multi-worker servers rely on. Throughput is then
+measured as store+verify pairs per second with --processes processes.
+
+Exits 1 when a check fails.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from services.auth_services.otp_backends import MemoryOTPBackend, SQLiteOTPBackend
+
+
+def check_contract(backend):
+    """
+    Returns:
+        list: Failed check descriptions
+    """
+    failures = []
+
+    backend.store_otp('a@example.com', '123456', ttl_seconds=60)
+    if not backend.verify_otp('a@example.com', '123456'):
+        failures.append('stored OTP did not verify')
+    if backend.verify_otp('a@example.com', '123456'):
+        failures.append('OTP verified twice')
+
+    backend.store_otp('b@example.com', '111111', ttl_seconds=60)
+    for _ in range(backend.max_attempts):
+        if backend.verify_otp('b@example.com', '000000'):
+            failures.append('wrong OTP verified')
+    if backend.verify_otp('b@example.com', '111111'):
+        failures.append(f'key not locked out after {backend.max_attempts} wrong guesses')
+
+    backend.store_otp('c@example.com', '222222', ttl_seconds=0)
+    time.sleep(0.01)
+    if backend.verify_otp('c@example.com', '222222'):
+        failures.append('expired OTP verified')
+
+    backend.store_otp('d@example.com', '333333', ttl_seconds=60)
+    backend.store_otp('d@example.com', '444444', ttl_seconds=60)
+    if backend.verify_otp('d@example.com', '333333') or not backend.verify_otp('d@example.com', '444444'):
+        failures.append('storing again did not replace the OTP')
+
+    backend.cleanup()
+    return failures
+
+
+def _verify_in_child(path, key, otp, results):
+    results.put(SQLiteOTPBackend(path).verify_otp(key, otp))
+
+
+def _pairs_in_child(path, worker, operations, results):
+    backend = SQLiteOTPBackend(path) if path else MemoryOTPBackend()
+    started = time.perf_counter()
+    for i in range(operations):
+        key = f'user{worker}-{i}@example.com'
+        backend.store_otp(key, '123456', ttl_seconds=60)
+        backend.verify_otp(key, '123456')
+    results.put(time.perf_counter() - started)
+
+
+def check_shared(path, processes):
+    failures = []
+    results = multiprocessing.Queue()
+
+    SQLiteOTPBackend(path).store_otp('shared@example.com', '555555', ttl_seconds=60)
+    child = multiprocessing.Process(target=_verify_in_child, args=(path, 'shared@example.com', '555555', results))
+    child.start()
+    child.join()
+    if not results.get():
+        failures.append('OTP stored in one process did not verify in another')
+
+    SQLiteOTPBackend(path).store_otp('race@example.com', '666666', ttl_seconds=60)
+    children = [
+        multiprocessing.Process(target=_verify_in_child, args=(path, 'race@example.com', '666666', results))
+        for _ in range(processes)
+    ]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+    successes = sum(1 for _ in children if results.get())
+    if successes != 1:
+        failures.append(f'{successes} of {processes} concurrent verifications succeeded (expected 1)')
+    return failures
+
+
+def throughput(path, processes, operations):
+    """store+verify pairs per second across processes"""
+    results = multiprocessing.Queue()
+    children = [
+        multiprocessing.Process(target=_pairs_in_child, args=(path, worker, operations, results))
+        for worker in range(processes)
+    ]
+    started = time.perf_counter()
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+    wall = time.perf_counter() - started
+    return processes * operations / wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OTP backend checks and benchmark')
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--operations', type=int, default=2000, help='store+verify pairs per process')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_otp_')
+    path = os.path.join(data_dir, 'otp.sqlite3')
+    failures = []
+    try:
+        for name, backend in (('memory', MemoryOTPBackend()), ('sqlite', SQLiteOTPBackend(path))):
+            failures += [f'{name}: {message}' for message in check_contract(backend)]
+        failures += [f'sqlite: {message}' for message in check_shared(path, args.processes)]
+
+        print(f"{'backend':<8} {'processes':>9} {'pairs/s':>10}")
+        print(f"{'memory':<8} {args.processes:>9} {throughput(None, args.processes, args.operations):>10.0f}"
+              "  (per-process store: not shared between workers)")
+        print(f"{'sqlite':<8} {args.processes:>9} {throughput(path, args.processes, args.operations):>10.0f}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    for message in failures:
+        print(f"FAIL {message}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,386 @@
+"""
+End-to-end benchmark - drives load at the main endpoints against local stand-ins
+
+Usage:
+    python benchmarks/run_benchmarks.py [--duration 15] [--concurrency 8]
+                                        [--only login,rag_chat] [--llm-latency-ms 300]
+                                        [--tolerance 0.2] [--update-baseline]
+                                        [--db-pool-mode null|thread|queue]
+                                        [--authz-mode database|claims]
+
+Starts the stub services (stub_services.py) and the production server
+(bench_app.py) on a fresh DuckDB database in a temp directory, seeded by
+the normal migrations plus one uploaded document. Each scenario then runs
+for --duration seconds with --concurrency client threads and reports
+p50/p95/p99 latency, requests per second and errors.
+
+Any request error fails the run (exit code 1). Results are compared with
+baselines.json: a scenario fails when its p95 grows or its RPS drops by
+more than --tolerance (default 20%). --update-baseline stores the current
+results instead, and refuses to store a run with errors; a stored
+baseline with errors is ignored.
+Baselines are only comparable on the same machine with the same
+settings, so keep the stub latencies and concurrency fixed between runs.
+
+The server runs one worker by default. With --workers > 1 the harness
+also starts the DB writer process and sets DB_WRITER_SOCKET, which
+multi-worker DuckDB deployments require.
+
+--db-pool-mode sets DB_POOL_MODE for the server; run once per mode (with
+--only to pick endpoints) to compare connection strategies end to end.
+benchmarks/bench_db_pool.py compares them at the query level.
+--authz-mode sets AUTHZ_MODE the same way: compare the admin endpoints
+(--only admin_users,admin_backfill,guardrails_logs) under both modes.
+
+Navigation has three scenarios: navigation (full body from
+NavigationCache), navigation_revalidate (If-None-Match with the current
+ETag; anything but a 304 counts as an error) and navigation_legacy (the
+previous per-request ComponentService.get_navigation path, served by
+bench_app.py). Compare them with
+--only navigation,navigation_revalidate,navigation_legacy.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.dirname(HERE)
+BASELINE_PATH = os.path.join(HERE, 'baselines.json')
+
+ADMIN_EMAIL = 'admin@mail.com'
+ADMIN_PASSWORD = 'password'
+
+DOCUMENT_TEXT = '\n\n'.join(
+    f"Section {i}. The dynamic UI platform assigns navigation components to roles per domain. "
+    f"Guardrails check every prompt and answer. Benchmark paragraph number {i}."
+    for i in range(40)
+)
+
+
+class Client:
+    """Minimal JSON/multipart HTTP client (stdlib only, so it runs beside any app environment)"""
+
+    def __init__(self, base_url, token=None):
+        self.base_url = base_url
+        self.token = token
+
+    def request(self, method, path, json_body=None, files=None, headers=None, timeout=120):
+        headers = dict(headers or {})
+        data = None
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        if json_body is not None:
+            data = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        elif files:
+            boundary = uuid.uuid4().hex
+            parts = []
+            for field, (filename, content) in files.items():
+                parts.append(
+                    f'--{boundary}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                    f'Content-Type: text/plain\r\n\r\n'.encode('utf-8') + content + b'\r\n'
+                )
+            data = b''.join(parts) + f'--{boundary}--\r\n'.encode('utf-8')
+            headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+
+        request = Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                return response.status, response.read()
+        except HTTPError as e:
+            return e.code, e.read()
+
+    def etag(self, path):
+        """ETag of a GET response (None when the response has none)"""
+        request = Request(self.base_url + path, headers={'Authorization': f'Bearer {self.token}'})
+        with urlopen(request, timeout=30) as response:
+            return response.headers.get('ETag')
+
+
+def _scenarios(client):
+    """name -> callable issuing one request and returning its HTTP status"""
+    def login():
+        anonymous = Client(client.base_url)
+        return anonymous.request('POST', '/api/auth/login', {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD})[0]
+
+    def upload():
+        name = f'bench_{uuid.uuid4().hex[:8]}.txt'
+        return client.request('POST', '/api/ai/rag/upload', files={'file': (name, DOCUMENT_TEXT.encode('utf-8'))})[0]
+
+    navigation_etag = []
+
+    def navigation_revalidate():
+        if not navigation_etag:
+            navigation_etag.append(client.etag('/api/ui/components/navigation'))
+        status = client.request('GET', '/api/ui/components/navigation',
+                                headers={'If-None-Match': navigation_etag[0]})[0]
+        # A 200 means the ETag did not match: the scenario would measure full responses
+        return status if status == 304 else f'expected 304, got {status}'
+
+    return {
+        'login': login,
+        'navigation': lambda: client.request('GET', '/api/ui/components/navigation')[0],
+        'navigation_revalidate': navigation_revalidate,
+        'navigation_legacy': lambda: client.request('GET', '/bench/navigation/legacy')[0],
+        'rag_upload': upload,
+        'rag_chat': lambda: client.request(
+            'POST', '/api/ai/rag/chat', {'query': 'How are navigation components assigned?', 'use_internet': True}
+        )[0],
+        'tool_chat': lambda: client.request(
+            'POST', '/api/ai/chat/tool-calling', {'message': 'Please web_search and search for guardrails news'}
+        )[0],
+        'guardrails_logs': lambda: client.request('GET', '/api/guardrails/logs')[0],
+        'admin_users': lambda: client.request('GET', '/api/ui/users?limit=50')[0],
+        'admin_backfill': lambda: client.request('GET', '/api/guardrails/backfill')[0],
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def drive(issue, duration, concurrency):
+    """
+    Run one scenario
+
+    Returns:
+        dict: p50/p95/p99 (ms), rps, requests and errors
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker():
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                status = issue()
+            except Exception as e:
+                status = str(e)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+                if not isinstance(status, int) or status >= 400:
+                    errors.append(status)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'error_sample': sorted({str(e) for e in errors})[:3],
+        'rps': round(len(latencies) / wall, 2) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'p99_ms': round(percentile(latencies, 99), 1),
+    }
+
+
+def compare(results, baselines, tolerance):
+    """
+    Check results against stored baselines
+
+    Returns:
+        list: Regression messages (empty when within tolerance)
+    """
+    regressions = []
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if not baseline:
+            continue
+        if result['p95_ms'] > baseline['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']} ms > baseline {baseline['p95_ms']} ms")
+        if result['rps'] < baseline['rps'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['rps']} req/s < baseline {baseline['rps']} req/s")
+    return regressions
+
+
+def _wait_until_ready(url, process, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Process exited with code {process.returncode} before becoming ready')
+        try:
+            with urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return
+        except Exception:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f'{url} not ready after {timeout}s')
+
+
+def _stop(process):
+    if process and process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end benchmark with local stand-ins')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per scenario')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients per scenario')
+    parser.add_argument('--only', default='', help='Comma-separated scenario names')
+    parser.add_argument('--app-port', type=int, default=5099)
+    parser.add_argument('--stub-port', type=int, default=8099)
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Server worker processes (more than one also starts the DB writer process)')
+    parser.add_argument('--llm-latency-ms', type=float, default=300)
+    parser.add_argument('--embedding-latency-ms', type=float, default=20)
+    parser.add_argument('--search-latency-ms', type=float, default=150)
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative regression')
+    parser.add_argument('--update-baseline', action='store_true', help='Store results as the new baseline')
+    parser.add_argument('--keep-data', action='store_true', help='Keep the temp data directory')
+    parser.add_argument('--db-pool-mode', choices=('null', 'thread', 'queue'), default='null',
+                        help='DB_POOL_MODE for the server')
+    parser.add_argument('--authz-mode', choices=('database', 'claims'), default='database',
+                        help='AUTHZ_MODE for the server')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix='bench_')
+    stub_url = f'http://127.0.0.1:{args.stub_port}'
+    app_url = f'http://127.0.0.1:{args.app_port}'
+    writer_socket = os.path.join(data_dir, 'db_writer.sock') if args.workers > 1 else ''
+    env = dict(
+        os.environ,
+        DATABASE_URI=f"duckdb:///{os.path.join(data_dir, 'bench.duckdb')}",
+        CHROMA_DB_PATH=os.path.join(data_dir, 'chroma'),
+        DOCUMENTS_PATH=os.path.join(data_dir, 'documents'),
+        ARCHIVE_PATH=os.path.join(data_dir, 'archive'),
+        OTP_STORE_PATH=os.path.join(data_dir, 'otp.sqlite3'),
+        MIGRATION_LOCK_PATH=os.path.join(data_dir, '.migrate.lock'),
+        OPENAI_API_KEY='sk-bench-stub',
+        OPENAI_BASE_URL=f'{stub_url}/v1',
+        BENCH_SEARCH_URL=f'{stub_url}/search',
+        WEB_BIND=f'127.0.0.1:{args.app_port}',
+        WEB_WORKERS=str(args.workers),
+        DB_WRITER_SOCKET=writer_socket,
+        DB_POOL_MODE=args.db_pool_mode,
+        AUTHZ_MODE=args.authz_mode,
+        PYTHONUNBUFFERED='1',
+    )
+
+    stub = app = writer = app_log = None
+    try:
+        stub = subprocess.Popen([
+            sys.executable, os.path.join(HERE, 'stub_services.py'), '--port', str(args.stub_port),
+            '--llm-latency-ms', str(args.llm_latency_ms),
+            '--embedding-latency-ms', str(args.embedding_latency_ms),
+            '--search-latency-ms', str(args.search_latency_ms),
+        ], env=env)
+        _wait_until_ready(f'{stub_url}/stats', stub, 30)
+
+        app_log = open(os.path.join(data_dir, 'app.log'), 'w')
+        if writer_socket:
+            writer = subprocess.Popen(
+                [sys.executable, '-m', 'services.system_services.db_writer'],
+                cwd=BACKEND, env=env, stdout=app_log, stderr=subprocess.STDOUT
+            )
+            deadline = time.monotonic() + 30
+            while not os.path.exists(writer_socket):
+                if writer.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError('DB writer process did not start')
+                time.sleep(0.1)
+        app = subprocess.Popen(
+            [sys.executable, os.path.join(HERE, 'bench_app.py')],
+            cwd=BACKEND, env=env, stdout=app_log, stderr=subprocess.STDOUT
+        )
+        _wait_until_ready(f'{app_url}/ready', app, 180)
+
+        status, body = Client(app_url).request(
+            'POST', '/api/auth/login', {'email': ADMIN_EMAIL, 'password': ADMIN_PASSWORD}
+        )
+        if status != 200:
+            raise RuntimeError(f'Login failed ({status}): {body[:200]!r}')
+        client = Client(app_url, json.loads(body)['access_token'])
+
+        # Seed one document so retrieval has something to search
+        status, body = client.request('POST', '/api/ai/rag/upload', files={'file': ('seed.txt', DOCUMENT_TEXT.encode('utf-8'))})
+        if status >= 400:
+            raise RuntimeError(f'Seed upload failed ({status}): {body[:200]!r}')
+
+        scenarios = _scenarios(client)
+        selected = [name for name in args.only.split(',') if name] or list(scenarios)
+        unknown = [name for name in selected if name not in scenarios]
+        if unknown:
+            raise SystemExit(f'Unknown scenarios: {unknown}. Available: {list(scenarios)}')
+
+        results = {}
+        print(f"{'scenario':<22} {'req':>6} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        for name in selected:
+            result = results[name] = drive(scenarios[name], args.duration, args.concurrency)
+            print(f"{name:<22} {result['requests']:>6} {result['errors']:>5} {result['rps']:>8} "
+                  f"{result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9}"
+                  + (f"  errors: {result['error_sample']}" if result['errors'] else ''))
+    finally:
+        _stop(app)
+        _stop(writer)
+        _stop(stub)
+        if app_log:
+            app_log.close()
+        if args.keep_data:
+            print(f"Data kept in {data_dir}")
+        else:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    failed = [f"{name}: {result['errors']} errors {result['error_sample']}"
+              for name, result in results.items() if result['errors']]
+    for message in failed:
+        print(f"ERRORS {message}")
+
+    baselines = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baselines = json.load(f)
+    invalid = sorted(name for name, baseline in baselines.items() if baseline.get('errors'))
+    if invalid:
+        print(f"Ignoring baselines recorded with errors: {', '.join(invalid)}")
+        baselines = {name: baseline for name, baseline in baselines.items() if name not in invalid}
+
+    if args.update_baseline:
+        if failed:
+            print("Baseline not updated: the run had errors")
+            sys.exit(1)
+        baselines.update(results)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baseline updated: {BASELINE_PATH}")
+        return
+
+    regressions = compare(results, baselines, args.tolerance) if baselines else []
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    if failed or regressions:
+        sys.exit(1)
+    if not baselines:
+        print("No baseline stored; run with --update-baseline to create one")
+        return
+    print(f"Within {args.tolerance:.0%} of baseline")
+
+
+if __name__ == '__main__':
+    main()
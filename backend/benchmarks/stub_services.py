@@ -0,0 +1,170 @@
+"""
+Deterministic stand-ins for the external services used by the AI endpoints
+
+Usage:
+    python benchmarks/stub_services.py [--port 8099] [--llm-latency-ms 300]
+                                       [--embedding-latency-ms 20] [--search-latency-ms 150]
+
+Endpoints:
+    POST /v1/chat/completions  OpenAI-compatible chat completion (point OPENAI_BASE_URL at /v1)
+    POST /v1/embeddings        OpenAI-compatible embeddings (hash-seeded unit vectors)
+    GET  /search?q=...         Plain-text search results (used by the benchmark app in place of DuckDuckGo)
+    GET  /stats                Request counts per endpoint
+
+Responses depend only on the request content, so repeated runs embed,
+retrieve and answer identically; the configured latency is the only cost.
+"""
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+class StubSettings:
+    """Latency (seconds) and embedding size served by the stubs"""
+
+    llm_latency = 0.3
+    embedding_latency = 0.02
+    search_latency = 0.15
+    embedding_dim = 256
+    counts = {}
+    lock = threading.Lock()
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _embedding(value):
+    rng = random.Random(_digest(value))
+    vector = [rng.gauss(0, 1) for _ in range(StubSettings.embedding_dim)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _last_user_text(messages):
+    for message in reversed(messages):
+        content = message.get('content')
+        if isinstance(content, list):
+            content = ' '.join(part.get('text', '') for part in content if isinstance(part, dict))
+        if content:
+            return content
+    return ''
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, name):
+        with StubSettings.lock:
+            StubSettings.counts[name] = StubSettings.counts.get(name, 0) + 1
+
+    def _send(self, status, body, content_type='application/json'):
+        data = body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        body = self._json_body()
+
+        if path.endswith('/chat/completions'):
+            self._count('chat')
+            time.sleep(StubSettings.llm_latency)
+            digest = _digest(body.get('messages'))
+            question = _last_user_text(body.get('messages', []))[-200:]
+            content = f"Stub answer {digest[:12]}. The question was about: {question}"
+            self._send(200, {
+                'id': f'chatcmpl-{digest[:24]}',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'stub'),
+                'choices': [{
+                    'index': 0,
+                    'message': {'role': 'assistant', 'content': content},
+                    'finish_reason': 'stop'
+                }],
+                'usage': {'prompt_tokens': len(json.dumps(body.get('messages'))) // 4,
+                          'completion_tokens': len(content) // 4,
+                          'total_tokens': (len(json.dumps(body.get('messages'))) + len(content)) // 4}
+            })
+        elif path.endswith('/embeddings'):
+            self._count('embeddings')
+            time.sleep(StubSettings.embedding_latency)
+            inputs = body.get('input', [])
+            # A string, a list of strings, or (tiktoken pre-split) lists of token ids
+            if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+                inputs = [inputs]
+            self._send(200, {
+                'object': 'list',
+                'model': body.get('model', 'stub'),
+                'data': [
+                    {'object': 'embedding', 'index': i, 'embedding': _embedding(item)}
+                    for i, item in enumerate(inputs)
+                ],
+                'usage': {'prompt_tokens': 0, 'total_tokens': 0}
+            })
+        else:
+            self._send(404, {'error': {'message': f'Unknown endpoint {path}'}})
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == '/search':
+            self._count('search')
+            time.sleep(StubSettings.search_latency)
+            query = parse_qs(parsed.query).get('q', [''])[0]
+            digest = _digest(query)
+            results = [f"Result {i + 1} for '{query}': stub snippet {digest[i * 8:(i + 1) * 8]}." for i in range(3)]
+            self._send(200, '\n'.join(results), content_type='text/plain')
+        elif parsed.path == '/stats':
+            with StubSettings.lock:
+                self._send(200, dict(StubSettings.counts))
+        else:
+            self._send(404, {'error': {'message': f'Unknown endpoint {parsed.path}'}})
+
+
+def serve(port, llm_latency_ms, embedding_latency_ms, search_latency_ms, embedding_dim):
+    """Run the stub server until interrupted"""
+    StubSettings.llm_latency = llm_latency_ms / 1000
+    StubSettings.embedding_latency = embedding_latency_ms / 1000
+    StubSettings.search_latency = search_latency_ms / 1000
+    StubSettings.embedding_dim = embedding_dim
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    print(f"Stub services listening on http://127.0.0.1:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAI-compatible and search stand-ins for benchmarks')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--llm-latency-ms', type=float, default=300)
+    parser.add_argument('--embedding-latency-ms', type=float, default=20)
+    parser.add_argument('--search-latency-ms', type=float, default=150)
+    parser.add_argument('--embedding-dim', type=int, default=256)
+    args = parser.parse_args()
+    serve(args.port, args.llm_latency_ms, args.embedding_latency_ms, args.search_latency_ms, args.embedding_dim)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,11 +6,108 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+def build_engine_options(uri, pool_mode=None):
+    """
+    SQLAlchemy engine options for the configured database
+
+    DB_POOL_MODE:
+        'queue'  - bounded QueuePool (default for server databases). For
+                   DuckDB the pooled connections keep the database instance
+                   open, so catalog state and the buffer cache survive
+                   between requests.
+        'thread' - one connection per thread (SingletonThreadPool), all
+                   sharing the same in-process DuckDB instance.
+        'null'   - NullPool: a new connection per checkout (default for
+                   DuckDB).
+
+    DuckDB pooling is opt-in: an open pooled connection holds the file, so
+    it only suits a single process (one worker, or workers that write
+    through DB_WRITER_SOCKET). benchmarks/bench_db_pool.py compares the
+    modes.
+
+    Args:
+        uri: SQLALCHEMY_DATABASE_URI
+        pool_mode: Override DB_POOL_MODE
+
+    Returns:
+        dict: SQLALCHEMY_ENGINE_OPTIONS
+    """
+    from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool
+
+    mode = pool_mode or os.getenv('DB_POOL_MODE', '')
+    pool_size = int(os.getenv('DB_POOL_SIZE', 5))
+
+    if 'duckdb' in uri:
+        options = {
+            'connect_args': {
+                'config': {
+                    'allow_unsigned_extensions': 'true'
+                }
+            }
+        }
+        if mode in ('', 'null'):
+            options['poolclass'] = NullPool
+        elif mode == 'thread':
+            options['poolclass'] = SingletonThreadPool
+            options['pool_size'] = pool_size
+        else:
+            # Embedded database: no network to ping and nothing to recycle
+            options['poolclass'] = QueuePool
+            options['pool_size'] = pool_size
+            options['max_overflow'] = int(os.getenv('DB_MAX_OVERFLOW', 10))
+            options['pool_timeout'] = int(os.getenv('DB_POOL_TIMEOUT_SECONDS', 30))
+        return options
+
+    if mode == 'null':
+        return {'poolclass': NullPool}
+
+    # Postgres (or other server databases)
+    return {
+        'poolclass': QueuePool,
+        'pool_size': pool_size,
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT_SECONDS', 30)),
+        # Recycle before server/proxy idle timeouts close the socket
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE_SECONDS', 1800)),
+        'pool_pre_ping': True,
+        'pool_use_lifo': True
+    }
+
+
 class Config:
     """Application configuration"""
     
     # Flask
     DEBUG = os.getenv('FLASK_DEBUG', 'True') == 'True'
+    # Import heavy AI/document dependencies in create_app instead of on first use
+    # (pre-fork servers: load once in the master, share with workers)
+    PRELOAD_HEAVY_MODULES = os.getenv('PRELOAD_HEAVY_MODULES', 'False') == 'True'
+
+    # Production server (serve.py)
+    WEB_BIND = os.getenv('WEB_BIND', '0.0.0.0:5000')
+    # DuckDB defaults to one worker unless a DB writer process takes the writes (DB_WRITER_SOCKET)
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', (
+        1 if 'duckdb' in os.getenv('DATABASE_URI', '') and not os.getenv('DB_WRITER_SOCKET')
+        else (os.cpu_count() or 1) * 2 + 1
+    )))
+    WEB_WORKER_CLASS = os.getenv('WEB_WORKER_CLASS', 'gthread')  # 'gthread', 'gevent' or 'sync'
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 8))
+    # LLM calls are slow; a worker is only killed after this long without progress
+    WEB_TIMEOUT_SECONDS = int(os.getenv('WEB_TIMEOUT_SECONDS', 120))
+    WEB_GRACEFUL_TIMEOUT_SECONDS = int(os.getenv('WEB_GRACEFUL_TIMEOUT_SECONDS', 30))
+    WEB_KEEPALIVE_SECONDS = int(os.getenv('WEB_KEEPALIVE_SECONDS', 5))
+    # Recycle workers after this many requests (0 = never)
+    WEB_MAX_REQUESTS = int(os.getenv('WEB_MAX_REQUESTS', 0))
+    READINESS_CACHE_SECONDS = float(os.getenv('READINESS_CACHE_SECONDS', 2))
+
+    # Instrumentation: span timers, Server-Timing headers and /metrics (off = no overhead)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'True') == 'True'
+    # Optional bearer token required to scrape /metrics
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    METRICS_BUCKETS = tuple(
+        float(b) for b in os.getenv('METRICS_BUCKETS', '0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60').split(',')
+    )
 
     # JWT
     SECRET_KEY = os.getenv('SECRET_KEY', '')
@@ -29,19 +126,52 @@ class Config:
     )
     # -----------------------------------
 
+    # ---------- Password hashing ----------
+    # bcrypt cost factor; stored hashes with a different cost are re-hashed on next login
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    # bcrypt runs on a worker pool sized to the cores, off the request thread
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', os.cpu_count() or 2))
+    # Pending hashes allowed per worker before logins are rejected as busy
+    PASSWORD_HASH_QUEUE_FACTOR = int(os.getenv('PASSWORD_HASH_QUEUE_FACTOR', 8))
+    PASSWORD_HASH_TIMEOUT_SECONDS = float(os.getenv('PASSWORD_HASH_TIMEOUT_SECONDS', 10))
+    # --------------------------------------
+
+    # Cross-request cache of user roles/domains used for authorization checks (upper bound on
+    # staleness; role changes reach other workers within TOKEN_VERSION_REFRESH_SECONDS)
+    PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv('PRINCIPAL_CACHE_TTL_SECONDS', 5))
+
+    # Authorization: 'database' checks roles in the DB, 'claims' decides from JWT claims alone
+    AUTHZ_MODE = os.getenv('AUTHZ_MODE', 'database')
+    # How often the in-memory token version table pulls changes (role changes revoke tokens)
+    TOKEN_VERSION_REFRESH_SECONDS = float(os.getenv('TOKEN_VERSION_REFRESH_SECONDS', 2))
+
+    # Compiled RBAC access matrix (and navigation built from it) is rebuilt at least this often
+    ACCESS_MATRIX_TTL_SECONDS = int(os.getenv('ACCESS_MATRIX_TTL_SECONDS', 60))
+
+    # Admin user listing page size when the client does not pass ?limit=
+    USER_LIST_DEFAULT_LIMIT = int(os.getenv('USER_LIST_DEFAULT_LIMIT', 500))
+
+    # Bulk user import: rows per transaction and bcrypt threads (separate from login hashing)
+    USER_IMPORT_BATCH_SIZE = int(os.getenv('USER_IMPORT_BATCH_SIZE', 1000))
+    USER_IMPORT_HASH_WORKERS = int(os.getenv('USER_IMPORT_HASH_WORKERS', os.cpu_count() or 2))
+
+    # Single DuckDB writer: Unix socket of the writer process (empty = in-process writer thread).
+    # Required with more than one worker process on DuckDB (see DBWriter)
+    DB_WRITER_SOCKET = os.getenv('DB_WRITER_SOCKET', '')
+    # Group commit: at most this many write operations, or what arrives within the window
+    DB_WRITER_BATCH_MAX_OPS = int(os.getenv('DB_WRITER_BATCH_MAX_OPS', 500))
+    DB_WRITER_BATCH_WINDOW_MS = int(os.getenv('DB_WRITER_BATCH_WINDOW_MS', 5))
+    DB_WRITER_QUEUE_MAX = int(os.getenv('DB_WRITER_QUEUE_MAX', 10000))
+
     # Database
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URI', '')
     SQLALCHEMY_TRACK_MODIFICATIONS = False 
     
-    from sqlalchemy.pool import NullPool
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        'poolclass': NullPool,
-        'connect_args': {
-            'config': {
-                'allow_unsigned_extensions': 'true'
-            }
-        }
-    }
+    # Connection pooling: DB_POOL_MODE, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT_SECONDS,
+    # DB_POOL_RECYCLE_SECONDS (see build_engine_options)
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(SQLALCHEMY_DATABASE_URI)
+    # Serialises migrations across worker processes (Postgres uses an advisory lock instead)
+    MIGRATION_LOCK_PATH = os.getenv('MIGRATION_LOCK_PATH', './data/.migrate.lock')
 
     # API Configuration
     API_TITLE = 'Enterprise Flask Microservice'
@@ -70,8 +200,47 @@ class Config:
     CHROMA_DB_PATH = os.getenv('CHROMA_DB_PATH', './data/chroma')
     DOCUMENTS_PATH = os.getenv('DOCUMENTS_PATH', './data/documents')
 
+    # Archival: rows older than the retention window move to date-partitioned Parquet
+    ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'False') == 'True'
+    ARCHIVE_PATH = os.getenv('ARCHIVE_PATH', './data/archive')
+    ARCHIVE_INTERVAL_SECONDS = int(os.getenv('ARCHIVE_INTERVAL_SECONDS', 3600))
+    ARCHIVE_BATCH_ROWS = int(os.getenv('ARCHIVE_BATCH_ROWS', 50000))
+    CHAT_HISTORY_RETENTION_DAYS = int(os.getenv('CHAT_HISTORY_RETENTION_DAYS', 30))
+    GUARDRAILS_LOG_RETENTION_DAYS = int(os.getenv('GUARDRAILS_LOG_RETENTION_DAYS', 90))
+
+    # Document storage cleanup: async removal after deletes, periodic orphan collection
+    DOCUMENT_CLEANUP_QUEUE_MAX = int(os.getenv('DOCUMENT_CLEANUP_QUEUE_MAX', 10000))
+    RECONCILE_ENABLED = os.getenv('RECONCILE_ENABLED', 'False') == 'True'
+    RECONCILE_INTERVAL_SECONDS = int(os.getenv('RECONCILE_INTERVAL_SECONDS', 3600))
+    RECONCILE_BATCH_SIZE = int(os.getenv('RECONCILE_BATCH_SIZE', 500))
+    # Files/collections without a row younger than this may belong to an upload in progress
+    RECONCILE_GRACE_SECONDS = int(os.getenv('RECONCILE_GRACE_SECONDS', 3600))
+    # A replaced document's old collection outlives the switch by this long, so
+    # readers that loaded the old row finish their search before it is removed
+    DOCUMENT_SUPERSEDED_GRACE_SECONDS = float(os.getenv('DOCUMENT_SUPERSEDED_GRACE_SECONDS', 120))
+
+    # Agentic request pipeline: concurrent stages with per-stage deadlines (seconds)
+    PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', 32))
+    PIPELINE_FANOUT_WORKERS = int(os.getenv('PIPELINE_FANOUT_WORKERS', 16))
+    PIPELINE_GUARDRAILS_TIMEOUT_SECONDS = float(os.getenv('PIPELINE_GUARDRAILS_TIMEOUT_SECONDS', 5))
+    PIPELINE_DB_TIMEOUT_SECONDS = float(os.getenv('PIPELINE_DB_TIMEOUT_SECONDS', 5))
+    PIPELINE_RETRIEVAL_TIMEOUT_SECONDS = float(os.getenv('PIPELINE_RETRIEVAL_TIMEOUT_SECONDS', 15))
+    PIPELINE_SEARCH_TIMEOUT_SECONDS = float(os.getenv('PIPELINE_SEARCH_TIMEOUT_SECONDS', 8))
+    PIPELINE_LLM_TIMEOUT_SECONDS = float(os.getenv('PIPELINE_LLM_TIMEOUT_SECONDS', 90))
+    # Identical concurrent LLM calls (same model, parameters and rendered prompt) share one upstream call
+    LLM_SINGLE_FLIGHT_ENABLED = os.getenv('LLM_SINGLE_FLIGHT_ENABLED', 'True') == 'True'
+    # Longest a duplicate request waits on the shared call before calling the model itself
+    LLM_SINGLE_FLIGHT_WAIT_SECONDS = float(os.getenv('LLM_SINGLE_FLIGHT_WAIT_SECONDS', 60))
+
     # Guardrails
     GUARDRAILS_ENABLED = os.getenv('GUARDRAILS_ENABLED', 'True') == 'True'
+    # Compiled rule set is reloaded after this many seconds so other workers pick up rule edits
+    GUARDRAILS_RULES_TTL_SECONDS = int(os.getenv('GUARDRAILS_RULES_TTL_SECONDS', 30))
+    # Retroactive chat history scan
+    GUARDRAILS_BACKFILL_CHUNK_SIZE = int(os.getenv('GUARDRAILS_BACKFILL_CHUNK_SIZE', 5000))
+    GUARDRAILS_BACKFILL_WORKERS = int(os.getenv('GUARDRAILS_BACKFILL_WORKERS', os.cpu_count() or 2))
+    # Held by the process running the backfill job
+    GUARDRAILS_BACKFILL_LOCK_PATH = os.getenv('GUARDRAILS_BACKFILL_LOCK_PATH', './data/.guardrails_backfill.lock')
 
     # File Upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
@@ -83,6 +252,22 @@ class Config:
     SMTP_USERNAME = os.getenv('SMTP_USERNAME', '')
     SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
     SMTP_SENDER_EMAIL = os.getenv('SMTP_SENDER_EMAIL', '')
+    # Disable both for a local SMTP stand-in (e.g. aiosmtpd)
+    SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'True') == 'True'
+    SMTP_USE_AUTH = os.getenv('SMTP_USE_AUTH', 'True') == 'True'
+    SMTP_TIMEOUT_SECONDS = int(os.getenv('SMTP_TIMEOUT_SECONDS', 10))
+    # Close the pooled SMTP connection after this long without mail
+    SMTP_IDLE_TIMEOUT_SECONDS = int(os.getenv('SMTP_IDLE_TIMEOUT_SECONDS', 60))
+
+    # Outbound mail queue
+    MAIL_QUEUE_MAX_SIZE = int(os.getenv('MAIL_QUEUE_MAX_SIZE', 10000))
+    MAIL_MAX_ATTEMPTS = int(os.getenv('MAIL_MAX_ATTEMPTS', 5))
+    MAIL_RETRY_BACKOFF_SECONDS = float(os.getenv('MAIL_RETRY_BACKOFF_SECONDS', 1))
+
+    # OTP store: 'memory' (single process only) or 'sqlite' (shared by all workers)
+    OTP_BACKEND = os.getenv('OTP_BACKEND', 'sqlite')
+    OTP_STORE_PATH = os.getenv('OTP_STORE_PATH', './data/otp_store.sqlite3')
+    OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', 5))
     
     @staticmethod
     def init_app(app):
@@ -6,21 +6,41 @@ import os
 import uuid
 from flask import request
 from flask_smorest import Blueprint
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from marshmallow import ValidationError, Schema, fields
 from werkzeug.utils import secure_filename
 
-from services.agentic_services.rag_service import RAGService
-from services.agentic_services.chat_service import ChatService
-from services.guardrails_services.guardrails_service import GuardrailsService
+from services.system_services.lazy_imports import LazyImports
+from services.guardrails_services.guardrails_evaluator import GuardrailsEvaluator
+from services.system_services.archive_service import ArchiveService
+from services.system_services.agentic_pipeline import AgenticPipeline
+from services.system_services.metrics import Metrics
+from services.system_services.document_cleanup import DocumentCleanup, DocumentReconciler
+from services.system_services.document_versions import DocumentVersions
+from services.auth_services.authorization import Authorization
+from services.system_services.request_pipeline import StageRejected, StageTimeout
 from dtos.app_data.rag_dto import (
-    DocumentSchema, RagChatRequestSchema, RagChatResponseSchema
+    DocumentSchema, RagChatRequestSchema, RagChatResponseSchema, BulkDeleteDocumentsSchema, BulkDeleteResultSchema,
+    ReconcileArgsSchema, ReconcileResultSchema, DocumentVersionSchema, DocumentHistorySchema
 )
 from dtos.app_data.chat_dto import (
-    ToolChatRequestSchema, ToolChatResponseSchema, ChatHistorySchema
+    ToolChatRequestSchema, ToolChatResponseSchema, ChatHistorySchema, ChatHistoryArgsSchema
 )
 from configs.app_config import Config
 
+
+def _instrument_rag_service(rag_service_class):
+    # RAGService lives outside this module; per-stage spans for the upload
+    # (text extraction, chunking + embedding), added once when it is imported
+    Metrics.instrument(rag_service_class, '_extract_text', 'upload.extract_text')
+    Metrics.instrument(rag_service_class, '_create_vector_store', 'upload.create_vector_store')
+
+
+# Imported on first use: these pull in chromadb, langchain, pypdf and docx
+RAGService = LazyImports.attribute('services.agentic_services.rag_service', 'RAGService',
+                                   on_load=_instrument_rag_service)
+ChatService = LazyImports.attribute('services.agentic_services.chat_service', 'ChatService')
+
 api = Blueprint(
     name='AgenticController', 
     import_name='AgenticController', 
@@ -52,7 +72,8 @@ class AgenticController:
             file = files['file']
             
             rag_service = RAGService()
-            document = rag_service.upload_document(file, user_id)
+            with Metrics.span('upload_document'):
+                document = rag_service.upload_document(file, user_id)
             
             return document
         except ValueError as e:
@@ -69,33 +90,33 @@ class AgenticController:
         """Chat with documents using RAG"""
         try:
             user_id = get_jwt_identity()
+            domain_id = get_jwt().get('domain_id')
             
-            guardrails_result = GuardrailsService.check_content(
-                data['query'],
-                user_id,
-                'input'
-            )
-            
-            if not guardrails_result['passed']:
-                agentic.abort(400, message='Content violates guardrails', violations=guardrails_result['violations'])
-            
+            # Input guardrails, document retrieval and web search run concurrently
             rag_service = RAGService()
-            response = rag_service.chat_with_documents(
+            response, _ = AgenticPipeline.rag_chat(
+                rag_service,
                 query=data['query'],
                 user_id=user_id,
+                domain_id=domain_id,
                 use_internet=data.get('use_internet', False)
             )
             
-            output_check = GuardrailsService.check_content(
+            output_check = GuardrailsEvaluator.check_content(
                 response['answer'],
                 user_id,
-                'output'
+                'output',
+                domain_id=domain_id
             )
             
             if not output_check['passed']:
                 response['answer'] = output_check['cleaned_content']
             
             return response
+        except StageRejected as e:
+            api.abort(400, message='Content violates guardrails', violations=e.result['violations'])
+        except StageTimeout as e:
+            api.abort(504, message=str(e))
         except ValidationError as err:
             agentic.abort(400, message=str(err.messages))
         except ValueError as e:
@@ -123,15 +144,80 @@ class AgenticController:
     @jwt_required()
     def api_delete_rag_document(document_id):
         """Delete document"""
+        try:
+            user_id = get_jwt_identity()
+            # Row deleted now; file and collection are removed in the background
+            result = DocumentCleanup.bulk_delete(user_id, [document_id])
+            if not result['deleted']:
+                raise ValueError('Document not found')
+            return {'message': f'Document {document_id} deleted successfully'}
+        except ValueError as e:
+            api.abort(404, message=str(e))
+        except Exception as e:
+            api.abort(500, message=str(e))
+    
+    @staticmethod
+    @api.route('/rag/documents/<int:document_id>', methods=['PUT'])
+    @api.arguments(UploadSchema, location='files')
+    @api.response(200, DocumentVersionSchema)
+    @jwt_required()
+    def api_put_rag_document(files, document_id):
+        """Replace a document with a new version (only changed chunks are re-embedded)"""
         try:
             user_id = get_jwt_identity()
             rag_service = RAGService()
-            result = rag_service.delete_document(document_id, user_id)
-            return result
+            with Metrics.span('update_document'):
+                return DocumentVersions.update(rag_service, document_id, user_id, files['file'])
         except ValueError as e:
-            agentic.abort(404, message=str(e))
+            api.abort(404 if str(e) == 'Document not found' else 400, message=str(e))
+        except RuntimeError as e:
+            api.abort(409, message=str(e))
         except Exception as e:
-            agentic.abort(500, message=str(e))
+            api.abort(500, message=f'Update failed: {str(e)}')
+    
+    @staticmethod
+    @api.route('/rag/documents/<int:document_id>/versions', methods=['GET'])
+    @api.response(200, DocumentHistorySchema(many=True))
+    @jwt_required()
+    def api_get_rag_document_versions(document_id):
+        """Get a document's version history"""
+        try:
+            return DocumentVersions.history(document_id, get_jwt_identity())
+        except ValueError as e:
+            api.abort(404, message=str(e))
+        except Exception as e:
+            api.abort(500, message=str(e))
+    
+    @staticmethod
+    @api.route('/rag/documents', methods=['DELETE'])
+    @api.arguments(BulkDeleteDocumentsSchema)
+    @api.response(202, BulkDeleteResultSchema)
+    @jwt_required()
+    def api_delete_rag_documents(data):
+        """Delete several documents (storage cleanup runs asynchronously)"""
+        try:
+            user_id = get_jwt_identity()
+            return DocumentCleanup.bulk_delete(user_id, data['document_ids'])
+        except Exception as e:
+            api.abort(500, message=str(e))
+    
+    @staticmethod
+    @api.route('/rag/reconcile', methods=['POST'])
+    @api.arguments(ReconcileArgsSchema, location='query')
+    @api.response(200, ReconcileResultSchema)
+    @jwt_required()
+    def api_post_rag_reconcile(args):
+        """Remove vector-store collections and files with no document row (platform admin only)"""
+        try:
+            Authorization.verify_platform_admin()
+            result = DocumentReconciler.run_once(dry_run=args['dry_run'], batch_size=args['batch_size'])
+        except ValueError as e:
+            api.abort(403, message=str(e))
+        except Exception as e:
+            api.abort(500, message=str(e))
+        if result is None:
+            api.abort(409, message='A reconcile pass is already running')
+        return result
     
     # ============================================================================
     # CHAT OPERATIONS
@@ -145,6 +231,7 @@ class AgenticController:
         """Chat with tool calling and optional image support"""
         try:
             user_id = get_jwt_identity()
+            domain_id = get_jwt().get('domain_id')
             images = []
             message = None
             
@@ -177,42 +264,37 @@ class AgenticController:
                 data = ToolChatRequestSchema().load(json_data)
                 message = data['message']
             
-            guardrails_result = GuardrailsService.check_content(
-                message,
-                user_id,
-                'input'
-            )
-            
-            if not guardrails_result['passed']:
+            # Input guardrails and history load run concurrently; the model only
+            # sees the message once the guardrails have accepted it
+            chat_service = ChatService()
+            try:
+                response, _ = AgenticPipeline.tool_chat(
+                    chat_service,
+                    message=message,
+                    user_id=user_id,
+                    domain_id=domain_id,
+                    images=images
+                )
+            finally:
                 for img_path in images:
                     if os.path.exists(img_path):
                         os.remove(img_path)
-                agentic.abort(400, message='Content violates guardrails', violations=guardrails_result['violations'])
-            
-            chat_service = ChatService()
-            history = chat_service.get_chat_history(user_id, 'tool', limit=10)
-            
-            response = chat_service.chat_with_tools(
-                message=message,
-                user_id=user_id,
-                chat_history=history,
-                images=images if images else None
-            )
-            
-            for img_path in images:
-                if os.path.exists(img_path):
-                    os.remove(img_path)
             
-            output_check = GuardrailsService.check_content(
+            output_check = GuardrailsEvaluator.check_content(
                 response['answer'],
                 user_id,
-                'output'
+                'output',
+                domain_id=domain_id
             )
             
             if not output_check['passed']:
                 response['answer'] = output_check['cleaned_content']
             
             return response
+        except StageRejected as e:
+            api.abort(400, message='Content violates guardrails', violations=e.result['violations'])
+        except StageTimeout as e:
+            api.abort(504, message=str(e))
         except ValidationError as err:
             agentic.abort(400, message=str(err.messages))
         except ValueError as e:
@@ -222,14 +304,20 @@ class AgenticController:
     
     @staticmethod
     @api.route('/chat/history', methods=['GET'])
+    @api.arguments(ChatHistoryArgsSchema, location='query')
     @api.response(200, ChatHistorySchema(many=True))
     @jwt_required()
-    def api_get_chat_history():
-        """Get chat history"""
+    def api_get_chat_history(args):
+        """Get chat history (recent, or a date range including archived history)"""
         try:
             user_id = get_jwt_identity()
+            if args['start']:
+                return ArchiveService.query(
+                    'chat_history', args['start'], args['end'],
+                    filters={'user_id': int(user_id)}, limit=args['limit']
+                )
             chat_service = ChatService()
-            history = chat_service.get_chat_history(user_id, limit=50)
+            history = chat_service.get_chat_history(user_id, limit=args['limit'])
             return history
         except Exception as e:
             api.abort(500, message=str(e))
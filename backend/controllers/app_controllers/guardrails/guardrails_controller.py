@@ -1,14 +1,19 @@
 """
 Guardrails Controller - Guardrail configuration and logging
 """
+from flask import current_app
 from flask_smorest import Blueprint
 from flask_jwt_extended import jwt_required
 from marshmallow import ValidationError
 
 from services.guardrails_services.guardrails_service import GuardrailsService
-from services.auth_services.auth_service import AuthService
+from services.guardrails_services.guardrails_evaluator import GuardrailsEvaluator, GuardrailScopes
+from services.guardrails_services.guardrails_backfill import GuardrailsBackfill
+from services.auth_services.authorization import Authorization
+from services.system_services.archive_service import ArchiveService
 from dtos.app_data.guardrails_dto import (
-    GuardrailConfigSchema, UpdateGuardrailSchema, CreateGuardrailSchema, GuardrailLogSchema
+    GuardrailConfigSchema, UpdateGuardrailSchema, CreateGuardrailSchema, GuardrailLogSchema, GuardrailLogArgsSchema,
+    BackfillRequestSchema, BackfillStatusSchema
 )
 
 # Create Blueprint
@@ -29,7 +34,8 @@ class GuardrailsController:
         """Get guardrails configuration"""
         try:
             config = GuardrailsService.get_guardrails_config()
-            return config
+            scopes = GuardrailScopes.all()
+            return [GuardrailScopes.attach(rule, scopes) for rule in config]
         except Exception as e:
             api.abort(500, message=str(e))
     
@@ -41,9 +47,12 @@ class GuardrailsController:
     def api_post_guardrail_config(data):
         """Create new guardrail rule (admin only)"""
         try:
-            AuthService.verify_admin()
-            rule = GuardrailsService.create_guardrail(**data)
-            return rule
+            Authorization.verify_admin()
+            fields, scope = GuardrailScopes.split(data)
+            rule = GuardrailsService.create_guardrail(**fields)
+            GuardrailScopes.set(rule['id'], scope)
+            GuardrailsEvaluator.invalidate()
+            return GuardrailScopes.attach(rule)
         except ValidationError as err:
             api.abort(400, message=str(err.messages))
         except ValueError as e:
@@ -59,11 +68,14 @@ class GuardrailsController:
     def api_put_guardrail_config(data, rule_id):
         """Update guardrail configuration (admin only)"""
         try:
-            AuthService.verify_admin()
-            rule = GuardrailsService.update_guardrail(rule_id, **data)
-            return rule
+            Authorization.verify_admin()
+            fields, scope = GuardrailScopes.split(data)
+            rule = GuardrailsService.update_guardrail(rule_id, **fields)
+            GuardrailScopes.set(rule_id, scope)
+            GuardrailsEvaluator.invalidate()
+            return GuardrailScopes.attach(rule)
         except ValidationError as err:
-            guardrails.abort(400, message=str(err.messages))
+            api.abort(400, message=str(err.messages))
         except ValueError as e:
             api.abort(400, message=str(e))
         except Exception as e:
@@ -76,8 +88,9 @@ class GuardrailsController:
     def api_delete_guardrail_config(rule_id):
         """Delete guardrail rule (admin only)"""
         try:
-            AuthService.verify_admin()
+            Authorization.verify_admin()
             result = GuardrailsService.delete_guardrail(rule_id)
+            GuardrailsEvaluator.invalidate()
             return result
         except ValueError as e:
             api.abort(400, message=str(e))
@@ -86,15 +99,68 @@ class GuardrailsController:
     
     @staticmethod
     @api.route('/logs', methods=['GET'])
+    @api.arguments(GuardrailLogArgsSchema, location='query')
     @api.response(200, GuardrailLogSchema(many=True))
     @jwt_required()
-    def api_get_guardrails_logs():
-        """Get guardrails detection logs (admin only)"""
+    def api_get_guardrails_logs(args):
+        """Get guardrails detection logs (admin only); a start date also searches the archive"""
         try:
-            AuthService.verify_admin()
-            logs = GuardrailsService.get_guardrails_logs(limit=100)
+            Authorization.verify_admin()
+            if args['start']:
+                return ArchiveService.query('guardrails_logs', args['start'], args['end'], limit=args['limit'])
+            logs = GuardrailsService.get_guardrails_logs(limit=args['limit'])
             return logs
         except ValueError as e:
             api.abort(403, message=str(e))
         except Exception as e:
             api.abort(500, message=str(e))
+    
+    @staticmethod
+    @api.route('/backfill', methods=['POST'])
+    @api.arguments(BackfillRequestSchema)
+    @api.response(202, BackfillStatusSchema)
+    @jwt_required()
+    def api_post_guardrails_backfill(data):
+        """Start a retroactive scan of chat history with the current rules (admin only)"""
+        try:
+            Authorization.verify_admin()
+            status = GuardrailsBackfill.start(
+                current_app._get_current_object(),
+                rule_ids=data.get('rule_ids'),
+                resume=data.get('resume', True),
+                chunk_size=data.get('chunk_size'),
+                workers=data.get('workers')
+            )
+            return status, 202
+        except ValueError as e:
+            api.abort(400, message=str(e))
+        except Exception as e:
+            api.abort(500, message=str(e))
+    
+    @staticmethod
+    @api.route('/backfill', methods=['GET'])
+    @api.response(200, BackfillStatusSchema)
+    @jwt_required()
+    def api_get_guardrails_backfill():
+        """Get backfill progress and throughput (admin only)"""
+        try:
+            Authorization.verify_admin()
+            return GuardrailsBackfill.status()
+        except ValueError as e:
+            api.abort(403, message=str(e))
+        except Exception as e:
+            api.abort(500, message=str(e))
+    
+    @staticmethod
+    @api.route('/backfill', methods=['DELETE'])
+    @api.response(200, BackfillStatusSchema)
+    @jwt_required()
+    def api_delete_guardrails_backfill():
+        """Stop the running backfill after its current chunk (admin only)"""
+        try:
+            Authorization.verify_admin()
+            return GuardrailsBackfill.stop()
+        except ValueError as e:
+            api.abort(403, message=str(e))
+        except Exception as e:
+            api.abort(500, message=str(e))
\ No newline at end of file
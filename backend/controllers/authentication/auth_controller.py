@@ -4,6 +4,9 @@ from flask_smorest import Blueprint, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from services.auth_services.auth_service import AuthService
+from services.auth_services.login_service import LoginService
+from services.auth_services.principal import PrincipalCache
+from services.system_services.metrics import Metrics
 from dtos.auth_data.auth_data import (
     LoginSchema, SignupSchema, UserResponseSchema, CheckEmailSchema,
     AuthResponseSchema, CheckEmailResponseSchema, SignupConfigSchema,
@@ -11,6 +14,9 @@ from dtos.auth_data.auth_data import (
 )
 from dtos.auth_data.otp_data import VerifyOtpSchema
 
+# AuthService lives outside this module; time its token issuing
+Metrics.instrument(AuthService, '_generate_token_response', 'auth.generate_token_response')
+
 # Create Blueprint
 api = Blueprint(
     name='AuthController',
@@ -125,7 +131,7 @@ class AuthController:
         Frontend will handle domain/role selection and 2FA before getting final access token.
         """
         try:
-            result = AuthService.login_user(
+            result = LoginService.login(
                 email=data['email'],
                 password=data['password']
             )
@@ -149,7 +155,8 @@ class AuthController:
             - active_role (required)
         """
         try:
-            result = AuthService.complete_login_with_domain_and_otp(
+            result = LoginService.complete_login(
+                identity=get_jwt_identity(),
                 email=data['email'],
                 otp=data.get('otp', ''),
                 domain_id=data['domain_id'],
@@ -223,8 +230,7 @@ class AuthController:
     def api_post_signup_config(data):
         """Update signup configuration (Admin only)"""
         try:
-            user = AuthService.get_current_user()
-            if not user.is_admin():
+            if not PrincipalCache.current().is_admin():
                 abort(403, message="Admin access required")
 
             enabled = data.get('enabled', True)
@@ -2,24 +2,36 @@
 Frontend UI Controller - User, Role, Component, Domain Management
 Consolidated from user_controller, role_controller, component_controller, domain_controller
 """
-from flask import request, jsonify
+import json
+from flask import request, jsonify, Response, stream_with_context
 from flask_smorest import Blueprint, abort
 from flask_jwt_extended import jwt_required, get_jwt
 from marshmallow import ValidationError
 
-from models import db, RoleModel
+from models import db, RoleModel, UserRoleMappingModel
 from services.system_services.user_service import UserService
+from services.system_services.user_directory import UserDirectory
+from services.system_services.domain_membership import DomainMembership
+from services.system_services.user_import import UserImport
 from services.auth_services.auth_service import AuthService
+from services.auth_services.principal import PrincipalCache
+from services.auth_services.authorization import Authorization
 from services.ui_services.component_service import ComponentService
+from services.ui_services.access_matrix import AccessMatrix
+from services.ui_services.navigation_cache import NavigationCache
+from services.ui_services.component_assignment import ComponentAssignment
 from services.system_services.domain_service import DomainService
 
-from dtos.ui_data.user_dto import UserSchema, CreateUserSchema, UpdateUserSchema
+from dtos.ui_data.user_dto import (
+    UserSchema, CreateUserSchema, UpdateUserSchema, UserSummarySchema, UserListArgsSchema,
+    UserImportArgsSchema
+)
 from dtos.role_dto import RoleSchema, RoleCreateSchema, RoleUpdateSchema, AssignRolesSchema
 from dtos.ui_data.component_dto import (
-    ComponentsListSchema, AssignComponentSchema, ComponentAccessSchema,
+    ComponentsListSchema, AssignComponentSchema, ComponentAccessSchema, BulkAssignComponentsSchema,
     ComponentListResponseSchema, NavigationResponseSchema
 )
-from dtos.system_data.domain_dto import DomainSchema, CreateDomainSchema, UpdateDomainSchema
+from dtos.system_data.domain_dto import DomainSchema, CreateDomainSchema, UpdateDomainSchema, DomainMembersSchema
 
 # Create Blueprint
 api = Blueprint(
@@ -38,14 +50,21 @@ class UIController:
     
     @staticmethod
     @api.route('/users', methods=['GET'])
-    @api.response(200, UserSchema(many=True))
+    @api.arguments(UserListArgsSchema, location='query')
+    @api.response(200, UserSummarySchema(many=True))
     @jwt_required()
-    def api_get_users():
-        """List all users (admin only)"""
+    def api_get_users(args):
+        """
+        List users one page at a time (admin only).
+        The body is one page (limit, default USER_LIST_DEFAULT_LIMIT); the
+        cursor for the next page is in X-Next-Cursor, absent on the last page.
+        Clients that want every user must follow it.
+        """
         try:
-            AuthService.verify_admin()
-            users = UserService.get_all_users()
-            return users
+            Authorization.verify_admin()
+            users, next_cursor = UserDirectory.list_users(PrincipalCache.current(), **args)
+            headers = {'X-Next-Cursor': str(next_cursor)} if next_cursor is not None else {}
+            return users, 200, headers
         except ValueError as e:
             abort(403, message=str(e))
         except Exception as e:
@@ -63,7 +82,7 @@ class UIController:
             # If Platform Admin, can specify any domain_id (or None for global?)
             # If Domain Admin, must be their domain.
             
-            current_user = AuthService.get_current_user()
+            current_user = PrincipalCache.current()
             domain_id = data.get('domain_id')
             
             if current_user.has_role('platform_admin'):
@@ -74,7 +93,7 @@ class UIController:
                 # Domain Admin
                 # Must infer domain_id if not provided, or validate it
                 # Find the domain this admin manages
-                admin_domains = [m.domain_id for m in current_user.user_roles if m.active_flag and m.role.role_name == 'admin']
+                admin_domains = sorted(current_user.admin_domains())
                 if not admin_domains:
                     abort(403, message="Not an admin of any domain")
                 
@@ -109,7 +128,7 @@ class UIController:
                 # Platform Admin creating global user (e.g. another platform admin)
                 # Fallback to AuthService.create_user (which is actually register_user)
                 # But we need to be careful.
-                AuthService.verify_platform_admin()
+                Authorization.verify_platform_admin()
                 user = AuthService.create_user(
                     email=data['email'],
                     password=data['password'],
@@ -126,6 +145,31 @@ class UIController:
             abort(400, message=str(e))
         except Exception as e:
             abort(500, message=str(e))
+
+    @staticmethod
+    @api.route('/users/import', methods=['POST'])
+    @api.arguments(UserImportArgsSchema, location='query')
+    @api.response(200, description="NDJSON report: rejected rows, per-batch progress and a summary")
+    @jwt_required()
+    def api_import_users(args):
+        """Bulk import users from a CSV or NDJSON body (Admin only)"""
+        try:
+            Authorization.verify_admin()
+            fmt = args['format'] or ('csv' if 'csv' in (request.mimetype or '') else 'ndjson')
+            report = UserImport.run(
+                request.stream,
+                fmt,
+                PrincipalCache.current(),
+                default_domain_id=args['domain_id'],
+                batch_size=args['batch_size']
+            )
+        except ValueError as e:
+            abort(403, message=str(e))
+        except Exception as e:
+            abort(500, message=str(e))
+
+        lines = (json.dumps(record) + '\n' for record in report)
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
     
     @staticmethod
     @api.route('/users/<int:user_id>', methods=['GET'])
@@ -134,7 +178,7 @@ class UIController:
     def api_get_user(user_id):
         """Get user by ID (admin only)"""
         try:
-            AuthService.verify_admin()
+            Authorization.verify_admin()
             user = UserService.get_user_by_id(user_id)
             return user
         except ValueError as e:
@@ -150,8 +194,13 @@ class UIController:
     def api_put_user(data, user_id):
         """Update user details (admin only)"""
         try:
-            AuthService.verify_admin()
+            Authorization.verify_admin()
+            active_flag = data.pop('active_flag', None)
+            if active_flag is not None:
+                UserDirectory.set_active(user_id, active_flag)
             user = UserService.update_user(user_id, data)
+            if data.get('roles') or data.get('role') or active_flag is not None:
+                Authorization.roles_changed(user_id)
             return user
         except ValidationError as err:
             abort(400, message=str(err.messages))
@@ -167,8 +216,10 @@ class UIController:
     def api_delete_user(user_id):
         """Delete user (admin only)"""
         try:
-            AuthService.verify_admin()
-            result = UserService.delete_user(user_id)
+            Authorization.verify_admin()
+            result = UserDirectory.delete_user(user_id)
+            # Outstanding tokens of the deleted user must stop working too
+            Authorization.roles_changed(user_id)
             return result
         except ValueError as e:
             abort(400, message=str(e))
@@ -199,8 +250,7 @@ class UIController:
     def api_post_role(data):
         """Create a new role (Admin only)"""
         try:
-            user = AuthService.get_current_user()
-            if not user.is_admin():
+            if not PrincipalCache.current().is_admin():
                 abort(403, message="Admin access required")
             
             if RoleModel.query.filter_by(role_name=data['name']).first():
@@ -243,8 +293,7 @@ class UIController:
     def api_put_role(data, role_id):
         """Update a role (Admin only)"""
         try:
-            user = AuthService.get_current_user()
-            if not user.is_admin():
+            if not PrincipalCache.current().is_admin():
                 abort(403, message="Admin access required")
             
             role = RoleModel.query.get(role_id)
@@ -264,6 +313,7 @@ class UIController:
                 role.description = data['description']
             
             db.session.commit()
+            AccessMatrix.invalidate()
             return role
         except ValidationError as err:
             abort(400, message=str(err.messages))
@@ -279,8 +329,7 @@ class UIController:
     def api_delete_role(role_id):
         """Delete a role (Admin only)"""
         try:
-            user = AuthService.get_current_user()
-            if not user.is_admin():
+            if not PrincipalCache.current().is_admin():
                 abort(403, message="Admin access required")
             
             role = RoleModel.query.get(role_id)
@@ -290,8 +339,15 @@ class UIController:
             if role.role_name in ['admin', 'user']:
                 abort(400, message="Cannot delete default system roles")
             
+            holders = [user_id for (user_id,) in db.session.query(UserRoleMappingModel.user_id)
+                       .filter_by(role_id=role_id).distinct().all()]
             db.session.delete(role)
             db.session.commit()
+            AccessMatrix.invalidate()
+            # Every cached principal may hold the deleted role; holders' token
+            # versions carry the change to the other workers
+            PrincipalCache.invalidate()
+            Authorization.roles_changed_many(holders)
             
             return {'message': f"Role '{role.role_name}' deleted successfully"}
         except ValueError as e:
@@ -307,14 +363,14 @@ class UIController:
     def api_post_assign_roles(data):
         """Assign roles to a user (Admin only)"""
         try:
-            user = AuthService.get_current_user()
-            if not user.is_admin():
+            if not PrincipalCache.current().is_admin():
                 abort(403, message="Admin access required")
             
             AuthService.assign_roles(
                 user_id=data['user_id'],
                 role_names=data['role_names']
             )
+            Authorization.roles_changed(data['user_id'])
             
             return {'message': 'Roles assigned successfully'}
         except ValidationError as err:
@@ -346,7 +402,7 @@ class UIController:
     def api_get_user_components():
         """Get current user's accessible components"""
         try:
-            components = ComponentService.get_user_components()
+            components = AccessMatrix.get_user_components(PrincipalCache.current())
             return {'components': components}
         except Exception as e:
             abort(500, message=str(e))
@@ -360,18 +416,17 @@ class UIController:
         try:
             # Verify admin access (Platform or Domain)
             # Domain Admin can only see users in their domain
-            current_user = AuthService.get_current_user()
-            target_user = UserService.get_user_by_id(user_id) # This checks if user exists
+            current_user = PrincipalCache.current()
+            UserService.get_user_by_id(user_id) # This checks if user exists
             
             # If not platform admin, check domain access
             if not current_user.has_role('platform_admin'):
                  # Check if target user belongs to a domain managed by current user
                  # Simplified: If target user has ANY role in a domain managed by current user, allow.
                  
-                 admin_domains = [m.domain_id for m in current_user.user_roles if m.active_flag and m.role.role_name == 'admin']
-                 user_domains = [m.domain_id for m in target_user.user_roles if m.active_flag]
+                 target_user = PrincipalCache.get(user_id)
                  
-                 if not set(admin_domains).intersection(set(user_domains)):
+                 if not current_user.admin_domains() & target_user.domain_ids():
                      abort(403, message="Access denied to this user's components")
 
             components = ComponentService.get_user_assigned_components(user_id)
@@ -403,6 +458,23 @@ class UIController:
     #     except Exception as e:
     #         abort(500, message=str(e))
 
+    @staticmethod
+    @api.route('/components/assign/bulk', methods=['POST'])
+    @api.arguments(BulkAssignComponentsSchema)
+    @api.response(200, description="Per-component mapping or error")
+    @jwt_required()
+    def api_post_bulk_assign_components(data):
+        """Grant or revoke many components for a role in one transaction (admin only)"""
+        try:
+            Authorization.verify_admin()
+            results = ComponentAssignment.bulk_assign(data['role'], data['components'])
+            AccessMatrix.invalidate()
+            return {'results': results}
+        except ValueError as e:
+            abort(400, message=str(e))
+        except Exception as e:
+            abort(500, message=str(e))
+
     @staticmethod
     @api.route('/components/assign/user', methods=['POST'])
     @api.arguments(AssignComponentSchema) # Reusing schema, might need 'user_id' instead of 'role'
@@ -426,7 +498,7 @@ class UIController:
             if not user_id:
                 abort(400, message="user_id is required")
                 
-            admin_user = AuthService.get_current_user()
+            admin_user = PrincipalCache.current()
             
             result = ComponentService.assign_component_to_user(
                 admin_user_id=admin_user.user_id,
@@ -434,6 +506,7 @@ class UIController:
                 component_name=component_name,
                 has_access=has_access
             )
+            AccessMatrix.invalidate()
             return result
         except ValueError as e:
             abort(400, message=str(e))
@@ -468,8 +541,12 @@ class UIController:
             if not active_role:
                 abort(400, message='No active role found in JWT')
 
-            nav_items = ComponentService.get_navigation(active_role, domain_id)
-            return {'navigation': nav_items}
+            entry = NavigationCache.get(active_role, domain_id)
+            response = Response(entry.body, mimetype='application/json')
+            response.set_etag(entry.etag)
+            # Clients must revalidate; unchanged navigation costs a 304
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response.make_conditional(request)
 
         except Exception as e:
             # If it's already an abort/HTTPException, re-raise it
@@ -488,7 +565,7 @@ class UIController:
     def api_get_domains():
         """List all domains (Platform Admin only)"""
         try:
-            AuthService.verify_platform_admin()
+            Authorization.verify_platform_admin()
             domains = DomainService.get_all_domains()
             return domains
         except ValueError as e:
@@ -504,7 +581,7 @@ class UIController:
     def api_post_domain(data):
         """Create new domain (Platform Admin only)"""
         try:
-            AuthService.verify_platform_admin()
+            Authorization.verify_platform_admin()
             domain = DomainService.create_domain(**data)
             return domain
         except ValidationError as err:
@@ -521,7 +598,7 @@ class UIController:
     def api_get_domain(domain_id):
         """Get domain by ID (Platform Admin only)"""
         try:
-            AuthService.verify_platform_admin()
+            Authorization.verify_platform_admin()
             domain = DomainService.get_domain_by_id(domain_id)
             return domain
         except ValueError as e:
@@ -548,8 +625,9 @@ class UIController:
     def api_put_domain(data, domain_id):
         """Update domain (Platform Admin only)"""
         try:
-            AuthService.verify_platform_admin()
+            Authorization.verify_platform_admin()
             domain = DomainService.update_domain(domain_id, data)
+            AccessMatrix.invalidate()
             return domain
         except ValidationError as err:
             abort(400, message=str(err.messages))
@@ -565,8 +643,9 @@ class UIController:
     def api_delete_domain(domain_id):
         """Delete domain (Platform Admin only)"""
         try:
-            AuthService.verify_platform_admin()
+            Authorization.verify_platform_admin()
             result = DomainService.delete_domain(domain_id)
+            AccessMatrix.invalidate()
             return result
         except ValueError as e:
             abort(400, message=str(e))
@@ -584,8 +663,8 @@ class UIController:
     def api_get_domain_users(domain_id):
         """Get all users assigned to a domain (Platform Admin OR Domain Admin)"""
         try:
-            AuthService.verify_domain_access(domain_id)
-            users = UserService.get_users_by_domain(domain_id)
+            Authorization.verify_domain_access(domain_id)
+            users = DomainMembership.roster(domain_id)
             return {'users': users}
         except ValueError as e:
             abort(403, message=str(e))
@@ -599,7 +678,7 @@ class UIController:
     def api_assign_user_to_domain(domain_id):
         """Assign user to domain with role (Platform Admin only)"""
         try:
-            AuthService.verify_platform_admin()
+            Authorization.verify_platform_admin()
             data = request.get_json()
             
             user_id = data.get('user_id')
@@ -609,26 +688,62 @@ class UIController:
                 abort(400, message='user_id is required')
             
             result = UserService.assign_user_to_domain(user_id, domain_id, role_name)
+            Authorization.roles_changed(user_id)
             return result
         except ValueError as e:
             abort(400, message=str(e))
         except Exception as e:
             abort(500, message=str(e))
     
-    # @staticmethod
-    # @api.route('/domains/<int:domain_id>/users/<int:user_id>', methods=['DELETE'])
-    # @api.response(200, description="User removed from domain")
-    # @jwt_required()
-    # def api_remove_user_from_domain(domain_id, user_id):
-    #     """Remove user from domain (Platform Admin only)"""
-    #     try:
-    #         AuthService.verify_platform_admin()
-    #         result = UserService.remove_user_from_domain(user_id, domain_id)
-    #         return result
-    #     except ValueError as e:
-    #         abort(400, message=str(e))
-    #     except Exception as e:
-    #         abort(500, message=str(e))
+    @staticmethod
+    @api.route('/domains/<int:domain_id>/members', methods=['POST'])
+    @api.arguments(DomainMembersSchema)
+    @api.response(200, description="Users assigned to domain")
+    @jwt_required()
+    def api_bulk_assign_domain_members(data, domain_id):
+        """Assign many users to a domain with one role in one transaction (Platform Admin only)"""
+        try:
+            Authorization.verify_platform_admin()
+            result = DomainMembership.bulk_assign(domain_id, data['user_ids'], data['role_name'])
+            Authorization.roles_changed_many(result['user_ids'])
+            return result
+        except ValueError as e:
+            abort(400, message=str(e))
+        except Exception as e:
+            abort(500, message=str(e))
+
+    @staticmethod
+    @api.route('/domains/<int:domain_id>/members', methods=['DELETE'])
+    @api.arguments(DomainMembersSchema)
+    @api.response(200, description="Users removed from domain")
+    @jwt_required()
+    def api_bulk_remove_domain_members(data, domain_id):
+        """Remove many users from a domain in one transaction (Platform Admin only)"""
+        try:
+            Authorization.verify_platform_admin()
+            result = DomainMembership.bulk_remove(domain_id, data['user_ids'])
+            Authorization.roles_changed_many(result['user_ids'])
+            return result
+        except ValueError as e:
+            abort(400, message=str(e))
+        except Exception as e:
+            abort(500, message=str(e))
+
+    @staticmethod
+    @api.route('/domains/<int:domain_id>/users/<int:user_id>', methods=['DELETE'])
+    @api.response(200, description="User removed from domain")
+    @jwt_required()
+    def api_remove_user_from_domain(domain_id, user_id):
+        """Remove user from domain (Platform Admin only)"""
+        try:
+            Authorization.verify_platform_admin()
+            result = DomainMembership.bulk_remove(domain_id, [user_id])
+            Authorization.roles_changed_many(result['user_ids'])
+            return result
+        except ValueError as e:
+            abort(400, message=str(e))
+        except Exception as e:
+            abort(500, message=str(e))
     
     # ============================================================================
     # SYSTEM LOGS (Platform Admin)
@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
 
 class ToolChatRequestSchema(Schema):
     """Tool chat request schema"""
@@ -16,6 +16,12 @@ class ToolChatResponseSchema(Schema):
     tools_used = fields.List(fields.Str())
     tool_results = fields.List(fields.Nested(ToolResultSchema))
 
+class ChatHistoryArgsSchema(Schema):
+    """Chat history query args; a start date also searches the archive"""
+    start = fields.DateTime(missing=None)
+    end = fields.DateTime(missing=None)
+    limit = fields.Int(missing=50, validate=validate.Range(min=1, max=1000))
+
 class ChatHistorySchema(Schema):
     """Chat history schema"""
     id = fields.Int()
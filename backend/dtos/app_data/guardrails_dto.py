@@ -1,4 +1,6 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
+
+CHECK_TYPES = ['input', 'output', 'both']
 
 class GuardrailConfigSchema(Schema):
     """Guardrail config schema"""
@@ -8,6 +10,8 @@ class GuardrailConfigSchema(Schema):
     severity = fields.Str()
     description = fields.Str()
     pattern = fields.Str()
+    applies_to = fields.Str()
+    domain_id = fields.Int(allow_none=True)
 
 class UpdateGuardrailSchema(Schema):
     """Update guardrail schema"""
@@ -15,6 +19,8 @@ class UpdateGuardrailSchema(Schema):
     severity = fields.Str()
     description = fields.Str()
     pattern = fields.Str()
+    applies_to = fields.Str(validate=validate.OneOf(CHECK_TYPES))
+    domain_id = fields.Int(allow_none=True)
 
 class CreateGuardrailSchema(Schema):
     """Create guardrail schema"""
@@ -23,6 +29,8 @@ class CreateGuardrailSchema(Schema):
     severity = fields.Str(missing='medium')
     description = fields.Str()
     pattern = fields.Str()
+    applies_to = fields.Str(missing='both', validate=validate.OneOf(CHECK_TYPES))
+    domain_id = fields.Int(missing=None, allow_none=True)
 
 class GuardrailLogSchema(Schema):
     """Guardrail log schema"""
@@ -33,3 +41,31 @@ class GuardrailLogSchema(Schema):
     content_snippet = fields.Str()
     timestamp = fields.Str()
     action_taken = fields.Str()
+
+class GuardrailLogArgsSchema(Schema):
+    """Guardrail log query args; a start date also searches the archive"""
+    start = fields.DateTime(missing=None)
+    end = fields.DateTime(missing=None)
+    limit = fields.Int(missing=100, validate=validate.Range(min=1, max=1000))
+
+class BackfillRequestSchema(Schema):
+    """Guardrails backfill request schema"""
+    rule_ids = fields.List(fields.Int(), missing=None)
+    resume = fields.Bool(missing=True)
+    chunk_size = fields.Int(missing=None, validate=validate.Range(min=100, max=100000))
+    workers = fields.Int(missing=None, validate=validate.Range(min=1, max=64))
+
+class BackfillStatusSchema(Schema):
+    """Guardrails backfill status schema"""
+    state = fields.Str()
+    rules = fields.Str(allow_none=True, metadata={'description': 'Fingerprint of the scanned rule set'})
+    rule_count = fields.Int(allow_none=True)
+    last_id = fields.Int()
+    max_id = fields.Int()
+    progress = fields.Float()
+    scanned = fields.Int()
+    findings = fields.Int()
+    rows_per_second = fields.Float()
+    started_at = fields.Str(allow_none=True)
+    updated_at = fields.Str(allow_none=True)
+    error = fields.Str(allow_none=True)
@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
 
 class DocumentSchema(Schema):
     """Document schema"""
@@ -23,3 +23,41 @@ class RagChatResponseSchema(Schema):
     answer = fields.Str()
     sources = fields.List(fields.Nested(SourceSchema))
     use_internet = fields.Bool()
+
+class DocumentVersionSchema(DocumentSchema):
+    """Document version update result schema"""
+    version = fields.Int()
+    chunks = fields.Dict(keys=fields.Str(), values=fields.Int())
+
+class DocumentHistorySchema(Schema):
+    """Document version history schema"""
+    version = fields.Int()
+    filename = fields.Str()
+    content_sha256 = fields.Str(allow_none=True)
+    file_size = fields.Int(allow_none=True)
+    chunk_count = fields.Int(allow_none=True)
+    chunks_embedded = fields.Int(allow_none=True)
+    chunks_removed = fields.Int(allow_none=True)
+    created_at = fields.DateTime()
+
+class BulkDeleteDocumentsSchema(Schema):
+    """Bulk document delete request schema"""
+    document_ids = fields.List(fields.Int(), required=True, validate=validate.Length(min=1, max=1000))
+
+class BulkDeleteResultSchema(Schema):
+    """Bulk document delete result schema (storage cleanup continues in the background)"""
+    deleted = fields.List(fields.Int())
+    not_found = fields.List(fields.Int())
+
+class ReconcileArgsSchema(Schema):
+    """Document reconcile query args"""
+    dry_run = fields.Bool(missing=True)
+    batch_size = fields.Int(missing=None, validate=validate.Range(min=1, max=100000))
+
+class ReconcileResultSchema(Schema):
+    """Document reconcile result schema"""
+    orphan_collections = fields.Int()
+    orphan_files = fields.Int()
+    removed_collections = fields.List(fields.Str())
+    removed_files = fields.List(fields.Str())
+    dry_run = fields.Bool()
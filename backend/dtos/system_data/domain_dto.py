@@ -1,4 +1,4 @@
-from marshmallow import Schema, fields
+from marshmallow import Schema, fields, validate
 
 class DomainSchema(Schema):
     """Domain response schema"""
@@ -18,3 +18,8 @@ class UpdateDomainSchema(Schema):
     domain_name = fields.Str()
     description = fields.Str()
     active_flag = fields.Bool()
+
+class DomainMembersSchema(Schema):
+    """Bulk domain membership schema"""
+    user_ids = fields.List(fields.Int(), required=True, validate=validate.Length(min=1, max=10000))
+    role_name = fields.Str(missing='user')  # Ignored when removing
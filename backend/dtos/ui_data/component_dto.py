@@ -11,6 +11,11 @@ class AssignComponentSchema(Schema):
     component_name = fields.Str(required=True)
     has_access = fields.Bool(missing=True)
 
+class BulkAssignComponentsSchema(Schema):
+    """Bulk assign components to a role schema"""
+    role = fields.Str(required=True)
+    components = fields.Dict(keys=fields.Str(), values=fields.Bool(), required=True)  # component_name -> has_access
+
 class ComponentAccessSchema(Schema):
     """Component access schema"""
     id = fields.Int(attribute='template_role_id')
@@ -1,4 +1,5 @@
 from marshmallow import Schema, fields, validate
+from configs.app_config import Config
 
 class UserSchema(Schema):
     """User schema"""
@@ -15,6 +16,32 @@ class UserSchema(Schema):
             return obj.get_role_names()
         return []
 
+class UserSummarySchema(Schema):
+    """Lightweight user projection for admin listings"""
+    id = fields.Int(attribute='user_id')
+    email = fields.Email()
+    full_name = fields.Str(attribute='name', allow_none=True)
+    roles = fields.List(fields.Str())
+    domain_ids = fields.List(fields.Int())
+    active_flag = fields.Bool()
+    file_upload_enabled = fields.Bool()
+    two_factor_auth_enabled = fields.Bool()
+    created_at = fields.Str(allow_none=True)
+
+class UserListArgsSchema(Schema):
+    """Query arguments for the paginated user listing"""
+    cursor = fields.Int(missing=None)  # Last id of the previous page (X-Next-Cursor)
+    limit = fields.Int(missing=Config.USER_LIST_DEFAULT_LIMIT, validate=validate.Range(min=1, max=1000))
+    search = fields.Str(missing=None)  # Matches email or name
+    role = fields.Str(missing=None)
+    domain_id = fields.Int(missing=None)
+
+class UserImportArgsSchema(Schema):
+    """Query arguments for the bulk user import"""
+    format = fields.Str(missing=None, validate=validate.OneOf(['csv', 'ndjson']))  # Default: from Content-Type
+    domain_id = fields.Int(missing=None)  # Domain for rows without a domain_id
+    batch_size = fields.Int(missing=None, validate=validate.Range(min=1, max=10000))
+
 class CreateUserSchema(Schema):
     """Schema for creating a new user"""
     email = fields.Str(required=True, validate=validate.Email())
@@ -33,3 +60,4 @@ class UpdateUserSchema(Schema):
     roles = fields.List(fields.Str(), allow_none=True)  # New RBAC field
     file_upload_enabled = fields.Bool(allow_none=True)
     two_factor_auth_enabled = fields.Bool(allow_none=True)
+    active_flag = fields.Bool(allow_none=True)  # False deactivates the user and revokes their tokens
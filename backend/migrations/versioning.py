@@ -0,0 +1,137 @@
+import os
+import fcntl
+from datetime import datetime
+from contextlib import contextmanager
+from models import db
+from configs.app_config import Config
+
+
+schema_migrations = db.Table(
+    'schema_migrations',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(100), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False, default=datetime.utcnow)
+)
+
+
+def _create_schemas(initializer):
+    initializer.create_schemas()
+
+
+def _create_tables(initializer):
+    initializer.create_tables()
+
+
+def _seed_data(initializer):
+    initializer.seed_data()
+
+
+def _guardrail_scope_columns(initializer):
+    # Rule direction and domain scoping used by GuardrailsEvaluator
+    for statement in (
+        "ALTER TABLE guardrails_schema.guardrails_config ADD COLUMN IF NOT EXISTS applies_to VARCHAR(10) DEFAULT 'both'",
+        "ALTER TABLE guardrails_schema.guardrails_config ADD COLUMN IF NOT EXISTS domain_id INTEGER",
+    ):
+        db.session.execute(db.text(statement))
+    db.session.commit()
+
+
+def _document_versions(initializer):
+    from services.system_services.document_versions import document_versions
+    document_versions.create(db.engine, checkfirst=True)
+
+
+# Append only: (version, name, step). Steps must be safe to re-run, since a
+# crash between a step and its version row repeats it on the next boot.
+MIGRATIONS = [
+    (1, 'create_schemas', _create_schemas),
+    (2, 'create_tables', _create_tables),
+    (3, 'seed_data', _seed_data),
+    (4, 'guardrail_scope_columns', _guardrail_scope_columns),
+    (5, 'document_versions', _document_versions),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+class Migrator:
+    """
+    Versioned schema and seed migrations.
+    A fully migrated database boots with a single version query. Otherwise
+    pending steps run once, under a cross-process lock (a Postgres advisory
+    lock, or a file lock for DuckDB), and each step records its version so
+    workers booting together do not repeat or race the work.
+    """
+
+    ADVISORY_LOCK_KEY = 7263104
+
+    def __init__(self, app, initializer):
+        self.app = app
+        self.initializer = initializer
+        self.uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+
+    def current_version(self):
+        """Highest applied version (0 if the version table does not exist yet)"""
+        try:
+            return db.session.execute(db.select(db.func.max(schema_migrations.c.version))).scalar() or 0
+        except Exception:
+            db.session.rollback()
+            return 0
+
+    @contextmanager
+    def _lock(self):
+        if 'postgresql' in self.uri:
+            with db.engine.connect() as conn:
+                conn.execute(db.text('SELECT pg_advisory_lock(:key)'), {'key': Migrator.ADVISORY_LOCK_KEY})
+                try:
+                    yield
+                finally:
+                    conn.execute(db.text('SELECT pg_advisory_unlock(:key)'), {'key': Migrator.ADVISORY_LOCK_KEY})
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(Config.MIGRATION_LOCK_PATH)), exist_ok=True)
+            with open(Config.MIGRATION_LOCK_PATH, 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def run(self):
+        """
+        Apply pending migrations
+
+        Returns:
+            list: Names of the steps applied by this process
+        """
+        with self.app.app_context():
+            if self.current_version() >= LATEST_VERSION:
+                return []
+
+            applied = []
+            with self._lock():
+                # Another worker may have finished while we waited for the lock
+                version = self.current_version()
+                schema_migrations.create(db.engine, checkfirst=True)
+
+                for step_version, name, step in MIGRATIONS:
+                    if step_version <= version:
+                        continue
+                    print(f"Applying migration {step_version}: {name}")
+                    step(self.initializer)
+                    db.session.execute(schema_migrations.insert().values(
+                        version=step_version, name=name, applied_at=datetime.utcnow()
+                    ))
+                    db.session.commit()
+                    applied.append(name)
+
+            print(f"✓ Database at version {LATEST_VERSION}")
+            return applied
+
+
+def migrate(app):
+    """Run the versioned migrations with the initializer for the configured database"""
+    from migrations.init_db import DuckDBInitializer, PostgresInitializer
+
+    uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    initializer = DuckDBInitializer(app) if 'duckdb' in uri else PostgresInitializer(app)
+    return Migrator(app, initializer).run()
@@ -0,0 +1,100 @@
+"""
+Startup profiler - reports import time per module for create_app()
+
+Usage:
+    python profile_startup.py [--top 25] [--preload] [--budget-ms 1500]
+
+Runs create_app(init_db=False) in a fresh interpreter under
+`python -X importtime`, then prints the slowest modules (cumulative) and
+the self time per top-level package, and lists the heavy AI/document
+packages create_app() imported (none unless --preload). With --budget-ms
+the exit code is 1 when the cold start exceeds the budget; the same
+budget is asserted by tests/test_cold_start.py.
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+BOOT = (
+    "import time; start = time.perf_counter(); "
+    "from app import create_app; create_app(app_name='profile', init_db=False); "
+    "print(f'COLD_START_MS={(time.perf_counter() - start) * 1000:.1f}')"
+)
+
+# Loaded on first use (LazyImports, services/__init__.py); never by create_app itself
+HEAVY_PACKAGES = ('chromadb', 'langchain', 'langchain_core', 'langchain_community', 'langchain_openai',
+                  'langchain_text_splitters', 'pypdf', 'docx', 'openai')
+
+
+def profile(preload=False):
+    """
+    Profile one cold start
+
+    Returns:
+        tuple: (cold start ms, list of (module, self_us, cumulative_us))
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    if preload:
+        env['PRELOAD_HEAVY_MODULES'] = 'True'
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if line.strip() and not line.startswith('import time:')]
+        raise RuntimeError(errors[-1] if errors else 'create_app failed')
+
+    modules = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    cold_start_ms = next(
+        float(line.split('=', 1)[1]) for line in result.stdout.splitlines() if line.startswith('COLD_START_MS=')
+    )
+    return cold_start_ms, modules
+
+
+def heavy_imports(modules):
+    """Top-level heavy packages among the imported modules"""
+    return sorted({name.split('.')[0] for name, _, _ in modules} & set(HEAVY_PACKAGES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile create_app() import time')
+    parser.add_argument('--top', type=int, default=25, help='Number of modules to list')
+    parser.add_argument('--preload', action='store_true', help='Profile with PRELOAD_HEAVY_MODULES=True')
+    parser.add_argument('--budget-ms', type=float, default=None, help='Fail if the cold start takes longer')
+    args = parser.parse_args()
+
+    cold_start_ms, modules = profile(args.preload)
+
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(modules, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:9.1f}  {name}")
+
+    packages = {}
+    for name, self_us, _ in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print(f"\n{'self ms':>9}  top-level package")
+    for package, self_us in sorted(packages.items(), key=lambda p: p[1], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:9.1f}  {package}")
+
+    print(f"\nCold start: {cold_start_ms:.1f} ms ({len(modules)} modules imported)")
+    print(f"Heavy packages imported: {', '.join(heavy_imports(modules)) or 'none'}")
+    if args.budget_ms is not None and cold_start_ms > args.budget_ms:
+        print(f"Over budget: {cold_start_ms:.1f} ms > {args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
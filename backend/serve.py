@@ -0,0 +1,145 @@
+"""
+Production runner - pre-fork gunicorn server for the Flask app
+
+Usage:
+    python serve.py
+
+The app is created once in the master (migrations run there, and with
+PRELOAD_HEAVY_MODULES the AI/document libraries are imported before the
+fork) and shared copy-on-write by the workers. The master keeps no
+database connection or background thread: post-fork hooks drop state
+that must not cross a fork, and each worker starts its own archive and
+reconcile schedulers (file locks keep their passes exclusive across
+workers). On SIGTERM workers report not ready, finish in-flight
+requests within WEB_GRACEFUL_TIMEOUT_SECONDS and flush queued mail and
+writes before exiting.
+
+Worker classes (WEB_WORKER_CLASS):
+    gthread - threads per worker (default; suits the I/O-bound LLM calls)
+    gevent  - cooperative workers for many concurrent slow requests
+              (requires gevent; the app is then loaded per worker)
+    sync    - one request per worker
+
+DuckDB allows one writing process per file: with more than one worker on
+DuckDB, run the DB writer process and set DB_WRITER_SOCKET (see DBWriter);
+the server refuses to start several DuckDB workers without it.
+"""
+import sys
+import signal
+from gunicorn.app.base import BaseApplication
+
+from app import create_app, start_background_jobs
+from models import db
+from configs.app_config import Config
+from services.auth_services.password_hasher import PasswordHasher
+from services.auth_services.mail_queue import MailQueue
+from services.system_services.db_writer import DBWriter
+from services.system_services.archive_service import ArchiveService
+from services.system_services.document_cleanup import DocumentCleanup, DocumentReconciler
+from services.system_services.readiness import Readiness
+from services.system_services.request_pipeline import RequestPipeline
+
+
+class Lifecycle:
+    """gunicorn server hooks"""
+
+    app = None
+
+    @staticmethod
+    def post_fork(server, worker):
+        """Re-open per-process resources in a new worker"""
+        # Pooled connections were opened by the master; never share sockets/files across processes
+        if Lifecycle.app is not None:
+            with Lifecycle.app.app_context():
+                db.engine.dispose(close=False)
+
+        # Executor threads do not survive a fork
+        PasswordHasher.reset()
+        RequestPipeline.reset()
+        MailQueue.reset()
+
+        # chromadb caches clients (and their SQLite handles) per path
+        if 'chromadb' in sys.modules:
+            try:
+                from chromadb.api.client import SharedSystemClient
+                SharedSystemClient.clear_system_cache()
+            except Exception as e:
+                print(f"Could not reset vector store clients: {e}")
+
+    @staticmethod
+    def post_worker_init(worker):
+        """Start this worker's background jobs; report not ready as soon as a graceful shutdown starts"""
+        # Runs after the app is loaded, whether it was preloaded in the master or not
+        if Lifecycle.app is not None:
+            start_background_jobs(Lifecycle.app)
+
+        handle_exit = signal.getsignal(signal.SIGTERM)
+
+        def on_term(signum, frame):
+            Readiness.draining = True
+            if callable(handle_exit):
+                handle_exit(signum, frame)
+
+        signal.signal(signal.SIGTERM, on_term)
+
+    @staticmethod
+    def worker_exit(server, worker):
+        """Stop this worker's schedulers and flush background queues before it exits"""
+        Readiness.draining = True
+        ArchiveService.stop_scheduler()
+        DocumentReconciler.stop_scheduler()
+        if not DBWriter.drain(timeout=Config.WEB_GRACEFUL_TIMEOUT_SECONDS / 2):
+            print("DB writer did not drain before exit")
+        MailQueue.shutdown(timeout=Config.WEB_GRACEFUL_TIMEOUT_SECONDS / 2)
+        DocumentCleanup.shutdown(timeout=Config.WEB_GRACEFUL_TIMEOUT_SECONDS / 4)
+
+
+class ProductionServer(BaseApplication):
+    """gunicorn application configured from Config"""
+
+    def __init__(self):
+        ProductionServer.check_workers()
+        self.options = {
+            'bind': Config.WEB_BIND,
+            'workers': Config.WEB_WORKERS,
+            'worker_class': Config.WEB_WORKER_CLASS,
+            'threads': Config.WEB_THREADS,
+            'timeout': Config.WEB_TIMEOUT_SECONDS,
+            'graceful_timeout': Config.WEB_GRACEFUL_TIMEOUT_SECONDS,
+            'keepalive': Config.WEB_KEEPALIVE_SECONDS,
+            'max_requests': Config.WEB_MAX_REQUESTS,
+            'max_requests_jitter': Config.WEB_MAX_REQUESTS // 10,
+            # gevent must patch before the app's modules are imported
+            'preload_app': Config.WEB_WORKER_CLASS != 'gevent',
+            'post_fork': Lifecycle.post_fork,
+            'post_worker_init': Lifecycle.post_worker_init,
+            'worker_exit': Lifecycle.worker_exit,
+            'accesslog': '-',
+        }
+        super().__init__()
+
+    @staticmethod
+    def check_workers():
+        """Refuse several DuckDB workers that would each write to the file"""
+        if ('duckdb' in Config.SQLALCHEMY_DATABASE_URI and Config.WEB_WORKERS > 1
+                and not Config.DB_WRITER_SOCKET):
+            raise SystemExit(
+                f'WEB_WORKERS={Config.WEB_WORKERS} on DuckDB requires DB_WRITER_SOCKET '
+                '(run python -m services.system_services.db_writer), or set WEB_WORKERS=1'
+            )
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        Lifecycle.app = create_app(app_name="ONeApp", init_db=True)
+        # Close the master's connections before forking: an open DuckDB
+        # connection keeps the database instance (and its file lock) alive
+        with Lifecycle.app.app_context():
+            db.engine.dispose()
+        return Lifecycle.app
+
+
+if __name__ == '__main__':
+    ProductionServer().run()
@@ -0,0 +1,29 @@
+# Services package
+# Every `from services.<package>.<module> import ...` runs this file first,
+# so the services are resolved on first access (PEP 562) instead of being
+# imported here: RAGService and ChatService pull in chromadb and langchain.
+import importlib
+
+_SERVICES = {
+    'AuthService': '.auth_services.auth_service',
+    'EmailService': '.auth_services.email_service',
+    'UserService': '.system_services.user_service',
+    'ComponentService': '.ui_services.component_service',
+    'RAGService': '.agentic_services.rag_service',
+    'ChatService': '.agentic_services.chat_service',
+    'GuardrailsService': '.guardrails_services.guardrails_service',
+}
+
+__all__ = list(_SERVICES)
+
+
+def __getattr__(name):
+    if name not in _SERVICES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    service = getattr(importlib.import_module(_SERVICES[name], __name__), name)
+    globals()[name] = service
+    return service
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,80 @@
+from flask_jwt_extended import get_jwt
+from configs.app_config import Config
+from .principal import PrincipalCache, PLATFORM_ADMIN_ROLES
+from .token_versions import TokenVersions
+
+
+class Authorization:
+    """
+    Admin checks for controllers.
+    In 'claims' mode (AUTHZ_MODE) the decision is made from the JWT claims
+    alone; tokens issued before a role change are rejected by the token
+    version check, so no per-request user lookup is needed. In 'database'
+    mode the decision is made from the current user's Principal (one cached
+    lookup per request, dropped by roles_changed()).
+    """
+
+    @staticmethod
+    def claims_mode():
+        return Config.AUTHZ_MODE == 'claims'
+
+    @staticmethod
+    def _roles(claims):
+        return set(claims.get('roles') or ()) | {claims.get('role')}
+
+    @staticmethod
+    def _principal():
+        principal = PrincipalCache.current()
+        if not principal.active_flag:
+            raise ValueError('User account is inactive')
+        return principal
+
+    @staticmethod
+    def verify_admin():
+        """Verify current user is admin"""
+        if Authorization.claims_mode():
+            allowed = 'admin' in Authorization._roles(get_jwt())
+        else:
+            allowed = Authorization._principal().is_admin()
+        if not allowed:
+            raise ValueError('Admin access required')
+
+    @staticmethod
+    def verify_platform_admin():
+        """Verify current user is Platform Admin"""
+        if Authorization.claims_mode():
+            allowed = bool(Authorization._roles(get_jwt()).intersection(PLATFORM_ADMIN_ROLES))
+        else:
+            allowed = Authorization._principal().is_platform_admin()
+        if not allowed:
+            raise ValueError('Platform Admin access required')
+
+    @staticmethod
+    def verify_domain_access(domain_id):
+        """
+        Verify current user is Platform Admin or admin of the domain.
+        In claims mode a domain admin must have that domain active in the token.
+        """
+        if not Authorization.claims_mode():
+            principal = Authorization._principal()
+            if not principal.is_platform_admin() and domain_id not in principal.admin_domains():
+                raise ValueError('Domain access denied')
+            return
+        claims = get_jwt()
+        if Authorization._roles(claims).intersection(PLATFORM_ADMIN_ROLES):
+            return
+        if claims.get('domain_id') != domain_id or claims.get('role') != 'admin':
+            raise ValueError('Domain access denied')
+
+    @staticmethod
+    def roles_changed(user_id):
+        """Drop cached roles and revoke outstanding tokens of a user"""
+        PrincipalCache.invalidate(user_id)
+        TokenVersions.bump(user_id)
+
+    @staticmethod
+    def roles_changed_many(user_ids):
+        """roles_changed() for a batch of users with a single token-version write"""
+        for user_id in user_ids:
+            PrincipalCache.invalidate(user_id)
+        TokenVersions.bump_many(user_ids)
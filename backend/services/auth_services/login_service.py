@@ -0,0 +1,96 @@
+import secrets
+import string
+from services.auth_services.auth_service import AuthService
+from services.auth_services.mail_queue import MailQueue
+from services.auth_services.otp_backends import get_otp_backend
+from services.auth_services.password_hasher import PasswordHasher
+from services.auth_services.user_loader import UserLoader
+from services.system_services.metrics import Metrics
+
+
+class LoginService:
+    """
+    Password and OTP steps of the login flow.
+    The user is loaded with roles and domains in one query (the token
+    response reads both) and the password is checked on the bcrypt pool,
+    upgrading the hash if the cost factor changed. OTPs are stored in and
+    verified against the configured OTP backend, which all worker
+    processes share, and the OTP email is queued instead of sent inside
+    the request.
+    """
+
+    @staticmethod
+    @Metrics.timed('auth.login_user')
+    def login(email, password, role=None):
+        """
+        Authenticate user and return token or 2FA requirement
+
+        Args:
+            email: User email
+            password: User password
+            role: Optional specific role to login as
+
+        Returns:
+            dict: Auth response
+
+        Raises:
+            ValueError: Invalid credentials or inactive account
+        """
+        user = UserLoader.by_email(email)
+
+        if not user or not PasswordHasher.verify_user(user, password):
+            raise ValueError('Invalid email or password')
+
+        if not user.active_flag:
+            raise ValueError('User account is inactive')
+
+        if user.two_factor_auth_enabled:
+            otp = ''.join(secrets.choice(string.digits) for _ in range(6))
+            get_otp_backend().store_otp(user.email, otp, ttl_seconds=600)
+            MailQueue.enqueue_otp_email(user.email, otp)
+
+            return {
+                'requires_2fa': True,
+                'message': 'OTP sent to your email',
+                'email': email
+            }
+
+        return AuthService._generate_token_response(user, role)
+
+    @staticmethod
+    @Metrics.timed('auth.complete_login')
+    def complete_login(identity, email, otp, domain_id, active_role):
+        """
+        Verify the OTP (if 2FA is enabled) and issue the token for a domain and role
+
+        Args:
+            identity: JWT identity of the login step's token
+            email: User email
+            otp: One-time password (ignored without 2FA)
+            domain_id: Selected domain
+            active_role: Selected role in that domain
+
+        Returns:
+            dict: Auth response
+
+        Raises:
+            ValueError: Unknown or inactive user, invalid OTP or no such role in the domain
+        """
+        user = UserLoader.by_email(email)
+        if not user or str(user.user_id) != str(identity):
+            raise ValueError('Invalid login session')
+
+        if not user.active_flag:
+            raise ValueError('User account is inactive')
+
+        if user.two_factor_auth_enabled and not get_otp_backend().verify_otp(user.email, otp or ''):
+            raise ValueError('Invalid or expired OTP')
+
+        if not any(
+            mapping.active_flag and mapping.domain_id == domain_id and mapping.role
+            and mapping.role.role_name == active_role
+            for mapping in user.user_roles
+        ):
+            raise ValueError('User access to domain denied')
+
+        return AuthService._generate_token_response(user, active_role, domain_id)
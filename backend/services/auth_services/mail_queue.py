@@ -0,0 +1,240 @@
+import os
+import time
+import queue
+import smtplib
+import threading
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from configs.app_config import Config
+from services.system_services.metrics import Metrics
+
+
+class OutboundMail:
+    """A queued message"""
+    __slots__ = ('to_email', 'subject', 'html', 'enqueued_at', 'attempts')
+
+    def __init__(self, to_email, subject, html):
+        self.to_email = to_email
+        self.subject = subject
+        self.html = html
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class MailQueue:
+    """
+    Outbound mail queue drained by a background worker.
+    The worker keeps one authenticated SMTP connection open between
+    messages, reconnects when it drops and retries failed sends with
+    exponential backoff. Request handlers only enqueue. The queue belongs
+    to one process: a forked worker gets a fresh queue (reset()) rather
+    than the parent's, whose internal locks may have been held at fork.
+    """
+
+    _queue = queue.Queue(maxsize=Config.MAIL_QUEUE_MAX_SIZE)
+    _lock = threading.Lock()
+    _worker = None
+    _worker_pid = None
+    _stop = threading.Event()
+
+    # Updated by request threads, the worker and retry timers
+    _metrics_lock = threading.Lock()
+    _metrics = {
+        'enqueued': 0,
+        'sent': 0,
+        'failed': 0,
+        'retries': 0,
+        'dropped': 0,
+        'reconnects': 0,
+        'last_latency_seconds': 0.0,
+        'max_latency_seconds': 0.0,
+        'total_latency_seconds': 0.0
+    }
+
+    @staticmethod
+    def reset():
+        """Replace the queue and worker state inherited from a parent process"""
+        MailQueue._queue = queue.Queue(maxsize=Config.MAIL_QUEUE_MAX_SIZE)
+        MailQueue._lock = threading.Lock()
+        MailQueue._metrics_lock = threading.Lock()
+        MailQueue._stop = threading.Event()
+        MailQueue._worker = None
+        MailQueue._worker_pid = None
+
+    @staticmethod
+    def enqueue(to_email, subject, html):
+        """
+        Queue an email for delivery
+
+        Returns:
+            bool: False if the queue is full and the message was dropped
+        """
+        MailQueue._ensure_worker()
+        try:
+            MailQueue._queue.put_nowait(OutboundMail(to_email, subject, html))
+        except queue.Full:
+            MailQueue._count('dropped')
+            print(f"Mail queue full, dropping message to {to_email}")
+            return False
+        MailQueue._count('enqueued')
+        return True
+
+    @staticmethod
+    def enqueue_otp_email(to_email, otp):
+        """Queue the login OTP email (replaces the inline EmailService.send_otp_email)"""
+        if Config.SMTP_USE_AUTH and (not Config.SMTP_USERNAME or not Config.SMTP_PASSWORD):
+            print("SMTP credentials not configured. OTP: ", otp)
+            return False
+
+        html = f"""
+            <html>
+                <body>
+                    <h2>Login Verification</h2>
+                    <p>Your One Time Password (OTP) is:</p>
+                    <h1>{otp}</h1>
+                    <p>This OTP is valid for 5 minutes.</p>
+                    <p>If you did not request this, please ignore this email.</p>
+                </body>
+            </html>
+            """
+        return MailQueue.enqueue(to_email, "Your Login OTP", html)
+
+    @staticmethod
+    def _count(name):
+        with MailQueue._metrics_lock:
+            MailQueue._metrics[name] += 1
+
+    @staticmethod
+    def _record_sent(latency):
+        with MailQueue._metrics_lock:
+            metrics = MailQueue._metrics
+            metrics['sent'] += 1
+            metrics['last_latency_seconds'] = latency
+            metrics['total_latency_seconds'] += latency
+            metrics['max_latency_seconds'] = max(metrics['max_latency_seconds'], latency)
+
+    @staticmethod
+    def metrics():
+        """Get delivery counters and queue latency"""
+        with MailQueue._metrics_lock:
+            metrics = dict(MailQueue._metrics)
+        metrics['queue_depth'] = MailQueue._queue.qsize()
+        metrics['avg_latency_seconds'] = (
+            metrics['total_latency_seconds'] / metrics['sent'] if metrics['sent'] else 0.0
+        )
+        return metrics
+
+    @staticmethod
+    def render():
+        """Counters in Prometheus text format (for /metrics)"""
+        metrics = MailQueue.metrics()
+        return Metrics.render_counters(
+            'app_mail_queue_total', 'Outbound mail by outcome', 'outcome',
+            {key: metrics[key] for key in ('enqueued', 'sent', 'failed', 'retries', 'dropped', 'reconnects')},
+            [
+                ('app_mail_queue_depth', 'Messages waiting to be sent', metrics['queue_depth']),
+                ('app_mail_queue_max_latency_seconds', 'Longest enqueue-to-send time', metrics['max_latency_seconds']),
+            ]
+        )
+
+    @staticmethod
+    def shutdown(timeout=10):
+        """Stop the worker after draining what it can within the timeout"""
+        MailQueue._stop.set()
+        if MailQueue._worker and MailQueue._worker.is_alive():
+            MailQueue._worker.join(timeout)
+
+    @staticmethod
+    def _ensure_worker():
+        # A forked child inherits the thread object but not the thread
+        if MailQueue._worker and MailQueue._worker.is_alive() and MailQueue._worker_pid == os.getpid():
+            return
+        if MailQueue._worker_pid is not None and MailQueue._worker_pid != os.getpid():
+            MailQueue.reset()
+        with MailQueue._lock:
+            if MailQueue._worker and MailQueue._worker.is_alive() and MailQueue._worker_pid == os.getpid():
+                return
+            MailQueue._stop.clear()
+            MailQueue._worker = threading.Thread(target=MailQueue._run, name='mail-queue', daemon=True)
+            MailQueue._worker_pid = os.getpid()
+            MailQueue._worker.start()
+
+    @staticmethod
+    def _connect():
+        server = smtplib.SMTP(Config.SMTP_SERVER, Config.SMTP_PORT, timeout=Config.SMTP_TIMEOUT_SECONDS)
+        if Config.SMTP_USE_TLS:
+            server.starttls()
+        if Config.SMTP_USE_AUTH:
+            server.login(Config.SMTP_USERNAME, Config.SMTP_PASSWORD)
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _build(mail):
+        msg = MIMEMultipart()
+        msg['From'] = Config.SMTP_SENDER_EMAIL
+        msg['To'] = mail.to_email
+        msg['Subject'] = mail.subject
+        msg.attach(MIMEText(mail.html, 'html'))
+        return msg.as_string()
+
+    @staticmethod
+    def _run():
+        server = None
+        idle_since = time.monotonic()
+
+        while not (MailQueue._stop.is_set() and MailQueue._queue.empty()):
+            try:
+                mail = MailQueue._queue.get(timeout=1)
+            except queue.Empty:
+                # Drop connections the server would time out anyway
+                if server and time.monotonic() - idle_since > Config.SMTP_IDLE_TIMEOUT_SECONDS:
+                    MailQueue._close(server)
+                    server = None
+                continue
+
+            try:
+                if server is None:
+                    server = MailQueue._connect()
+                    MailQueue._count('reconnects')
+                server.sendmail(Config.SMTP_SENDER_EMAIL, mail.to_email, MailQueue._build(mail))
+
+                MailQueue._record_sent(time.monotonic() - mail.enqueued_at)
+            except Exception as e:
+                if server is not None:
+                    MailQueue._close(server)
+                    server = None
+
+                mail.attempts += 1
+                if mail.attempts >= Config.MAIL_MAX_ATTEMPTS:
+                    MailQueue._count('failed')
+                    print(f"Failed to send email to {mail.to_email} after {mail.attempts} attempts: {e}")
+                else:
+                    MailQueue._count('retries')
+                    backoff = Config.MAIL_RETRY_BACKOFF_SECONDS * (2 ** (mail.attempts - 1))
+                    # Daemon, so a pending retry never holds up interpreter exit
+                    timer = threading.Timer(backoff, MailQueue._requeue, args=(mail,))
+                    timer.daemon = True
+                    timer.start()
+            finally:
+                idle_since = time.monotonic()
+                MailQueue._queue.task_done()
+
+        if server is not None:
+            MailQueue._close(server)
+
+    @staticmethod
+    def _requeue(mail):
+        try:
+            MailQueue._queue.put_nowait(mail)
+        except queue.Full:
+            MailQueue._count('dropped')
+
+
+Metrics.register(MailQueue.render)
@@ -0,0 +1,193 @@
+import os
+import time
+import hmac
+import heapq
+import sqlite3
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from configs.app_config import Config
+
+
+class OTPBackend(ABC):
+    """
+    OTP storage backend.
+    Same interface as OTPStore: store_otp(key, otp, ttl_seconds) and
+    verify_otp(key, otp). A key is locked out after OTP_MAX_ATTEMPTS wrong
+    guesses; a correct OTP is consumed.
+    """
+
+    def __init__(self, max_attempts=None):
+        self.max_attempts = max_attempts or Config.OTP_MAX_ATTEMPTS
+
+    @abstractmethod
+    def store_otp(self, key: str, otp: str, ttl_seconds: int = 600):
+        """Store (or replace) the OTP for a key"""
+        pass
+
+    @abstractmethod
+    def verify_otp(self, key: str, otp: str) -> bool:
+        """Verify and consume the OTP for a key"""
+        pass
+
+    @abstractmethod
+    def cleanup(self):
+        """Remove expired OTPs"""
+        pass
+
+    @staticmethod
+    def _digest(otp: str) -> str:
+        return hashlib.sha256(otp.encode('utf-8')).hexdigest()
+
+
+class MemoryOTPBackend(OTPBackend):
+    """
+    In-process OTP store with a min-heap expiry index.
+    Expired entries are popped from the heap head, so store_otp costs
+    O(log n) instead of a full scan. Only valid with a single worker process.
+    """
+
+    def __init__(self, max_attempts=None):
+        super().__init__(max_attempts)
+        self._lock = threading.Lock()
+        self._store = {}
+        self._expiry = []  # (expires_at, key); stale entries are skipped lazily
+
+    def store_otp(self, key: str, otp: str, ttl_seconds: int = 600):
+        expires_at = time.time() + ttl_seconds
+        with self._lock:
+            self._store[key] = {'otp': self._digest(otp), 'expires_at': expires_at, 'attempts': 0}
+            heapq.heappush(self._expiry, (expires_at, key))
+            self._evict(time.time())
+
+    def verify_otp(self, key: str, otp: str) -> bool:
+        with self._lock:
+            record = self._store.get(key)
+            if not record:
+                return False
+
+            if time.time() > record['expires_at']:
+                del self._store[key]
+                return False
+
+            if hmac.compare_digest(record['otp'], self._digest(otp)):
+                del self._store[key]  # Consume OTP
+                return True
+
+            record['attempts'] += 1
+            if record['attempts'] >= self.max_attempts:
+                del self._store[key]
+            return False
+
+    def cleanup(self):
+        with self._lock:
+            self._evict(time.time())
+
+    def _evict(self, now):
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expiry)
+            record = self._store.get(key)
+            # Only drop the record this heap entry was pushed for
+            if record and record['expires_at'] == expires_at:
+                del self._store[key]
+
+
+class SQLiteOTPBackend(OTPBackend):
+    """
+    OTP store shared by all worker processes through a SQLite file in WAL
+    mode. Verification runs in an IMMEDIATE transaction so concurrent
+    attempts on the same key are serialised across processes.
+    """
+
+    CLEANUP_INTERVAL_SECONDS = 60
+
+    def __init__(self, path=None, max_attempts=None):
+        super().__init__(max_attempts)
+        self.path = path or Config.OTP_STORE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._local = threading.local()
+        self._last_cleanup = 0.0
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS otps ('
+                ' key TEXT PRIMARY KEY,'
+                ' otp TEXT NOT NULL,'
+                ' expires_at REAL NOT NULL,'
+                ' attempts INTEGER NOT NULL DEFAULT 0)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_otps_expires_at ON otps (expires_at)')
+
+    def _connect(self):
+        # One connection per thread (and per process: pid check covers fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def store_otp(self, key: str, otp: str, ttl_seconds: int = 600):
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            'INSERT INTO otps (key, otp, expires_at, attempts) VALUES (?, ?, ?, 0) '
+            'ON CONFLICT(key) DO UPDATE SET otp = excluded.otp, expires_at = excluded.expires_at, attempts = 0',
+            (key, self._digest(otp), now + ttl_seconds)
+        )
+        if now - self._last_cleanup > self.CLEANUP_INTERVAL_SECONDS:
+            self.cleanup()
+
+    def verify_otp(self, key: str, otp: str) -> bool:
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT otp, expires_at, attempts FROM otps WHERE key = ?', (key,)).fetchone()
+            if not row:
+                conn.execute('COMMIT')
+                return False
+
+            stored, expires_at, attempts = row
+            if time.time() > expires_at:
+                conn.execute('DELETE FROM otps WHERE key = ?', (key,))
+                conn.execute('COMMIT')
+                return False
+
+            if hmac.compare_digest(stored, self._digest(otp)):
+                conn.execute('DELETE FROM otps WHERE key = ?', (key,))
+                conn.execute('COMMIT')
+                return True
+
+            if attempts + 1 >= self.max_attempts:
+                conn.execute('DELETE FROM otps WHERE key = ?', (key,))
+            else:
+                conn.execute('UPDATE otps SET attempts = attempts + 1 WHERE key = ?', (key,))
+            conn.execute('COMMIT')
+            return False
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def cleanup(self):
+        self._last_cleanup = time.time()
+        self._connect().execute('DELETE FROM otps WHERE expires_at < ?', (self._last_cleanup,))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_otp_backend() -> OTPBackend:
+    """Get the configured OTP backend (OTP_BACKEND: 'memory' or 'sqlite')"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if Config.OTP_BACKEND == 'sqlite':
+                    _backend = SQLiteOTPBackend()
+                elif Config.OTP_BACKEND == 'memory':
+                    _backend = MemoryOTPBackend()
+                else:
+                    raise ValueError(f'Unknown OTP backend: {Config.OTP_BACKEND}')
+    return _backend
@@ -0,0 +1,123 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from models import db
+from configs.app_config import Config
+
+
+class PasswordHasher:
+    """
+    bcrypt hashing on a bounded worker pool.
+    bcrypt releases the GIL, so running it on a pool sized to the cores keeps
+    the request thread free and caps how many hashes run at once during a
+    login storm. Hashes made with an outdated cost factor are upgraded
+    transparently on the next successful login.
+    """
+
+    _executor = None
+    _slots = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _pool():
+        if PasswordHasher._executor is None:
+            with PasswordHasher._lock:
+                if PasswordHasher._executor is None:
+                    workers = Config.PASSWORD_HASH_WORKERS
+                    PasswordHasher._slots = threading.BoundedSemaphore(workers * Config.PASSWORD_HASH_QUEUE_FACTOR)
+                    PasswordHasher._executor = ThreadPoolExecutor(
+                        max_workers=workers,
+                        thread_name_prefix='bcrypt'
+                    )
+        return PasswordHasher._executor
+
+    @staticmethod
+    def _run(func, *args):
+        pool = PasswordHasher._pool()
+        slots = PasswordHasher._slots
+        if not slots.acquire(timeout=Config.PASSWORD_HASH_TIMEOUT_SECONDS):
+            raise ValueError('Authentication service is busy, please retry')
+        try:
+            future = pool.submit(func, *args)
+        except Exception:
+            slots.release()
+            raise
+        # The slot is held until the hash finishes, not until the caller stops
+        # waiting: a timed-out hash still occupies a pool thread
+        future.add_done_callback(lambda _: slots.release())
+        return future.result(timeout=Config.PASSWORD_HASH_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def reset():
+        """Drop the pool (worker threads do not survive a fork)"""
+        with PasswordHasher._lock:
+            if PasswordHasher._executor is not None:
+                PasswordHasher._executor.shutdown(wait=False)
+            PasswordHasher._executor = None
+            PasswordHasher._slots = None
+
+    @staticmethod
+    def hash_password(password):
+        """
+        Hash a password with the configured cost factor
+
+        Args:
+            password: Plain text password
+
+        Returns:
+            str: bcrypt hash
+        """
+        return PasswordHasher._run(
+            lambda pw: bcrypt.hashpw(pw, bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)).decode('utf-8'),
+            password.encode('utf-8')
+        )
+
+    @staticmethod
+    def check_password(password, hashed):
+        """
+        Verify a password against a stored bcrypt hash
+
+        Args:
+            password: Plain text password
+            hashed: Stored hash
+
+        Returns:
+            bool: True if the password matches
+        """
+        if not hashed:
+            return False
+        return PasswordHasher._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+
+    @staticmethod
+    def needs_rehash(hashed):
+        """Check whether a hash was made with a different cost factor than configured"""
+        try:
+            # Format: $2b$<cost>$<salt+hash>
+            return int(hashed.split('$')[2]) != Config.BCRYPT_ROUNDS
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    @staticmethod
+    def verify_user(user, password):
+        """
+        Verify a user's password, re-hashing it if the cost factor changed
+
+        Args:
+            user: UserDetailsModel
+            password: Plain text password
+
+        Returns:
+            bool: True if the password matches
+        """
+        if not PasswordHasher.check_password(password, user.user_password):
+            return False
+
+        if PasswordHasher.needs_rehash(user.user_password):
+            try:
+                user.user_password = PasswordHasher.hash_password(password)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Password re-hash failed for user {user.user_id}: {e}")
+
+        return True
@@ -0,0 +1,135 @@
+import time
+import threading
+from flask import g, has_request_context
+from flask_jwt_extended import get_jwt_identity
+from configs.app_config import Config
+from .user_loader import UserLoader
+from .token_versions import TokenVersions
+
+# Seed data names the role 'Platform Admin'; some checks use 'platform_admin'
+PLATFORM_ADMIN_ROLES = frozenset(('Platform Admin', 'platform_admin'))
+
+
+class Principal:
+    """
+    Compact, detached view of an authenticated user and their active
+    role/domain mappings. Safe to share across requests and threads.
+    """
+    __slots__ = ('user_id', 'email', 'name', 'active_flag', 'roles', 'domain_roles')
+
+    def __init__(self, user):
+        self.user_id = user.user_id
+        self.email = user.email
+        self.name = user.name
+        self.active_flag = user.active_flag
+
+        roles = set()
+        domain_roles = {}
+        for mapping in user.user_roles:
+            if not mapping.active_flag or not mapping.role:
+                continue
+            roles.add(mapping.role.role_name)
+            domain_roles.setdefault(mapping.domain_id, set()).add(mapping.role.role_name)
+
+        self.roles = frozenset(roles)
+        # domain_id -> role names (None holds global roles)
+        self.domain_roles = {k: frozenset(v) for k, v in domain_roles.items()}
+
+    def has_role(self, role_name, domain_id=None):
+        """Check role in any domain, or in a specific domain if given"""
+        if domain_id is None:
+            return role_name in self.roles
+        return role_name in self.domain_roles.get(domain_id, ())
+
+    def is_admin(self):
+        return 'admin' in self.roles
+
+    def is_platform_admin(self):
+        return not self.roles.isdisjoint(PLATFORM_ADMIN_ROLES)
+
+    def domain_ids(self):
+        """Domains the user has any active role in"""
+        return {d for d in self.domain_roles if d is not None}
+
+    def admin_domains(self):
+        """Domains the user administers"""
+        return {d for d, roles in self.domain_roles.items() if d is not None and 'admin' in roles}
+
+
+class PrincipalCache:
+    """
+    Principal lookup resolved once per request (flask.g) and backed by a
+    short-TTL cross-request cache keyed by user id and role-assignment
+    version. The version pairs a local counter (invalidate) with the
+    user's token version from user_token_versions, which every worker
+    shares: role changes go through Authorization.roles_changed(), which
+    bumps both, so other workers drop the cached roles within
+    TOKEN_VERSION_REFRESH_SECONDS instead of PRINCIPAL_CACHE_TTL_SECONDS.
+    """
+
+    _lock = threading.Lock()
+    _entries = {}
+    _versions = {}
+
+    @staticmethod
+    def get(user_id):
+        """
+        Get the principal for a user
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Principal: or None if the user does not exist
+        """
+        user_id = int(user_id)
+        now = time.monotonic()
+        version = (PrincipalCache._versions.get(user_id, 0), TokenVersions.current(user_id))
+
+        entry = PrincipalCache._entries.get(user_id)
+        if entry and entry[0] == version and entry[1] > now:
+            return entry[2]
+
+        user = UserLoader.by_id(user_id)
+        if not user:
+            return None
+
+        principal = Principal(user)
+        with PrincipalCache._lock:
+            # Skip the store if roles changed while we were loading
+            if PrincipalCache._versions.get(user_id, 0) == version[0]:
+                PrincipalCache._entries[user_id] = (version, now + Config.PRINCIPAL_CACHE_TTL_SECONDS, principal)
+        return principal
+
+    @staticmethod
+    def current():
+        """
+        Get the principal for the JWT identity of the current request
+
+        Raises:
+            ValueError: If the user no longer exists
+        """
+        if has_request_context() and getattr(g, '_principal', None) is not None:
+            return g._principal
+
+        principal = PrincipalCache.get(get_jwt_identity())
+        if not principal:
+            raise ValueError('User not found')
+
+        if has_request_context():
+            g._principal = principal
+        return principal
+
+    @staticmethod
+    def invalidate(user_id=None):
+        """Bump the role-assignment version of a user (or every user)"""
+        with PrincipalCache._lock:
+            if user_id is None:
+                PrincipalCache._entries.clear()
+                PrincipalCache._versions = {k: v + 1 for k, v in PrincipalCache._versions.items()}
+            else:
+                user_id = int(user_id)
+                PrincipalCache._versions[user_id] = PrincipalCache._versions.get(user_id, 0) + 1
+                PrincipalCache._entries.pop(user_id, None)
+        if has_request_context():
+            g.pop('_principal', None)
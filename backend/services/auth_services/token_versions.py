@@ -0,0 +1,150 @@
+import time
+import threading
+from datetime import datetime, timedelta
+from models import db
+from configs.app_config import Config
+
+
+user_token_versions = db.Table(
+    'user_token_versions',
+    db.Column('user_id', db.Integer, primary_key=True),
+    db.Column('version', db.Integer, nullable=False, default=0),
+    db.Column('updated_at', db.DateTime, nullable=False, default=datetime.utcnow, index=True),
+    schema='auth_schema'
+)
+
+
+class TokenVersions:
+    """
+    Per-user token versions.
+    Every access token carries the user's version in the 'tv' claim. Bumping
+    the version (on role changes) revokes all outstanding tokens of that user.
+    Versions are held in an in-memory table that is refreshed with a delta
+    query at most every TOKEN_VERSION_REFRESH_SECONDS, so checking a token
+    needs no per-request user lookup. New tokens are stamped from a forced
+    refresh, so a token issued right after a role change is never stamped
+    with the previous version.
+
+    Tokens are only rejected by version in claims mode (AUTHZ_MODE=claims),
+    where the claims are the authorization. In database mode every check
+    reads the current roles (PrincipalCache), so a role change takes effect
+    without revoking the user's tokens; versions are still bumped there and
+    keep the principal caches of all workers in step.
+    """
+
+    CLAIM = 'tv'
+
+    _lock = threading.Lock()
+    _versions = {}
+    _watermark = None
+    _refreshed_at = 0.0
+
+    @staticmethod
+    def refresh(force=False):
+        """Pull versions changed since the last refresh"""
+        now = time.monotonic()
+        if not force and now - TokenVersions._refreshed_at < Config.TOKEN_VERSION_REFRESH_SECONDS:
+            return
+
+        with TokenVersions._lock:
+            if not force and now - TokenVersions._refreshed_at < Config.TOKEN_VERSION_REFRESH_SECONDS:
+                return
+
+            query = db.select(user_token_versions.c.user_id, user_token_versions.c.version,
+                              user_token_versions.c.updated_at)
+            if TokenVersions._watermark is not None:
+                # Small overlap so rows committed during the last refresh are not missed
+                query = query.where(user_token_versions.c.updated_at > TokenVersions._watermark - timedelta(seconds=5))
+
+            for user_id, version, updated_at in db.session.execute(query):
+                if version > TokenVersions._versions.get(user_id, 0):
+                    TokenVersions._versions[user_id] = version
+                if TokenVersions._watermark is None or updated_at > TokenVersions._watermark:
+                    TokenVersions._watermark = updated_at
+
+            TokenVersions._refreshed_at = now
+
+    @staticmethod
+    def current(user_id, fresh=False):
+        """
+        Get the current token version of a user
+
+        Args:
+            user_id: User ID
+            fresh: Refresh from the database first instead of within the refresh interval
+        """
+        TokenVersions.refresh(force=fresh)
+        return TokenVersions._versions.get(int(user_id), 0)
+
+    @staticmethod
+    def bump(user_id):
+        """
+        Revoke all outstanding tokens of a user
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            int: New token version
+        """
+        user_id = int(user_id)
+        return TokenVersions.bump_many([user_id])[user_id]
+
+    @staticmethod
+    def bump_many(user_ids):
+        """
+        Revoke all outstanding tokens of several users in one transaction
+
+        Args:
+            user_ids: User IDs
+
+        Returns:
+            dict: New token version per user ID
+        """
+        user_ids = {int(user_id) for user_id in user_ids}
+        if not user_ids:
+            return {}
+
+        table = user_token_versions
+        current = dict(db.session.execute(
+            db.select(table.c.user_id, table.c.version).where(table.c.user_id.in_(user_ids))
+        ).all())
+
+        now = datetime.utcnow()
+        if current:
+            db.session.execute(
+                table.update()
+                .where(table.c.user_id.in_(list(current)))
+                .values(version=table.c.version + 1, updated_at=now)
+            )
+        missing = [user_id for user_id in user_ids if user_id not in current]
+        if missing:
+            db.session.execute(table.insert(), [
+                {'user_id': user_id, 'version': 1, 'updated_at': now} for user_id in missing
+            ])
+        db.session.commit()
+
+        versions = {user_id: current.get(user_id, 0) + 1 for user_id in user_ids}
+        with TokenVersions._lock:
+            TokenVersions._versions.update(versions)
+        return versions
+
+    @staticmethod
+    def is_revoked(jwt_payload):
+        """Check whether a decoded token predates the user's current version"""
+        return jwt_payload.get(TokenVersions.CLAIM, 0) < TokenVersions.current(jwt_payload['sub'])
+
+    @staticmethod
+    def register(jwt):
+        """Embed the version in new tokens and, in claims mode, reject outdated ones"""
+
+        @jwt.additional_claims_loader
+        def add_token_version(identity):
+            return {TokenVersions.CLAIM: TokenVersions.current(identity, fresh=True)}
+
+        if Config.AUTHZ_MODE != 'claims':
+            return
+
+        @jwt.token_in_blocklist_loader
+        def check_token_version(jwt_header, jwt_payload):
+            return TokenVersions.is_revoked(jwt_payload)
@@ -0,0 +1,28 @@
+from sqlalchemy.orm import joinedload
+from models import UserDetailsModel, UserRoleMappingModel
+
+
+class UserLoader:
+    """
+    Loads users together with their role and domain mappings in one query.
+    get_role_names(), get_user_domains() and to_dict() then work entirely
+    from memory instead of lazily loading role and domain per mapping.
+    """
+
+    @staticmethod
+    def _query():
+        roles = joinedload(UserDetailsModel.user_roles)
+        return UserDetailsModel.query.options(
+            roles.joinedload(UserRoleMappingModel.role),
+            roles.joinedload(UserRoleMappingModel.domain)
+        )
+
+    @staticmethod
+    def by_email(email):
+        """Get user by email with roles and domains eager-loaded"""
+        return UserLoader._query().filter(UserDetailsModel.email == email).first()
+
+    @staticmethod
+    def by_id(user_id):
+        """Get user by ID with roles and domains eager-loaded"""
+        return UserLoader._query().filter(UserDetailsModel.user_id == user_id).first()
@@ -0,0 +1,352 @@
+import os
+import re
+import json
+import fcntl
+import hashlib
+import time
+import threading
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from models import db
+from models import ChatHistory, GuardrailsConfig, GuardrailsLog, SystemConfig
+from configs.app_config import Config
+from services.guardrails_services.guardrails_evaluator import GuardrailScopes
+from services.system_services.db_writer import DBWriter
+
+
+CHECKPOINT_KEY = 'guardrails_backfill_checkpoint'
+STATUS_KEY = 'guardrails_backfill_status'
+STOP_KEY = 'guardrails_backfill_stop'
+
+# SystemConfig.value holds 255 characters: the status is stored under
+# one-letter keys and the error is truncated to fit
+STATUS_FIELDS = {
+    'state': 's', 'rules': 'r', 'rule_count': 'n', 'last_id': 'l', 'max_id': 'm', 'scanned': 'c',
+    'findings': 'f', 'rows_per_second': 'v', 'started_at': 'b', 'updated_at': 'u', 'error': 'e'
+}
+ERROR_MAX_LENGTH = 24
+
+_compiled_cache = {}
+
+
+def _rules_fingerprint(rules):
+    """Short, stable id of a rule set (keeps the checkpoint within SystemConfig.value)"""
+    return hashlib.sha1(repr([(r[0], r[3], r[4]) for r in rules]).encode('utf-8')).hexdigest()[:16]
+
+
+def _scan_rows(rules, rows):
+    """
+    Scan chat rows against guardrail rules (runs in a worker process)
+
+    Args:
+        rules: Tuple of (rule_id, rule_type, severity, pattern, applies_to)
+        rows: List of (chat_id, user_id, message, response)
+
+    Returns:
+        list: Log row mappings for every match
+    """
+    compiled = _compiled_cache.get(rules)
+    if compiled is None:
+        compiled = [(r[0], r[1], r[2], re.compile(r[3], re.IGNORECASE), r[4]) for r in rules]
+        _compiled_cache.clear()
+        _compiled_cache[rules] = compiled
+
+    findings = []
+    for chat_id, user_id, message, response in rows:
+        for rule_id, rule_type, severity, regex, applies_to in compiled:
+            for text, direction in ((message, 'input'), (response, 'output')):
+                if not text or applies_to not in ('both', direction):
+                    continue
+                for match in regex.finditer(text):
+                    findings.append({
+                        'user_id': user_id,
+                        'guardrail_id': rule_id,
+                        'detected_rule': rule_type,
+                        'content_snippet': f"[chat {chat_id} {direction}] {match.group()[:160]}",
+                        'action_taken': 'backfill'
+                    })
+    return findings
+
+
+class GuardrailsBackfill:
+    """
+    Retroactive guardrails scan over existing chat history.
+    Walks ChatHistory in id order (keyset), fans each chunk out to a process
+    pool, appends findings to GuardrailsLog through DBWriter and then
+    checkpoints the last scanned id in SystemConfig so a stopped job
+    resumes where it left off. One job runs at a time across all workers
+    (file lock); its status and stop request live in SystemConfig so any
+    worker can report or stop it. A scan from id 0 first removes the
+    earlier backfill findings of its rules, and a resumed scan those
+    stored after its checkpoint, so restarting never duplicates them.
+    """
+
+    _thread = None
+    _stop = threading.Event()
+
+    @staticmethod
+    def _lock_path():
+        os.makedirs(os.path.dirname(os.path.abspath(Config.GUARDRAILS_BACKFILL_LOCK_PATH)), exist_ok=True)
+        return Config.GUARDRAILS_BACKFILL_LOCK_PATH
+
+    @staticmethod
+    def _running():
+        """Whether some process holds the job lock"""
+        with open(GuardrailsBackfill._lock_path(), 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return True
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            return False
+
+    @staticmethod
+    def start(app, rule_ids=None, resume=True, chunk_size=None, workers=None):
+        """
+        Start a backfill job in the background
+
+        Args:
+            app: Flask app (the job runs in its own app context)
+            rule_ids: Only scan with these rules (default: all enabled rules)
+            resume: Continue from the stored checkpoint instead of id 0
+            chunk_size: Rows fetched per keyset page
+            workers: Number of scanning processes
+
+        Returns:
+            dict: Initial job status
+        """
+        lock_file = open(GuardrailsBackfill._lock_path(), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise ValueError('A guardrails backfill is already running')
+
+        try:
+            rules = GuardrailsBackfill._load_rules(rule_ids)
+            if not rules:
+                raise ValueError('No enabled guardrail rules to scan with')
+
+            checkpoint = GuardrailsBackfill._read_json(CHECKPOINT_KEY) if resume else None
+            if checkpoint and (checkpoint.get('rules') != _rules_fingerprint(rules) or not checkpoint.get('at')):
+                checkpoint = None  # Different rule set (or no resume time): start over
+
+            status = {
+                'state': 'running',
+                'rules': _rules_fingerprint(rules),
+                'rule_count': len(rules),
+                'last_id': checkpoint['last_id'] if checkpoint else 0,
+                'max_id': db.session.query(db.func.max(ChatHistory.id)).scalar() or 0,
+                'scanned': checkpoint['scanned'] if checkpoint else 0,
+                'findings': checkpoint['findings'] if checkpoint else 0,
+                'rows_per_second': 0.0,
+                'started_at': datetime.utcnow().isoformat(timespec='seconds'),
+                'updated_at': None,
+                'error': None
+            }
+            GuardrailsBackfill._write_status(status)
+            GuardrailsBackfill._write_json(STOP_KEY, False, 'Guardrails backfill stop request')
+            db.session.commit()
+
+            GuardrailsBackfill._stop.clear()
+            GuardrailsBackfill._thread = threading.Thread(
+                target=GuardrailsBackfill._run,
+                args=(app, lock_file, rules, status, checkpoint,
+                      chunk_size or Config.GUARDRAILS_BACKFILL_CHUNK_SIZE,
+                      workers or Config.GUARDRAILS_BACKFILL_WORKERS),
+                name='guardrails-backfill',
+                daemon=True
+            )
+            GuardrailsBackfill._thread.start()
+        except Exception:
+            db.session.rollback()
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+            raise
+        return GuardrailsBackfill._present(status)
+
+    @staticmethod
+    def stop():
+        """Ask the running job (in whichever worker runs it) to stop after the current chunk"""
+        GuardrailsBackfill._stop.set()
+        GuardrailsBackfill._write_json(STOP_KEY, True, 'Guardrails backfill stop request')
+        db.session.commit()
+        return GuardrailsBackfill.status()
+
+    @staticmethod
+    def status():
+        """Get progress and throughput of the current or last job"""
+        status = GuardrailsBackfill._read_status() or {'state': 'idle'}
+        db.session.rollback()
+        if status['state'] == 'running' and not GuardrailsBackfill._running():
+            # The process running the job died before recording its outcome
+            status['state'] = 'interrupted'
+        return GuardrailsBackfill._present(status)
+
+    @staticmethod
+    def _present(status):
+        status = dict(status)
+        if status.get('max_id'):
+            status['progress'] = round(min(status['last_id'] / status['max_id'], 1.0) * 100, 2)
+        return status
+
+    @staticmethod
+    def _load_rules(rule_ids=None):
+        query = GuardrailsConfig.query.filter_by(enabled=True)
+        if rule_ids:
+            query = query.filter(GuardrailsConfig.id.in_(rule_ids))
+
+        rules = []
+        scopes = GuardrailScopes.all()
+        for rule in query.order_by(GuardrailsConfig.id).all():
+            if not rule.pattern:
+                continue
+            try:
+                re.compile(rule.pattern)
+            except re.error:
+                continue
+            rules.append((
+                rule.id, rule.rule_type, rule.severity, rule.pattern,
+                scopes.get(rule.id, {}).get('applies_to', 'both')
+            ))
+        return tuple(rules)
+
+    @staticmethod
+    def _read_json(key):
+        config = SystemConfig.query.get(key)
+        if not config:
+            return None
+        try:
+            return json.loads(config.value)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _write_json(key, value, description):
+        """Stage a SystemConfig value (kept compact: the column holds 255 characters)"""
+        config = SystemConfig.query.get(key)
+        if not config:
+            config = SystemConfig(key=key, description=description)
+            db.session.add(config)
+        config.value = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+    @staticmethod
+    def _read_status():
+        stored = GuardrailsBackfill._read_json(STATUS_KEY)
+        if not stored:
+            return None
+        return {field: stored.get(short) for field, short in STATUS_FIELDS.items()}
+
+    @staticmethod
+    def _write_status(status):
+        if status.get('error'):
+            status['error'] = status['error'][:ERROR_MAX_LENGTH]
+        GuardrailsBackfill._write_json(
+            STATUS_KEY, {short: status.get(field) for field, short in STATUS_FIELDS.items()},
+            'Guardrails backfill status'
+        )
+
+    @staticmethod
+    def _write_checkpoint(rules, status):
+        """Stage the resume point; every finding stored so far is older than 'at'"""
+        GuardrailsBackfill._write_json(CHECKPOINT_KEY, {
+            'last_id': status['last_id'],
+            'scanned': status['scanned'],
+            'findings': status['findings'],
+            'rules': _rules_fingerprint(rules),
+            'at': datetime.utcnow().isoformat()
+        }, 'Guardrails backfill resume point')
+
+    @staticmethod
+    def _stop_requested():
+        if GuardrailsBackfill._stop.is_set():
+            return True
+        requested = GuardrailsBackfill._read_json(STOP_KEY)
+        db.session.rollback()
+        return bool(requested)
+
+    @staticmethod
+    def _fetch_chunk(last_id, chunk_size):
+        return (
+            db.session.query(ChatHistory.id, ChatHistory.user_id, ChatHistory.message, ChatHistory.response)
+            .filter(ChatHistory.id > last_id)
+            .order_by(ChatHistory.id)
+            .limit(chunk_size)
+            .all()
+        )
+
+    @staticmethod
+    def _run(app, lock_file, rules, status, checkpoint, chunk_size, workers):
+        started = time.monotonic()
+        scanned_at_start = status['scanned']
+
+        with app.app_context(), ProcessPoolExecutor(max_workers=workers) as pool:
+            try:
+                # Fresh scan: drop this rule set's earlier findings. Resumed scan:
+                # drop findings of a chunk whose checkpoint was never committed.
+                # Either way in the same commit as the (re)written checkpoint.
+                stale = db.delete(GuardrailsLog).where(
+                    GuardrailsLog.action_taken == 'backfill',
+                    GuardrailsLog.guardrail_id.in_([r[0] for r in rules])
+                )
+                if status['last_id'] != 0:
+                    stale = stale.where(GuardrailsLog.timestamp > datetime.fromisoformat(checkpoint['at']))
+                db.session.execute(stale)
+                GuardrailsBackfill._write_checkpoint(rules, status)
+                db.session.commit()
+
+                rows = GuardrailsBackfill._fetch_chunk(status['last_id'], chunk_size)
+                stopped = False
+                while rows:
+                    if GuardrailsBackfill._stop_requested():
+                        stopped = True
+                        break
+                    rows = [tuple(r) for r in rows]
+                    slice_size = max(1, -(-len(rows) // workers))
+                    futures = [
+                        pool.submit(_scan_rows, rules, rows[i:i + slice_size])
+                        for i in range(0, len(rows), slice_size)
+                    ]
+
+                    # Fetch the next page while the workers scan this one
+                    next_rows = GuardrailsBackfill._fetch_chunk(rows[-1][0], chunk_size)
+
+                    findings = []
+                    for future in futures:
+                        findings.extend(future.result())
+
+                    # Appends go through the single writer; the checkpoint only
+                    # moves once they are committed
+                    if findings and not DBWriter.insert(GuardrailsLog.__table__, findings, wait=True, timeout=120):
+                        raise RuntimeError('Backfill findings were not stored')
+
+                    status['last_id'] = rows[-1][0]
+                    status['scanned'] += len(rows)
+                    status['findings'] += len(findings)
+                    status['updated_at'] = datetime.utcnow().isoformat(timespec='seconds')
+                    elapsed = time.monotonic() - started
+                    if elapsed > 0:
+                        status['rows_per_second'] = round((status['scanned'] - scanned_at_start) / elapsed, 1)
+
+                    GuardrailsBackfill._write_checkpoint(rules, status)
+                    GuardrailsBackfill._write_status(status)
+                    db.session.commit()
+
+                    rows = next_rows
+
+                status['state'] = 'stopped' if stopped else 'completed'
+            except Exception as e:
+                db.session.rollback()
+                print(f"Guardrails backfill failed: {e}")
+                status['state'] = 'failed'
+                status['error'] = str(e)
+            finally:
+                try:
+                    GuardrailsBackfill._write_status(status)
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Could not record guardrails backfill status: {e}")
+                db.session.remove()
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
@@ -0,0 +1,249 @@
+import re
+import time
+import threading
+from datetime import datetime
+from models import db, GuardrailsConfig, GuardrailsLog, DomainModel
+from configs.app_config import Config
+from services.system_services.db_writer import DBWriter
+from services.system_services.metrics import Metrics
+
+
+class CompiledRule:
+    """A guardrail rule with its pattern compiled once"""
+    __slots__ = ('id', 'rule_type', 'severity', 'regex', 'applies_to', 'domain_id')
+
+    def __init__(self, rule, scope=None):
+        scope = scope or {}
+        self.id = rule.id
+        self.rule_type = rule.rule_type
+        self.severity = rule.severity
+        self.regex = re.compile(rule.pattern, re.IGNORECASE)
+        self.applies_to = scope.get('applies_to') or 'both'
+        self.domain_id = scope.get('domain_id')
+
+    def applies(self, check_type, domain_id):
+        """Check whether this rule is relevant for a direction and domain"""
+        if check_type != 'both' and self.applies_to not in ('both', check_type):
+            return False
+        return self.domain_id is None or self.domain_id == domain_id
+
+
+class GuardrailScopes:
+    """
+    Direction and domain scope of guardrail rules.
+    The applies_to and domain_id columns are added by migration 4 and are
+    not mapped on GuardrailsConfig, so they are read and written here.
+    """
+
+    FIELDS = ('applies_to', 'domain_id')
+
+    @staticmethod
+    def split(data):
+        """
+        Separate the scope fields from the fields GuardrailsService accepts
+
+        Returns:
+            tuple: (service fields, scope fields present in data)
+
+        Raises:
+            ValueError: Unknown domain
+        """
+        data = dict(data)
+        scope = {field: data.pop(field) for field in GuardrailScopes.FIELDS if field in data}
+        GuardrailScopes.validate(scope)
+        return data, scope
+
+    @staticmethod
+    def validate(scope):
+        """
+        Check the scope fields before they are stored
+
+        Raises:
+            ValueError: Invalid direction or unknown domain
+        """
+        if 'applies_to' in scope and scope['applies_to'] not in GuardrailsEvaluator.CHECK_TYPES:
+            raise ValueError(f"Invalid applies_to: {scope['applies_to']}")
+        domain_id = scope.get('domain_id')
+        if domain_id is not None and not db.session.execute(
+            db.select(DomainModel.domain_id).where(DomainModel.domain_id == domain_id)
+        ).first():
+            raise ValueError(f'Domain {domain_id} not found')
+
+    @staticmethod
+    def all():
+        """Scope per rule id"""
+        rows = db.session.execute(db.text(
+            'SELECT id, applies_to, domain_id FROM guardrails_schema.guardrails_config'
+        )).all()
+        return {row.id: {'applies_to': row.applies_to or 'both', 'domain_id': row.domain_id} for row in rows}
+
+    @staticmethod
+    def set(rule_id, scope):
+        """
+        Store the given scope fields of a rule
+
+        Raises:
+            ValueError: Invalid direction or unknown domain
+        """
+        if not scope:
+            return
+        GuardrailScopes.validate(scope)
+        assignments = ', '.join(f'{field} = :{field}' for field in scope)
+        db.session.execute(
+            db.text(f'UPDATE guardrails_schema.guardrails_config SET {assignments} WHERE id = :rule_id'),
+            dict(scope, rule_id=rule_id)
+        )
+        db.session.commit()
+
+    @staticmethod
+    def attach(rule, scopes=None):
+        """Add the scope fields to a rule dict"""
+        scopes = GuardrailScopes.all() if scopes is None else scopes
+        return dict(rule, **scopes.get(rule['id'], {'applies_to': 'both', 'domain_id': None}))
+
+
+class GuardrailsEvaluator:
+    """
+    Compiled guardrails evaluator.
+    Rules are compiled once and bucketed by (check_type, domain_id) so each
+    request only runs the rules relevant to its direction and domain.
+    Every invalidation or reload starts a new generation; a rule set or
+    bucket computed during an older generation is used for that call but
+    never cached.
+    """
+
+    CHECK_TYPES = ('input', 'output', 'both')
+
+    _lock = threading.Lock()
+    _rules = None
+    _buckets = {}
+    _loaded_at = 0.0
+    _generation = 0
+
+    @staticmethod
+    def invalidate():
+        """Drop the compiled rule set (call after rule create/update/delete)"""
+        with GuardrailsEvaluator._lock:
+            GuardrailsEvaluator._generation += 1
+            GuardrailsEvaluator._rules = None
+            GuardrailsEvaluator._buckets = {}
+
+    @staticmethod
+    def _load():
+        """
+        Compile enabled rules, reloading when the cache has expired
+
+        Returns:
+            tuple: (compiled rules, generation they belong to)
+        """
+        now = time.monotonic()
+        with GuardrailsEvaluator._lock:
+            rules = GuardrailsEvaluator._rules
+            generation = GuardrailsEvaluator._generation
+        if rules is not None and now - GuardrailsEvaluator._loaded_at < Config.GUARDRAILS_RULES_TTL_SECONDS:
+            return rules, generation
+
+        rules = []
+        scopes = GuardrailScopes.all()
+        for rule in GuardrailsConfig.query.filter_by(enabled=True).all():
+            if not rule.pattern:
+                continue
+            try:
+                rules.append(CompiledRule(rule, scopes.get(rule.id)))
+            except re.error as e:
+                print(f"Skipping guardrail {rule.rule_type}: invalid pattern ({e})")
+
+        with GuardrailsEvaluator._lock:
+            # An invalidate() during the load leaves the rule set uncached
+            if generation != GuardrailsEvaluator._generation:
+                return rules, None
+            GuardrailsEvaluator._generation += 1
+            GuardrailsEvaluator._rules = rules
+            GuardrailsEvaluator._buckets = {}
+            GuardrailsEvaluator._loaded_at = now
+            return rules, GuardrailsEvaluator._generation
+
+    @staticmethod
+    def rules_for(check_type='both', domain_id=None):
+        """
+        Get the compiled rules relevant to a direction and domain
+
+        Args:
+            check_type: 'input', 'output', or 'both'
+            domain_id: Active domain (None for global-only rules)
+
+        Returns:
+            tuple: Compiled rules
+        """
+        if check_type not in GuardrailsEvaluator.CHECK_TYPES:
+            raise ValueError(f'Invalid check type: {check_type}')
+
+        rules, generation = GuardrailsEvaluator._load()
+        key = (check_type, domain_id)
+        bucket = GuardrailsEvaluator._buckets.get(key) if generation is not None else None
+        if bucket is None:
+            bucket = tuple(r for r in rules if r.applies(check_type, domain_id))
+            with GuardrailsEvaluator._lock:
+                if generation is not None and generation == GuardrailsEvaluator._generation:
+                    GuardrailsEvaluator._buckets[key] = bucket
+        return bucket
+
+    @staticmethod
+    @Metrics.timed('guardrails.check_content')
+    def check_content(content, user_id, check_type='both', domain_id=None):
+        """
+        Check content against the guardrails relevant to this exchange
+
+        Args:
+            content: Content to check
+            user_id: User ID
+            check_type: 'input', 'output', or 'both'
+            domain_id: Active domain from the JWT
+
+        Returns:
+            dict: Check results with violations and cleaned content
+        """
+        if not Config.GUARDRAILS_ENABLED:
+            return {
+                'passed': True,
+                'violations': [],
+                'cleaned_content': content
+            }
+
+        violations = []
+        log_rows = []
+        cleaned_content = content
+
+        for rule in GuardrailsEvaluator.rules_for(check_type, domain_id):
+            for match in rule.regex.finditer(content):
+                violations.append({
+                    'rule_type': rule.rule_type,
+                    'severity': rule.severity,
+                    'matched_text': match.group(),
+                    'position': match.span()
+                })
+
+                log_rows.append({
+                    'user_id': user_id,
+                    'guardrail_id': rule.id,
+                    'detected_rule': rule.rule_type,
+                    'content_snippet': match.group()[:200],
+                    'timestamp': datetime.utcnow(),
+                    'action_taken': 'blocked' if rule.severity == 'high' else 'warned'
+                })
+
+                # Redact high severity violations
+                if rule.severity == 'high':
+                    cleaned_content = cleaned_content.replace(match.group(), '[REDACTED]')
+
+        # Logged through the single writer; the request does not wait for the commit
+        DBWriter.insert(GuardrailsLog.__table__, log_rows)
+
+        passed = not any(v['severity'] == 'high' for v in violations)
+
+        return {
+            'passed': passed,
+            'violations': violations,
+            'cleaned_content': cleaned_content,
+            'action': 'blocked' if not passed else 'allowed'
+        }
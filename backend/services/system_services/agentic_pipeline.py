@@ -0,0 +1,140 @@
+import threading
+from configs.app_config import Config
+from services.guardrails_services.guardrails_evaluator import GuardrailsEvaluator
+from services.system_services.request_pipeline import RequestPipeline
+from services.system_services.metrics import Metrics
+from services.system_services.single_flight import SingleFlightLLM
+
+
+def _passed(result):
+    return result['passed']
+
+
+class _Gate:
+    """Outcome of the input guardrails, for a stage that runs beside them"""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.passed = False
+
+    def guard(self, check):
+        def run():
+            try:
+                result = check()
+                self.passed = _passed(result)
+                return result
+            finally:
+                self._done.set()
+        return run
+
+    def wait(self, timeout):
+        """Whether the guardrails passed within the timeout"""
+        return self._done.wait(timeout) and self.passed
+
+
+class _GatedLLM:
+    """Chat model wrapper whose invoke() waits for the input guardrails to pass"""
+
+    def __init__(self, llm, gate):
+        self.llm = llm
+        self.gate = gate
+
+    def invoke(self, input, config=None, **kwargs):
+        if not self.gate.wait(Config.PIPELINE_GUARDRAILS_TIMEOUT_SECONDS):
+            # The pipeline reports the rejection or timeout of the gate itself
+            raise RuntimeError('Input guardrails did not pass')
+        with Metrics.span('llm.invoke'):
+            return self.llm.invoke(input, config, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+
+class AgenticPipeline:
+    """
+    Concurrent request paths for the agentic endpoints.
+    Input guardrails run beside the service call that answers the request
+    (history, document lookup, vector retrieval, web search); the LLM call
+    only starts once the guardrails have accepted the message, so a
+    rejected request never reaches the model.
+    """
+
+    @staticmethod
+    def _input_check(content, user_id, domain_id):
+        return lambda: GuardrailsEvaluator.check_content(content, user_id, 'input', domain_id=domain_id)
+
+    @staticmethod
+    def rag_chat(rag_service, query, user_id, domain_id=None, use_internet=False):
+        """
+        Chat with the user's documents
+
+        RAGService.chat_with_documents does the retrieval, web search, prompt
+        and history as for a direct call; it runs beside the input guardrails
+        with its model held back until they pass.
+
+        Args:
+            rag_service: RAGService instance for this request (its llm is wrapped)
+            query: User question
+            user_id: User ID
+            domain_id: Domain for guardrail rules
+            use_internet: Whether to add web search results
+
+        Returns:
+            tuple: (response dict, per-stage timings)
+
+        Raises:
+            StageRejected: Input guardrails rejected the query
+            ValueError: No documents, or nothing could be retrieved
+        """
+        SingleFlightLLM.wrap(rag_service)
+        gate = _Gate()
+        rag_service.llm = _GatedLLM(rag_service.llm, gate)
+
+        pipeline = RequestPipeline()
+        pipeline.add('input_guardrails', gate.guard(AgenticPipeline._input_check(query, user_id, domain_id)),
+                     timeout=Config.PIPELINE_GUARDRAILS_TIMEOUT_SECONDS, accept=_passed)
+        pipeline.add('answer', lambda: rag_service.chat_with_documents(query, user_id, use_internet),
+                     timeout=(Config.PIPELINE_RETRIEVAL_TIMEOUT_SECONDS + Config.PIPELINE_SEARCH_TIMEOUT_SECONDS
+                              + Config.PIPELINE_LLM_TIMEOUT_SECONDS))
+        results = pipeline.run()
+        return results['answer'], pipeline.timings
+
+    @staticmethod
+    def tool_chat(chat_service, message, user_id, domain_id=None, images=None):
+        """
+        Chat with tool calling
+
+        Args:
+            chat_service: ChatService instance
+            message: User message
+            user_id: User ID
+            domain_id: Domain for guardrail rules
+            images: Temporary image paths, if any
+
+        Returns:
+            tuple: (response dict, per-stage timings)
+
+        Raises:
+            StageRejected: Input guardrails rejected the message
+        """
+        # chat_with_tools calls self.llm.invoke internally
+        SingleFlightLLM.wrap(chat_service)
+
+        def answer(input_guardrails, history):
+            with Metrics.span('llm.chat_with_tools'):
+                return chat_service.chat_with_tools(
+                    message=message,
+                    user_id=user_id,
+                    chat_history=history,
+                    images=images if images else None
+                )
+
+        pipeline = RequestPipeline()
+        pipeline.add('input_guardrails', AgenticPipeline._input_check(message, user_id, domain_id),
+                     timeout=Config.PIPELINE_GUARDRAILS_TIMEOUT_SECONDS, accept=_passed)
+        pipeline.add('history', lambda: chat_service.get_chat_history(user_id, 'tool', limit=10),
+                     timeout=Config.PIPELINE_DB_TIMEOUT_SECONDS, required=False, default=[])
+        pipeline.add('answer', answer, after=('input_guardrails', 'history'),
+                     timeout=Config.PIPELINE_LLM_TIMEOUT_SECONDS)
+        results = pipeline.run()
+        return results['answer'], pipeline.timings
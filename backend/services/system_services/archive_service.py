@@ -0,0 +1,302 @@
+import os
+import json
+import fcntl
+import threading
+from datetime import datetime, timedelta, timezone
+from models import db, ChatHistory, GuardrailsLog, UserDetailsModel
+from configs.app_config import Config
+
+
+class ArchivedTable:
+    """An append-only table with a retention window"""
+
+    def __init__(self, key, model, retention_days, to_dict):
+        self.key = key
+        self.model = model
+        self.table = model.__table__
+        self.retention_days = retention_days
+        self.to_dict = to_dict
+
+    @property
+    def path(self):
+        return os.path.join(Config.ARCHIVE_PATH, self.key)
+
+    def cutoff(self):
+        return datetime.utcnow() - timedelta(days=self.retention_days)
+
+
+def _chat_dict(row):
+    metadata = row['extra_metadata']
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    return {
+        'id': row['id'],
+        'user_id': row['user_id'],
+        'message': row['message'],
+        'response': row['response'],
+        'chat_type': row['chat_type'],
+        'timestamp': row['timestamp'].isoformat(),
+        'metadata': metadata
+    }
+
+
+def _log_dict(row):
+    return {
+        'id': row['id'],
+        'user_id': row['user_id'],
+        'user_email': row.get('user_email', 'Unknown'),
+        'detected_rule': row['detected_rule'],
+        'content_snippet': row['content_snippet'],
+        'timestamp': row['timestamp'].isoformat(),
+        'action_taken': row['action_taken']
+    }
+
+
+def _naive_utc(value):
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _sql_literal(value):
+    """Quote a string for statements that take no parameters (COPY ... TO)"""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _duck_type(column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return 'VARCHAR'
+    if python_type is bool:
+        return 'BOOLEAN'
+    if python_type is int:
+        return 'BIGINT'
+    if python_type is float:
+        return 'DOUBLE'
+    if python_type is datetime:
+        return 'TIMESTAMP'
+    return 'VARCHAR'
+
+
+class ArchiveService:
+    """
+    Retention tier for append-only tables.
+    Rows older than the table's retention window are moved, one day and at
+    most ARCHIVE_BATCH_ROWS rows at a time, into Parquet files under
+    ARCHIVE_PATH/<table>/date=YYYY-MM-DD/. Each part is written to disk
+    before its rows are deleted, and part names are derived from the id
+    range so a rerun after a crash overwrites rather than duplicates.
+    DuckDB reads the files in place (hive partitioning prunes by date).
+    """
+
+    TABLES = {
+        'chat_history': ArchivedTable('chat_history', ChatHistory, Config.CHAT_HISTORY_RETENTION_DAYS, _chat_dict),
+        'guardrails_logs': ArchivedTable('guardrails_logs', GuardrailsLog, Config.GUARDRAILS_LOG_RETENTION_DAYS, _log_dict)
+    }
+
+    _scheduler = None
+    _scheduler_pid = None
+    _stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Archival
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _write_parquet(spec, rows, path):
+        import duckdb
+
+        columns = list(spec.table.columns)
+        conn = duckdb.connect()
+        try:
+            conn.execute('CREATE TABLE part ({})'.format(
+                ', '.join(f'"{c.name}" {_duck_type(c)}' for c in columns)
+            ))
+            conn.executemany(
+                'INSERT INTO part VALUES ({})'.format(', '.join('?' for _ in columns)),
+                [[json.dumps(row[c.name]) if isinstance(row[c.name], (dict, list)) else row[c.name] for c in columns]
+                 for row in rows]
+            )
+            tmp_path = path + '.tmp'
+            conn.execute(f"COPY part TO {_sql_literal(tmp_path)} (FORMAT PARQUET, COMPRESSION ZSTD)")
+        finally:
+            conn.close()
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def archive_table(key, cutoff=None):
+        """
+        Move rows older than the cutoff into Parquet (requires an app context)
+
+        Args:
+            key: 'chat_history' or 'guardrails_logs'
+            cutoff: Archive rows with timestamp before this (default: retention window)
+
+        Returns:
+            dict: Archived row and file counts
+        """
+        spec = ArchiveService.TABLES[key]
+        table = spec.table
+        cutoff = cutoff or spec.cutoff()
+        archived = files = 0
+
+        while True:
+            oldest = db.session.query(db.func.min(table.c.timestamp)).filter(table.c.timestamp < cutoff).scalar()
+            if oldest is None:
+                break
+
+            day = oldest.date()
+            day_start = datetime.combine(day, datetime.min.time())
+            day_end = min(day_start + timedelta(days=1), cutoff)
+            rows = [dict(r._mapping) for r in db.session.execute(
+                db.select(table)
+                .where(table.c.timestamp >= day_start, table.c.timestamp < day_end)
+                .order_by(table.c.id)
+                .limit(Config.ARCHIVE_BATCH_ROWS)
+            )]
+            first_id, last_id = rows[0]['id'], rows[-1]['id']
+
+            directory = os.path.join(spec.path, f'date={day.isoformat()}')
+            os.makedirs(directory, exist_ok=True)
+            ArchiveService._write_parquet(spec, rows, os.path.join(directory, f'part-{first_id}-{last_id}.parquet'))
+
+            try:
+                db.session.execute(table.delete().where(
+                    table.c.timestamp >= day_start,
+                    table.c.timestamp < day_end,
+                    table.c.id >= first_id,
+                    table.c.id <= last_id
+                ))
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            archived += len(rows)
+            files += 1
+
+        return {'table': key, 'archived_rows': archived, 'files': files}
+
+    @staticmethod
+    def run_once():
+        """
+        Archive every table, unless another process is already doing it
+
+        Returns:
+            list: Per-table results (empty if another process holds the lock)
+        """
+        os.makedirs(Config.ARCHIVE_PATH, exist_ok=True)
+        with open(os.path.join(Config.ARCHIVE_PATH, '.lock'), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return []
+            try:
+                return [ArchiveService.archive_table(key) for key in ArchiveService.TABLES]
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def start_scheduler(app):
+        """Archive every ARCHIVE_INTERVAL_SECONDS in a background thread"""
+        if ArchiveService._scheduler and ArchiveService._scheduler.is_alive() and ArchiveService._scheduler_pid == os.getpid():
+            return
+
+        def loop():
+            while not ArchiveService._stop.wait(Config.ARCHIVE_INTERVAL_SECONDS):
+                with app.app_context():
+                    try:
+                        for result in ArchiveService.run_once():
+                            if result['archived_rows']:
+                                print(f"Archived {result['archived_rows']} rows from {result['table']}")
+                    except Exception as e:
+                        print(f"Archival failed: {e}")
+                    finally:
+                        db.session.remove()
+
+        ArchiveService._stop.clear()
+        ArchiveService._scheduler = threading.Thread(target=loop, name='archiver', daemon=True)
+        ArchiveService._scheduler_pid = os.getpid()
+        ArchiveService._scheduler.start()
+
+    @staticmethod
+    def stop_scheduler():
+        ArchiveService._stop.set()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _archived_rows(spec, start, end, filters, limit):
+        import duckdb
+
+        pattern = os.path.join(spec.path, '*', '*.parquet')
+        if not os.path.isdir(spec.path):
+            return []
+
+        where = ['"date" >= ?', '"date" <= ?', 'timestamp >= ?', 'timestamp < ?']
+        params = [pattern, start.date().isoformat(), end.date().isoformat(), start, end]
+        for column, value in filters.items():
+            where.append(f'"{column}" = ?')
+            params.append(value)
+
+        conn = duckdb.connect()
+        try:
+            result = conn.execute(
+                f"SELECT * EXCLUDE (\"date\") FROM read_parquet(?, hive_partitioning = true) "
+                f"WHERE {' AND '.join(where)} "
+                f"ORDER BY timestamp DESC LIMIT {int(limit)}",
+                params
+            )
+            names = [d[0] for d in result.description]
+            return [dict(zip(names, row)) for row in result.fetchall()]
+        except duckdb.IOException:
+            return []  # No files matched
+        finally:
+            conn.close()
+
+    @staticmethod
+    def query(key, start, end=None, filters=None, limit=100):
+        """
+        Read rows in a time range from the hot table and the archive
+
+        Args:
+            key: 'chat_history' or 'guardrails_logs'
+            start: Range start (inclusive)
+            end: Range end (exclusive, default now)
+            filters: Equality filters by column, e.g. {'user_id': 5}
+            limit: Maximum rows, newest first
+
+        Returns:
+            list: Row dicts in the model's to_dict() shape
+        """
+        spec = ArchiveService.TABLES[key]
+        table = spec.table
+        start = _naive_utc(start)
+        end = _naive_utc(end) or datetime.utcnow()
+        filters = filters or {}
+
+        query = db.select(table).where(table.c.timestamp >= start, table.c.timestamp < end)
+        for column, value in filters.items():
+            query = query.where(table.c[column] == value)
+        rows = [dict(r._mapping) for r in db.session.execute(query.order_by(table.c.timestamp.desc()).limit(limit))]
+
+        # Only touch Parquet when the range reaches past the hot window
+        if start < spec.cutoff() + timedelta(days=1):
+            rows += ArchiveService._archived_rows(spec, start, end, filters, limit)
+            seen = set()
+            rows = [r for r in sorted(rows, key=lambda r: r['timestamp'], reverse=True)
+                    if not (r['id'] in seen or seen.add(r['id']))][:limit]
+
+        if key == 'guardrails_logs' and rows:
+            emails = dict(
+                db.session.query(UserDetailsModel.user_id, UserDetailsModel.email)
+                .filter(UserDetailsModel.user_id.in_({r['user_id'] for r in rows}))
+                .all()
+            )
+            for row in rows:
+                row['user_email'] = emails.get(row['user_id'], 'Unknown')
+
+        return [spec.to_dict(row) for row in rows]
@@ -0,0 +1,336 @@
+import os
+import json
+import time
+import queue
+import socket
+import struct
+import threading
+from datetime import datetime
+from flask import current_app
+from models import db
+from configs.app_config import Config, build_engine_options
+from services.system_services.metrics import Metrics
+
+
+class _Encoder(json.JSONEncoder):
+    def default(self, o):
+        if isinstance(o, datetime):
+            return {'__dt__': o.isoformat()}
+        return super().default(o)
+
+
+def _decode(obj):
+    if '__dt__' in obj:
+        return datetime.fromisoformat(obj['__dt__'])
+    return obj
+
+
+def _send(sock, payload):
+    body = json.dumps(payload, cls=_Encoder).encode('utf-8')
+    sock.sendall(struct.pack('!I', len(body)) + body)
+
+
+def _recv(sock):
+    header = _recv_exact(sock, 4)
+    if header is None:
+        return None
+    body = _recv_exact(sock, struct.unpack('!I', header)[0])
+    return json.loads(body.decode('utf-8'), object_hook=_decode) if body is not None else None
+
+
+def _recv_exact(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+class WriteOp:
+    """Rows to insert into one table, with a completion signal"""
+    __slots__ = ('table', 'rows', 'done', 'error')
+
+    def __init__(self, table, rows):
+        self.table = table
+        self.rows = rows
+        self.done = threading.Event()
+        self.error = None
+
+
+class DBWriter:
+    """
+    Single writer for DuckDB.
+    DuckDB allows one writing process per file and aborts conflicting
+    transactions, so append-style writes (logs, history) are funnelled
+    through one writer that applies them in grouped transactions: up to
+    DB_WRITER_BATCH_MAX_OPS operations, or whatever arrives within
+    DB_WRITER_BATCH_WINDOW_MS, per commit.
+
+    Without DB_WRITER_SOCKET the writer is a thread in the process, which
+    only serialises writes of that one process: use it with a single
+    worker. Multi-worker deployments on DuckDB run one dedicated writer
+    process and point every worker at it:
+
+        DB_WRITER_SOCKET=/run/app/db_writer.sock python -m services.system_services.db_writer
+        DB_WRITER_SOCKET=/run/app/db_writer.sock WEB_WORKERS=8 python serve.py
+
+    Workers then send their appends over the Unix socket and only the
+    writer process commits them (benchmarks/bench_db_writer.py load-tests
+    this with 8 worker processes).
+    """
+
+    _queue = queue.Queue(maxsize=Config.DB_WRITER_QUEUE_MAX)
+    _lock = threading.Lock()
+    _worker = None
+    _worker_pid = None
+    _local = threading.local()
+
+    LOCK_RETRIES = 5
+
+    _metrics_lock = threading.Lock()
+    _metrics = {'ops': 0, 'rows': 0, 'batches': 0, 'failed_ops': 0, 'dropped_ops': 0}
+
+    @staticmethod
+    def insert(table, rows, wait=False, timeout=10):
+        """
+        Queue rows for insertion
+
+        Args:
+            table: SQLAlchemy Table (or model __table__) or its full name
+            rows: List of column dicts
+            wait: Block until the rows are committed
+            timeout: Seconds to wait for the commit (or socket reply)
+
+        Returns:
+            bool: False if the write was dropped or failed
+        """
+        if not rows:
+            return True
+        name = table if isinstance(table, str) else table.fullname
+
+        if Config.DB_WRITER_SOCKET:
+            return DBWriter._send_remote(name, rows, wait, timeout)
+
+        DBWriter._ensure_worker()
+        op = WriteOp(name, rows)
+        try:
+            DBWriter._queue.put_nowait(op)
+        except queue.Full:
+            DBWriter._count('dropped_ops')
+            print(f"DB writer queue full, dropping {len(rows)} rows for {name}")
+            return False
+        if not wait:
+            return True
+        return op.done.wait(timeout) and op.error is None
+
+    @staticmethod
+    def drain(timeout=10):
+        """
+        Wait for queued writes to be committed (e.g. before a worker exits)
+
+        Returns:
+            bool: True if the queue emptied within the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while DBWriter._queue.unfinished_tasks:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    @staticmethod
+    def _count(name):
+        with DBWriter._metrics_lock:
+            DBWriter._metrics[name] += 1
+
+    @staticmethod
+    def metrics():
+        """Get write counters and queue depth"""
+        with DBWriter._metrics_lock:
+            metrics = dict(DBWriter._metrics)
+        metrics['queue_depth'] = DBWriter._queue.qsize()
+        metrics['avg_ops_per_batch'] = metrics['ops'] / metrics['batches'] if metrics['batches'] else 0.0
+        return metrics
+
+    @staticmethod
+    def render():
+        """Counters in Prometheus text format (for /metrics)"""
+        metrics = DBWriter.metrics()
+        return Metrics.render_counters(
+            'app_db_writer_total', 'Queued database writes by kind', 'kind',
+            {key: metrics[key] for key in ('ops', 'rows', 'batches', 'failed_ops', 'dropped_ops')},
+            [('app_db_writer_queue_depth', 'Writes waiting to be committed', metrics['queue_depth'])]
+        )
+
+    # ------------------------------------------------------------------
+    # Writer loop (shared by the in-process thread and the writer process)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _next_batch():
+        """Block for one op, then gather more for up to the batch window"""
+        batch = [DBWriter._queue.get()]
+        deadline = time.monotonic() + Config.DB_WRITER_BATCH_WINDOW_MS / 1000.0
+        while len(batch) < Config.DB_WRITER_BATCH_MAX_OPS:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(DBWriter._queue.get(timeout=max(remaining, 0)) if remaining > 0
+                             else DBWriter._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    @staticmethod
+    def _commit(engine, batch):
+        tables = db.metadata.tables
+        for attempt in range(DBWriter.LOCK_RETRIES):
+            try:
+                with engine.begin() as conn:
+                    for op in batch:
+                        conn.execute(tables[op.table].insert(), op.rows)
+                return
+            except Exception as e:
+                # A worker process has the file open for a direct read or write
+                if 'lock' not in str(e).lower() or attempt == DBWriter.LOCK_RETRIES - 1:
+                    raise
+                time.sleep(0.05 * (2 ** attempt))
+
+    @staticmethod
+    def _apply(engine, batch):
+        """Commit a batch in one transaction; on failure retry ops one by one"""
+        try:
+            DBWriter._commit(engine, batch)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = e
+            else:
+                # Isolate the bad op so the rest of the group still lands
+                for op in batch:
+                    DBWriter._apply(engine, [op])
+                return
+
+        failed = [op for op in batch if op.error is not None]
+        with DBWriter._metrics_lock:
+            DBWriter._metrics['batches'] += 1
+            DBWriter._metrics['ops'] += len(batch)
+            DBWriter._metrics['rows'] += sum(len(op.rows) for op in batch if op.error is None)
+            DBWriter._metrics['failed_ops'] += len(failed)
+        for op in batch:
+            if op.error is not None:
+                print(f"DB writer failed to insert into {op.table}: {op.error}")
+            op.done.set()
+
+    @staticmethod
+    def _run(engine):
+        while True:
+            batch = DBWriter._next_batch()
+            DBWriter._apply(engine, batch)
+            for _ in batch:
+                DBWriter._queue.task_done()
+
+    @staticmethod
+    def _ensure_worker():
+        # A forked child inherits the thread object but not the thread
+        if DBWriter._worker and DBWriter._worker.is_alive() and DBWriter._worker_pid == os.getpid():
+            return
+        with DBWriter._lock:
+            if DBWriter._worker and DBWriter._worker.is_alive() and DBWriter._worker_pid == os.getpid():
+                return
+            app = current_app._get_current_object()
+            with app.app_context():
+                engine = db.engine
+            DBWriter._worker = threading.Thread(target=DBWriter._run, args=(engine,), name='db-writer', daemon=True)
+            DBWriter._worker_pid = os.getpid()
+            DBWriter._worker.start()
+
+    # ------------------------------------------------------------------
+    # Socket transport
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _send_remote(name, rows, wait, timeout):
+        sock = getattr(DBWriter._local, 'sock', None)
+        if sock is None or DBWriter._local.pid != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(timeout)
+            try:
+                sock.connect(Config.DB_WRITER_SOCKET)
+            except OSError as e:
+                sock.close()
+                print(f"DB writer unreachable at {Config.DB_WRITER_SOCKET}: {e}")
+                return False
+            DBWriter._local.sock = sock
+            DBWriter._local.pid = os.getpid()
+
+        try:
+            _send(sock, {'table': name, 'rows': rows, 'wait': wait})
+            reply = _recv(sock)
+        except OSError as e:
+            reply = None
+            print(f"DB writer connection lost: {e}")
+        if reply is None:
+            sock.close()
+            DBWriter._local.sock = None
+            return False
+        return reply.get('ok', False)
+
+    @staticmethod
+    def _serve_client(conn):
+        with conn:
+            while True:
+                message = _recv(conn)
+                if message is None:
+                    return
+                op = WriteOp(message['table'], message['rows'])
+                try:
+                    DBWriter._queue.put(op, timeout=5)
+                except queue.Full:
+                    DBWriter._count('dropped_ops')
+                    _send(conn, {'ok': False, 'error': 'queue full'})
+                    continue
+                if message.get('wait'):
+                    op.done.wait()
+                    _send(conn, {'ok': op.error is None, 'error': str(op.error) if op.error else None})
+                else:
+                    _send(conn, {'ok': True})
+
+    @staticmethod
+    def serve(socket_path=None):
+        """
+        Run the dedicated writer process (blocks)
+
+        Args:
+            socket_path: Unix socket to listen on (default DB_WRITER_SOCKET)
+        """
+        from sqlalchemy import create_engine
+
+        socket_path = socket_path or Config.DB_WRITER_SOCKET
+        if not socket_path:
+            raise ValueError('DB_WRITER_SOCKET is not configured')
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        # Unpooled, so workers can open the file between batches
+        engine = create_engine(
+            Config.SQLALCHEMY_DATABASE_URI,
+            **build_engine_options(Config.SQLALCHEMY_DATABASE_URI, pool_mode='null')
+        )
+        threading.Thread(target=DBWriter._run, args=(engine,), name='db-writer', daemon=True).start()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(socket_path)
+        os.chmod(socket_path, 0o600)
+        server.listen(128)
+        print(f"DB writer listening on {socket_path}")
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=DBWriter._serve_client, args=(conn,), daemon=True).start()
+
+
+Metrics.register(DBWriter.render)
+
+
+if __name__ == '__main__':
+    DBWriter.serve()
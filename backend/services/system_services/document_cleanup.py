@@ -0,0 +1,341 @@
+import os
+import time
+import queue
+import fcntl
+import threading
+from models import db, Document
+from configs.app_config import Config
+from services.system_services.metrics import Metrics
+
+
+def _file_id(name):
+    """File id shared by an upload's file ('<id>_<filename>') and collection ('doc_<id>')"""
+    if name.startswith('doc_'):
+        return name[len('doc_'):]
+    return name.split('_', 1)[0]
+
+
+def _collection_missing(error):
+    """Whether a Chroma error means the collection does not exist (the type depends on the chromadb version)"""
+    try:
+        from chromadb import errors
+        missing = tuple(
+            getattr(errors, name) for name in ('NotFoundError', 'InvalidCollectionException')
+            if hasattr(errors, name)
+        )
+    except ImportError:
+        missing = ()
+    if isinstance(error, missing + (ValueError,)):
+        return True
+    message = str(error).lower()
+    return 'does not exist' in message or 'not found' in message
+
+
+class DocumentCleanup:
+    """
+    Document deletion with asynchronous storage cleanup.
+    Rows are deleted in one statement; their files and vector-store
+    collections are queued and removed by a background worker. Anything
+    the worker misses (full queue, crash, Chroma error) is an orphan that
+    DocumentReconciler collects later.
+    """
+
+    _queue = queue.Queue(maxsize=Config.DOCUMENT_CLEANUP_QUEUE_MAX)
+    _lock = threading.Lock()
+    _worker = None
+    _worker_pid = None
+    _stop = threading.Event()
+    _client = None
+    _client_pid = None
+
+    _metrics_lock = threading.Lock()
+    _metrics = {'enqueued': 0, 'files_removed': 0, 'collections_removed': 0, 'failed': 0, 'dropped': 0}
+
+    @staticmethod
+    def chroma_client():
+        """Vector store client for this process (clients hold SQLite handles that must not cross a fork)"""
+        if DocumentCleanup._client is None or DocumentCleanup._client_pid != os.getpid():
+            import chromadb
+            DocumentCleanup._client = chromadb.PersistentClient(path=Config.CHROMA_DB_PATH)
+            DocumentCleanup._client_pid = os.getpid()
+        return DocumentCleanup._client
+
+    @staticmethod
+    def bulk_delete(user_id, document_ids):
+        """
+        Delete a user's documents
+
+        Args:
+            user_id: Owner of the documents
+            document_ids: Document IDs
+
+        Returns:
+            dict: 'deleted' and 'not_found' document IDs
+        """
+        requested = list(dict.fromkeys(document_ids))
+        rows = db.session.execute(
+            db.select(Document.id, Document.filepath, Document.vector_store_id)
+            .where(Document.user_id == int(user_id), Document.id.in_(requested))
+        ).all()
+
+        deleted = [row.id for row in rows]
+        if deleted:
+            # Local import: document_versions imports this module
+            from services.system_services.document_versions import document_versions
+            db.session.execute(db.delete(document_versions).where(document_versions.c.document_id.in_(deleted)))
+            db.session.execute(db.delete(Document).where(Document.id.in_(deleted)))
+            db.session.commit()
+
+        # Only after the commit: a rolled back delete must keep its storage
+        for row in rows:
+            DocumentCleanup.enqueue(row.filepath, row.vector_store_id)
+
+        found = set(deleted)
+        return {'deleted': deleted, 'not_found': [i for i in requested if i not in found]}
+
+    @staticmethod
+    def enqueue(filepath=None, collection_name=None, delay=0):
+        """
+        Queue a file and/or collection for removal
+
+        Args:
+            filepath: File to remove
+            collection_name: Vector-store collection to remove
+            delay: Seconds to wait before queueing (a pending removal is lost
+                   if the process exits first; the reconciler collects it)
+
+        Returns:
+            bool: False if the queue is full (the reconciler will collect it)
+        """
+        if delay > 0:
+            # Daemon, so a pending removal never holds up interpreter exit
+            timer = threading.Timer(delay, DocumentCleanup.enqueue, args=(filepath, collection_name))
+            timer.daemon = True
+            timer.start()
+            return True
+        DocumentCleanup._ensure_worker()
+        try:
+            DocumentCleanup._queue.put_nowait((filepath, collection_name))
+        except queue.Full:
+            DocumentCleanup._count('dropped')
+            return False
+        DocumentCleanup._count('enqueued')
+        return True
+
+    @staticmethod
+    def remove_file(filepath):
+        try:
+            os.remove(filepath)
+            DocumentCleanup._count('files_removed')
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def remove_collection(collection_name):
+        try:
+            DocumentCleanup.chroma_client().delete_collection(collection_name)
+            DocumentCleanup._count('collections_removed')
+        except Exception as e:
+            if _collection_missing(e):
+                return  # Already gone
+            raise
+
+    @staticmethod
+    def _count(name):
+        with DocumentCleanup._metrics_lock:
+            DocumentCleanup._metrics[name] += 1
+
+    @staticmethod
+    def metrics():
+        """Get cleanup counters"""
+        with DocumentCleanup._metrics_lock:
+            metrics = dict(DocumentCleanup._metrics)
+        return dict(metrics, queue_depth=DocumentCleanup._queue.qsize())
+
+    @staticmethod
+    def render():
+        """Counters in Prometheus text format (for /metrics)"""
+        metrics = DocumentCleanup.metrics()
+        return Metrics.render_counters(
+            'app_document_cleanup_total', 'Document storage cleanup by outcome', 'outcome',
+            {key: metrics[key] for key in ('enqueued', 'files_removed', 'collections_removed', 'failed', 'dropped')},
+            [('app_document_cleanup_queue_depth', 'Files and collections waiting for removal', metrics['queue_depth'])]
+        )
+
+    @staticmethod
+    def shutdown(timeout=10):
+        """Stop the worker after draining what it can within the timeout"""
+        DocumentCleanup._stop.set()
+        if DocumentCleanup._worker and DocumentCleanup._worker.is_alive():
+            DocumentCleanup._worker.join(timeout)
+
+    @staticmethod
+    def _ensure_worker():
+        if DocumentCleanup._worker and DocumentCleanup._worker.is_alive() and DocumentCleanup._worker_pid == os.getpid():
+            return
+        with DocumentCleanup._lock:
+            if DocumentCleanup._worker and DocumentCleanup._worker.is_alive() and DocumentCleanup._worker_pid == os.getpid():
+                return
+            DocumentCleanup._stop.clear()
+            DocumentCleanup._worker = threading.Thread(target=DocumentCleanup._run, name='document-cleanup', daemon=True)
+            DocumentCleanup._worker_pid = os.getpid()
+            DocumentCleanup._worker.start()
+
+    @staticmethod
+    def _run():
+        while not (DocumentCleanup._stop.is_set() and DocumentCleanup._queue.empty()):
+            try:
+                filepath, collection_name = DocumentCleanup._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                if collection_name:
+                    DocumentCleanup.remove_collection(collection_name)
+                if filepath:
+                    DocumentCleanup.remove_file(filepath)
+            except Exception as e:
+                DocumentCleanup._count('failed')
+                print(f"Document cleanup failed for {collection_name or filepath}: {e}")
+            finally:
+                DocumentCleanup._queue.task_done()
+
+
+class DocumentReconciler:
+    """
+    Garbage-collects vector-store collections and files with no Document row.
+    Uploads write the file, then the collection, then the row, so a file or
+    collection without a row is only an orphan once it is older than
+    RECONCILE_GRACE_SECONDS (a collection's age is that of its upload file;
+    without a file the upload has already failed). Each pass removes at
+    most RECONCILE_BATCH_SIZE orphans and runs in one process at a time.
+    """
+
+    _scheduler = None
+    _scheduler_pid = None
+    _stop = threading.Event()
+
+    @staticmethod
+    def find_orphans():
+        """
+        Diff Document rows against the vector store and DOCUMENTS_PATH
+
+        Returns:
+            dict: Orphaned 'collections' and 'files' (full paths)
+        """
+        known_collections = set()
+        known_files = set()
+        for collection_name, filepath in db.session.execute(
+            db.select(Document.vector_store_id, Document.filepath)
+        ).all():
+            if collection_name:
+                known_collections.add(collection_name)
+            if filepath:
+                known_files.add(os.path.basename(filepath))
+        db.session.rollback()
+
+        cutoff = time.time() - Config.RECONCILE_GRACE_SECONDS
+        upload_times = {}
+        orphan_files = []
+        if os.path.isdir(Config.DOCUMENTS_PATH):
+            for entry in os.scandir(Config.DOCUMENTS_PATH):
+                if not entry.is_file() or entry.name.startswith('.'):
+                    continue
+                mtime = entry.stat().st_mtime
+                upload_times[_file_id(entry.name)] = mtime
+                if entry.name not in known_files and mtime < cutoff:
+                    orphan_files.append(entry.path)
+
+        orphan_collections = []
+        for collection in DocumentCleanup.chroma_client().list_collections():
+            # chromadb >= 0.6 lists names, older versions Collection objects
+            name = collection if isinstance(collection, str) else collection.name
+            if not name.startswith('doc_') or name in known_collections:
+                continue
+            uploaded_at = upload_times.get(_file_id(name))
+            if uploaded_at is None or uploaded_at < cutoff:
+                orphan_collections.append(name)
+
+        return {'collections': orphan_collections, 'files': orphan_files}
+
+    @staticmethod
+    def run_once(dry_run=False, batch_size=None):
+        """
+        Remove one batch of orphans, unless another process is already reconciling
+
+        Args:
+            dry_run: Only report what would be removed
+            batch_size: Maximum orphans removed in this pass
+
+        Returns:
+            dict: Orphans found and removed (None if another process holds the lock)
+        """
+        batch_size = batch_size or Config.RECONCILE_BATCH_SIZE
+        os.makedirs(Config.DOCUMENTS_PATH, exist_ok=True)
+        with open(os.path.join(Config.DOCUMENTS_PATH, '.reconcile.lock'), 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            try:
+                orphans = DocumentReconciler.find_orphans()
+                result = {
+                    'orphan_collections': len(orphans['collections']),
+                    'orphan_files': len(orphans['files']),
+                    'removed_collections': [],
+                    'removed_files': [],
+                    'dry_run': dry_run
+                }
+                if dry_run:
+                    result['removed_collections'] = orphans['collections'][:batch_size]
+                    result['removed_files'] = orphans['files'][:max(0, batch_size - len(result['removed_collections']))]
+                    return result
+
+                budget = batch_size
+                for name in orphans['collections'][:budget]:
+                    try:
+                        DocumentCleanup.remove_collection(name)
+                        result['removed_collections'].append(name)
+                    except Exception as e:
+                        print(f"Could not remove orphaned collection {name}: {e}")
+                budget -= len(result['removed_collections'])
+                for path in orphans['files'][:max(0, budget)]:
+                    try:
+                        DocumentCleanup.remove_file(path)
+                        result['removed_files'].append(os.path.basename(path))
+                    except OSError as e:
+                        print(f"Could not remove orphaned file {path}: {e}")
+                return result
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def start_scheduler(app):
+        """Reconcile every RECONCILE_INTERVAL_SECONDS in a background thread"""
+        if (DocumentReconciler._scheduler and DocumentReconciler._scheduler.is_alive()
+                and DocumentReconciler._scheduler_pid == os.getpid()):
+            return
+
+        def loop():
+            while not DocumentReconciler._stop.wait(Config.RECONCILE_INTERVAL_SECONDS):
+                with app.app_context():
+                    try:
+                        result = DocumentReconciler.run_once()
+                        if result and (result['removed_collections'] or result['removed_files']):
+                            print(f"Reconciler removed {len(result['removed_collections'])} collections "
+                                  f"and {len(result['removed_files'])} files")
+                    except Exception as e:
+                        print(f"Document reconcile failed: {e}")
+                    finally:
+                        db.session.remove()
+
+        DocumentReconciler._stop.clear()
+        DocumentReconciler._scheduler = threading.Thread(target=loop, name='document-reconciler', daemon=True)
+        DocumentReconciler._scheduler_pid = os.getpid()
+        DocumentReconciler._scheduler.start()
+
+    @staticmethod
+    def stop_scheduler():
+        DocumentReconciler._stop.set()
+
+
+Metrics.register(DocumentCleanup.render)
@@ -0,0 +1,246 @@
+import os
+import uuid
+import hashlib
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+from models import db, Document
+from configs.app_config import Config
+from services.system_services.document_cleanup import DocumentCleanup
+from services.system_services.metrics import Metrics
+
+
+document_versions = db.Table(
+    'document_versions',
+    db.Column('document_id', db.Integer, primary_key=True),
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('filename', db.String(255), nullable=False),
+    db.Column('content_sha256', db.String(64), nullable=True),
+    db.Column('file_size', db.Integer, nullable=True),
+    db.Column('chunk_count', db.Integer, nullable=True),
+    db.Column('chunks_embedded', db.Integer, nullable=True),
+    db.Column('chunks_removed', db.Integer, nullable=True),
+    db.Column('created_at', db.DateTime, nullable=False, default=datetime.utcnow),
+    schema='agentic_schema'
+)
+
+# Must match RAGService._create_vector_store so first versions diff cleanly against uploads
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+ADD_BATCH_SIZE = 1000
+
+
+def _sha256(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _chunk_ids(chunks):
+    """Content-addressed chunk IDs; repeated chunks get an occurrence suffix"""
+    seen = {}
+    ids = []
+    for chunk in chunks:
+        digest = _sha256(chunk)
+        seen[digest] = seen.get(digest, 0) + 1
+        ids.append(f'{digest}-{seen[digest]}')
+    return ids
+
+
+class DocumentVersions:
+    """
+    Versioned document replacement with chunk-level delta embedding.
+    The new text is chunked exactly like an upload and each chunk is keyed
+    by its content hash. Chunks already in the current collection keep
+    their stored embeddings; only new chunks go to the embedding model.
+    The new version is assembled in its own collection and the document
+    row is switched to it in one commit (guarded by the previous
+    collection name), so readers see either the old or the new version,
+    never a mix. The superseded file and collection are removed in the
+    background after DOCUMENT_SUPERSEDED_GRACE_SECONDS: a reader that
+    loaded the old row just before the switch opens the collection with
+    get_or_create_collection, so removing it sooner would recreate an
+    empty doc_<old> under that reader (left for the reconciler).
+    """
+
+    @staticmethod
+    def history(document_id, user_id):
+        """
+        Get a document's versions (newest first)
+
+        Raises:
+            ValueError: Document not found for this user
+        """
+        if not db.session.execute(
+            db.select(Document.id).where(Document.id == document_id, Document.user_id == int(user_id))
+        ).first():
+            raise ValueError('Document not found')
+        rows = db.session.execute(
+            db.select(document_versions)
+            .where(document_versions.c.document_id == document_id)
+            .order_by(document_versions.c.version.desc())
+        ).mappings().all()
+        return [dict(row) for row in rows]
+
+    @staticmethod
+    def _split(text):
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP, length_function=len)
+        return splitter.split_text(text)
+
+    @staticmethod
+    def _build_collection(rag_service, old_name, new_name, chunks, version):
+        """
+        Assemble the new version's collection
+
+        Returns:
+            dict: Chunk counts (total, reused, embedded, removed)
+        """
+        client = DocumentCleanup.chroma_client()
+        ids = _chunk_ids(chunks)
+
+        # Existing chunks by content hash (works for uploads made before versioning,
+        # whose chunk IDs are random)
+        stored = {}
+        old_metadata = None
+        try:
+            old = client.get_collection(old_name)
+            old_metadata = old.metadata
+            existing = old.get(include=['documents', 'embeddings', 'metadatas'])
+            counts = {}
+            for text, embedding, metadata in zip(existing['documents'], existing['embeddings'], existing['metadatas']):
+                digest = _sha256(text)
+                counts[digest] = counts.get(digest, 0) + 1
+                embedding = embedding.tolist() if hasattr(embedding, 'tolist') else embedding
+                stored[f'{digest}-{counts[digest]}'] = (embedding, metadata)
+        except Exception as e:
+            print(f"Previous collection {old_name} unavailable, embedding every chunk: {e}")
+
+        collection = client.create_collection(new_name, metadata=old_metadata)
+        reused = [(chunk_id, text) for chunk_id, text in zip(ids, chunks) if chunk_id in stored]
+        fresh = [(chunk_id, text) for chunk_id, text in zip(ids, chunks) if chunk_id not in stored]
+
+        def metadata_for(chunk_id, previous=None):
+            return previous or {'chunk_hash': chunk_id.rsplit('-', 1)[0], 'version': version}
+
+        for start in range(0, len(reused), ADD_BATCH_SIZE):
+            batch = reused[start:start + ADD_BATCH_SIZE]
+            collection.add(
+                ids=[chunk_id for chunk_id, _ in batch],
+                documents=[text for _, text in batch],
+                embeddings=[stored[chunk_id][0] for chunk_id, _ in batch],
+                metadatas=[metadata_for(chunk_id, stored[chunk_id][1]) for chunk_id, _ in batch]
+            )
+
+        for start in range(0, len(fresh), ADD_BATCH_SIZE):
+            batch = fresh[start:start + ADD_BATCH_SIZE]
+            with Metrics.span('upload.embed_delta'):
+                embeddings = rag_service.embeddings.embed_documents([text for _, text in batch])
+            collection.add(
+                ids=[chunk_id for chunk_id, _ in batch],
+                documents=[text for _, text in batch],
+                embeddings=embeddings,
+                metadatas=[metadata_for(chunk_id) for chunk_id, _ in batch]
+            )
+
+        new_ids = set(ids)
+        return {
+            'total': len(ids),
+            'reused': len(reused),
+            'embedded': len(fresh),
+            'removed': len([chunk_id for chunk_id in stored if chunk_id not in new_ids])
+        }
+
+    @staticmethod
+    def update(rag_service, document_id, user_id, file):
+        """
+        Replace a document with a new version
+
+        Args:
+            rag_service: RAGService instance (text extraction and embeddings)
+            document_id: Document ID
+            user_id: Owner of the document
+            file: Uploaded file
+
+        Returns:
+            dict: Document data with 'version' and 'chunks' counts
+
+        Raises:
+            ValueError: Document not found, invalid file or no text
+            RuntimeError: The document was replaced concurrently
+        """
+        document = Document.query.filter_by(id=document_id, user_id=int(user_id)).first()
+        if not document:
+            raise ValueError('Document not found')
+
+        filename = secure_filename(file.filename or '')
+        ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+        if not filename or ext not in Config.ALLOWED_EXTENSIONS:
+            raise ValueError(f'File type not allowed. Allowed types: {Config.ALLOWED_EXTENSIONS}')
+
+        file_id = str(uuid.uuid4())
+        filepath = os.path.join(Config.DOCUMENTS_PATH, f"{file_id}_{filename}")
+        file.save(filepath)
+        try:
+            # Timed as upload.extract_text (instrumented where RAGService is imported)
+            text = rag_service._extract_text(filepath, ext)
+        except Exception as e:
+            os.remove(filepath)
+            raise ValueError(f'Error extracting text: {str(e)}')
+
+        content_sha256 = _sha256(text)
+        latest = db.session.execute(
+            db.select(document_versions)
+            .where(document_versions.c.document_id == document_id)
+            .order_by(document_versions.c.version.desc())
+            .limit(1)
+        ).mappings().first()
+        if latest and latest['content_sha256'] == content_sha256:
+            os.remove(filepath)
+            return dict(document.to_dict(), version=latest['version'],
+                        chunks={'total': latest['chunk_count'], 'reused': latest['chunk_count'], 'embedded': 0, 'removed': 0})
+
+        version = (latest['version'] if latest else 1) + 1
+        old_filepath = document.filepath
+        old_collection = document.vector_store_id
+        new_collection = f"doc_{file_id}"
+
+        try:
+            chunks = DocumentVersions._split(text)
+            if not chunks:
+                raise ValueError('No text content found in document')
+            counts = DocumentVersions._build_collection(rag_service, old_collection, new_collection, chunks, version)
+
+            try:
+                if latest is None:
+                    # Record the original upload as version 1
+                    db.session.execute(document_versions.insert().values(
+                        document_id=document_id, version=1, filename=document.filename,
+                        file_size=document.file_size, created_at=document.uploaded_at or datetime.utcnow()
+                    ))
+                db.session.execute(document_versions.insert().values(
+                    document_id=document_id, version=version, filename=filename, content_sha256=content_sha256,
+                    file_size=os.path.getsize(filepath), chunk_count=counts['total'],
+                    chunks_embedded=counts['embedded'], chunks_removed=counts['removed'],
+                    created_at=datetime.utcnow()
+                ))
+            except IntegrityError as e:
+                # A concurrent update took the same version number
+                raise RuntimeError('Document was updated concurrently, please retry') from e
+            # Switch readers to the new collection only if nobody replaced it meanwhile
+            switched = db.session.execute(
+                db.update(Document)
+                .where(Document.id == document_id, Document.vector_store_id == old_collection)
+                .values(filename=filename, filepath=filepath, vector_store_id=new_collection,
+                        file_size=os.path.getsize(filepath))
+            ).rowcount
+            if switched != 1:
+                raise RuntimeError('Document was updated concurrently, please retry')
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            DocumentCleanup.enqueue(filepath, new_collection)
+            raise
+
+        DocumentCleanup.enqueue(old_filepath, old_collection, delay=Config.DOCUMENT_SUPERSEDED_GRACE_SECONDS)
+        db.session.refresh(document)
+        return dict(document.to_dict(), version=version, chunks=counts)
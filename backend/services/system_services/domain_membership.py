@@ -0,0 +1,151 @@
+from models import db, UserDetailsModel, UserRoleMappingModel, RoleModel
+from .user_directory import UserDirectory
+
+
+class DomainMembership:
+    """
+    Set-based domain roster and membership changes.
+    Rosters are one join plus one role lookup for the whole domain; bulk
+    assign/remove validate, update and insert every mapping in a single
+    transaction instead of one commit per user.
+    """
+
+    @staticmethod
+    def roster(domain_id):
+        """
+        Users with an active role in a domain
+
+        Args:
+            domain_id: Domain ID
+
+        Returns:
+            list: User dicts (UserDetailsModel.to_dict() keys) plus 'domain_role'
+        """
+        rows = (
+            db.session.query(
+                UserDetailsModel.user_id,
+                UserDetailsModel.name,
+                UserDetailsModel.email,
+                UserDetailsModel.active_flag,
+                UserDetailsModel.file_upload_enabled,
+                UserDetailsModel.two_factor_auth_enabled,
+                UserDetailsModel.created_at,
+                RoleModel.role_name
+            )
+            .join(UserRoleMappingModel, UserRoleMappingModel.user_id == UserDetailsModel.user_id)
+            .join(RoleModel, RoleModel.role_id == UserRoleMappingModel.role_id)
+            .filter(UserRoleMappingModel.domain_id == domain_id, UserRoleMappingModel.active_flag == True)
+            .order_by(UserDetailsModel.user_id, UserRoleMappingModel.user_role_id)
+            .all()
+        )
+
+        # First mapping per user gives the domain role, as before
+        first = {}
+        for row in rows:
+            first.setdefault(row.user_id, row)
+
+        roles, _ = UserDirectory.roles_and_domains(list(first))
+        users = []
+        for row in first.values():
+            user = UserDirectory.to_summary(row, roles)
+            user['domain_role'] = row.role_name
+            users.append(user)
+        return users
+
+    @staticmethod
+    def _resolve(user_ids, role_name=None):
+        """Validate users (and role) with one query each"""
+        user_ids = sorted({int(user_id) for user_id in user_ids})
+        if not user_ids:
+            raise ValueError('user_ids is required')
+
+        found = {
+            user_id for (user_id,) in
+            db.session.query(UserDetailsModel.user_id).filter(UserDetailsModel.user_id.in_(user_ids))
+        }
+        missing = [user_id for user_id in user_ids if user_id not in found]
+        if missing:
+            raise ValueError(f'Users not found: {missing}')
+
+        role = None
+        if role_name is not None:
+            role = RoleModel.query.filter_by(role_name=role_name).first()
+            if not role:
+                raise ValueError(f'Role {role_name} not found')
+        return user_ids, role
+
+    @staticmethod
+    def bulk_assign(domain_id, user_ids, role_name='user'):
+        """
+        Assign many users to a domain with a role in one transaction
+
+        Args:
+            domain_id: Domain ID
+            user_ids: User IDs
+            role_name: Role to grant in the domain
+
+        Returns:
+            dict: Counts of created and reactivated mappings and the affected user IDs
+        """
+        user_ids, role = DomainMembership._resolve(user_ids, role_name)
+
+        existing = dict(
+            db.session.query(UserRoleMappingModel.user_id, UserRoleMappingModel.user_role_id)
+            .filter(
+                UserRoleMappingModel.user_id.in_(user_ids),
+                UserRoleMappingModel.role_id == role.role_id,
+                UserRoleMappingModel.domain_id == domain_id
+            )
+            .all()
+        )
+
+        try:
+            if existing:
+                UserRoleMappingModel.query.filter(
+                    UserRoleMappingModel.user_role_id.in_(list(existing.values()))
+                ).update({'active_flag': True}, synchronize_session=False)
+
+            new_user_ids = [user_id for user_id in user_ids if user_id not in existing]
+            if new_user_ids:
+                db.session.bulk_insert_mappings(UserRoleMappingModel, [
+                    {'user_id': user_id, 'role_id': role.role_id, 'domain_id': domain_id, 'active_flag': True}
+                    for user_id in new_user_ids
+                ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return {
+            'message': f'{len(user_ids)} users assigned to domain with role {role_name}',
+            'created': len(new_user_ids),
+            'reactivated': len(existing),
+            'user_ids': user_ids
+        }
+
+    @staticmethod
+    def bulk_remove(domain_id, user_ids):
+        """
+        Deactivate every role mapping of many users in a domain in one statement
+
+        Returns:
+            dict: Number of deactivated mappings and the affected user IDs
+        """
+        user_ids, _ = DomainMembership._resolve(user_ids)
+
+        try:
+            removed = UserRoleMappingModel.query.filter(
+                UserRoleMappingModel.user_id.in_(user_ids),
+                UserRoleMappingModel.domain_id == domain_id,
+                UserRoleMappingModel.active_flag == True
+            ).update({'active_flag': False}, synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return {
+            'message': f'{removed} domain role mappings removed',
+            'removed': removed,
+            'user_ids': user_ids
+        }
@@ -0,0 +1,85 @@
+import time
+import importlib
+import threading
+
+
+class LazyAttribute:
+    """
+    Stand-in for a class or function in a heavy module.
+    The module is imported on first call or attribute access, so importing
+    a controller does not pull in chromadb, langchain, pypdf, etc.
+    """
+
+    def __init__(self, module, name, on_load=None):
+        self.__dict__['_module'] = module
+        self.__dict__['_name'] = name
+        self.__dict__['_on_load'] = on_load
+        self.__dict__['_target'] = None
+
+    def _resolve(self):
+        target = self.__dict__['_target']
+        if target is None:
+            with LazyImports._lock:
+                target = self.__dict__['_target']
+                if target is None:
+                    target = getattr(importlib.import_module(self._module), self._name)
+                    if self._on_load is not None:
+                        self._on_load(target)
+                    self.__dict__['_target'] = target
+        return target
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, item):
+        return getattr(self._resolve(), item)
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_target'] is not None else 'not loaded'
+        return f'<lazy {self._module}.{self._name} ({state})>'
+
+
+class LazyImports:
+    """Registry of lazily imported heavy dependencies"""
+
+    _lock = threading.RLock()
+    _attributes = []
+
+    @staticmethod
+    def attribute(module, name, on_load=None):
+        """
+        Get a lazy stand-in for module.name
+
+        Args:
+            module: Dotted module path
+            name: Class or function name in that module
+            on_load: Called once with the class or function right after import
+
+        Returns:
+            LazyAttribute: Callable proxy that imports on first use
+        """
+        attribute = LazyAttribute(module, name, on_load)
+        LazyImports._attributes.append(attribute)
+        return attribute
+
+    @staticmethod
+    def preload():
+        """
+        Import every registered module now.
+        For pre-fork servers: call in the master before forking so workers
+        share the loaded modules instead of each importing on first request.
+
+        Returns:
+            dict: Import seconds per module (failed imports are reported, not raised)
+        """
+        timings = {}
+        for attribute in LazyImports._attributes:
+            module = attribute._module
+            start = time.perf_counter()
+            try:
+                attribute._resolve()
+            except Exception as e:
+                print(f"Preload of {module} failed: {e}")
+                continue
+            timings[module] = timings.get(module, 0.0) + time.perf_counter() - start
+        return timings
@@ -0,0 +1,211 @@
+import time
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+from flask import g, request, Response
+from configs.app_config import Config
+
+_NOOP = nullcontext()
+
+# Spans of the current request; copied into pipeline threads with the context
+_request_spans = contextvars.ContextVar('request_spans', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values (Prometheus semantics)"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, seconds):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[0][i] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            label_text = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels))
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return '\n'.join(lines)
+
+
+class Metrics:
+    """
+    Span timers, Server-Timing headers and Prometheus histograms.
+    With METRICS_ENABLED off, span() hands out a shared no-op context,
+    timed() returns the function unchanged and no request hooks or
+    /metrics route are registered, so instrumented code pays nothing.
+    Histograms are per process: behind a multi-worker server each scrape
+    of /metrics reports the worker that answered it.
+    """
+
+    enabled = Config.METRICS_ENABLED
+    spans = Histogram('app_span_seconds', 'Duration of instrumented spans', ('span',), Config.METRICS_BUCKETS)
+    requests = Histogram(
+        'app_http_request_seconds', 'HTTP request duration', ('method', 'endpoint', 'status'), Config.METRICS_BUCKETS
+    )
+    # Extra exposition text (counters kept by other modules)
+    collectors = []
+
+    @staticmethod
+    def register(render):
+        """Add a callable returning Prometheus text to /metrics"""
+        Metrics.collectors.append(render)
+
+    @staticmethod
+    def render_counters(name, help_text, label, counts, gauges=()):
+        """
+        Prometheus text for a counter family plus gauges
+
+        Args:
+            name: Counter name (e.g. 'app_mail_queue_total')
+            help_text: Counter description
+            label: Label name distinguishing the counts
+            counts: dict of label value -> count
+            gauges: (name, help_text, value) tuples
+
+        Returns:
+            str: Exposition text
+        """
+        lines = [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        lines += [f'{name}{{{label}="{_escape(key)}"}} {value}' for key, value in counts.items()]
+        for gauge_name, gauge_help, value in gauges:
+            lines += [f'# HELP {gauge_name} {gauge_help}', f'# TYPE {gauge_name} gauge', f'{gauge_name} {value}']
+        return '\n'.join(lines)
+
+    @staticmethod
+    def observe(name, seconds, server_timing=True):
+        """Record a finished span (and add it to the request's Server-Timing header)"""
+        if not Metrics.enabled:
+            return
+        Metrics.spans.observe((name,), seconds)
+        collected = _request_spans.get() if server_timing else None
+        if collected is not None:
+            collected.append((name, seconds))
+
+    @staticmethod
+    @contextmanager
+    def _span(name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            Metrics.observe(name, time.perf_counter() - start)
+
+    @staticmethod
+    def span(name):
+        """
+        Time a block
+
+        Args:
+            name: Span name (e.g. 'vector.similarity_search')
+
+        Returns:
+            Context manager
+        """
+        if not Metrics.enabled:
+            return _NOOP
+        return Metrics._span(name)
+
+    @staticmethod
+    def timed(name):
+        """Decorator form of span(); a no-op when metrics are disabled"""
+        def decorator(func):
+            if not Metrics.enabled:
+                return func
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with Metrics._span(name):
+                    return func(*args, **kwargs)
+            wrapper.__span__ = name
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def instrument(owner, attribute, name):
+        """
+        Wrap a method of a class defined elsewhere in a span (idempotent)
+
+        Args:
+            owner: Class holding the method
+            attribute: Method name
+            name: Span name
+        """
+        if not Metrics.enabled:
+            return
+        original = inspect.getattr_static(owner, attribute)
+        func = original.__func__ if isinstance(original, staticmethod) else original
+        if getattr(func, '__span__', None):
+            return
+        wrapped = Metrics.timed(name)(func)
+        setattr(owner, attribute, staticmethod(wrapped) if isinstance(original, staticmethod) else wrapped)
+
+    @staticmethod
+    def _before_request():
+        g.request_started = time.perf_counter()
+        g.request_spans = []
+        _request_spans.set(g.request_spans)
+
+    @staticmethod
+    def _after_request(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        Metrics.requests.observe((request.method, request.endpoint or 'unmatched', response.status_code), elapsed)
+
+        if Config.SERVER_TIMING_ENABLED:
+            totals = {}
+            for name, seconds in g.get('request_spans', []):
+                totals[name] = totals.get(name, 0.0) + seconds
+            entries = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in totals.items()]
+            entries += [
+                f'stage.{name};dur={timing["ms"]};desc="{timing["status"]}"'
+                for name, timing in g.get('stage_timings', {}).items()
+            ]
+            entries.append(f'total;dur={elapsed * 1000:.1f}')
+            response.headers['Server-Timing'] = ', '.join(entries)
+        return response
+
+    @staticmethod
+    def _metrics_endpoint():
+        if Config.METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {Config.METRICS_TOKEN}':
+            return {'message': 'Unauthorized'}, 401
+        sections = [Metrics.spans.render(), Metrics.requests.render()]
+        sections += [render() for render in Metrics.collectors]
+        body = '\n'.join(sections) + '\n'
+        return Response(body, mimetype='text/plain; version=0.0.4')
+
+    @staticmethod
+    def init_app(app):
+        """Register the request hooks and the /metrics endpoint (only when enabled)"""
+        if not Metrics.enabled:
+            return
+        app.before_request(Metrics._before_request)
+        app.after_request(Metrics._after_request)
+        app.add_url_rule('/metrics', 'metrics', Metrics._metrics_endpoint)
@@ -0,0 +1,57 @@
+import time
+from models import db
+from configs.app_config import Config
+
+
+class Readiness:
+    """
+    Readiness probe: can this worker serve traffic?
+    Checks the database and the vector store (unlike /health, which only
+    says the process is up). Results are cached for
+    READINESS_CACHE_SECONDS so frequent probes stay cheap, and a draining
+    worker reports not ready so load balancers stop routing to it.
+    """
+
+    draining = False
+    _cached = None
+    _checked_at = 0.0
+
+    @staticmethod
+    def _timed(check):
+        start = time.perf_counter()
+        try:
+            check()
+            return {'ok': True, 'ms': round((time.perf_counter() - start) * 1000, 1)}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+    @staticmethod
+    def _check_database():
+        db.session.execute(db.text('SELECT 1'))
+        db.session.rollback()
+
+    @staticmethod
+    def _check_vector_store():
+        import chromadb
+        chromadb.PersistentClient(path=Config.CHROMA_DB_PATH).heartbeat()
+
+    @staticmethod
+    def check():
+        """
+        Run (or reuse) the readiness checks
+
+        Returns:
+            tuple: (ready flag, per-check details)
+        """
+        if Readiness.draining:
+            return False, {'draining': True}
+
+        now = time.monotonic()
+        if Readiness._cached is None or now - Readiness._checked_at > Config.READINESS_CACHE_SECONDS:
+            checks = {
+                'database': Readiness._timed(Readiness._check_database),
+                'vector_store': Readiness._timed(Readiness._check_vector_store)
+            }
+            Readiness._cached = (all(c['ok'] for c in checks.values()), checks)
+            Readiness._checked_at = now
+        return Readiness._cached
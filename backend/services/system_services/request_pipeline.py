@@ -0,0 +1,247 @@
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app, g, has_app_context
+from configs.app_config import Config
+from services.system_services.metrics import Metrics
+
+
+class StageRejected(Exception):
+    """A gate stage (e.g. input guardrails) refused the request"""
+
+    def __init__(self, stage, result):
+        super().__init__(f'Stage {stage} rejected the request')
+        self.stage = stage
+        self.result = result
+
+
+class StageTimeout(TimeoutError):
+    """A required stage did not finish before its deadline"""
+
+    def __init__(self, stage, timeout):
+        super().__init__(f'Stage {stage} timed out after {timeout}s')
+        self.stage = stage
+
+
+class Stage:
+    """One step of a request pipeline"""
+
+    def __init__(self, name, func, after=(), timeout=None, required=True, default=None, accept=None):
+        self.name = name
+        self.func = func
+        self.after = tuple(after)
+        self.timeout = timeout
+        self.required = required
+        self.default = default
+        self.accept = accept
+
+
+class RequestPipeline:
+    """
+    Small DAG executor for one request.
+    Each stage starts on a shared thread pool as soon as the stages it runs
+    after have finished, so independent I/O (guardrails, history, retrieval,
+    web search) overlaps. Stages have their own deadline; optional stages
+    fall back to a default on error or timeout. A gate stage whose `accept`
+    check fails stops the pipeline: stages after it are never started and
+    results of stages still running are discarded. Per-stage timings are
+    kept on the pipeline and on flask.g (`stage_timings`).
+    """
+
+    _executor = None
+    _fanout_executor = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _pools():
+        if RequestPipeline._executor is None:
+            with RequestPipeline._lock:
+                if RequestPipeline._executor is None:
+                    # Stages and their fan-out get separate pools, so a stage
+                    # waiting on fan-out work can never starve the pool it runs on
+                    RequestPipeline._fanout_executor = ThreadPoolExecutor(
+                        max_workers=Config.PIPELINE_FANOUT_WORKERS,
+                        thread_name_prefix='pipeline-fanout'
+                    )
+                    RequestPipeline._executor = ThreadPoolExecutor(
+                        max_workers=Config.PIPELINE_WORKERS,
+                        thread_name_prefix='pipeline'
+                    )
+        return RequestPipeline._executor, RequestPipeline._fanout_executor
+
+    @staticmethod
+    def reset():
+        """Drop the pools (worker threads do not survive a fork)"""
+        with RequestPipeline._lock:
+            for executor in (RequestPipeline._executor, RequestPipeline._fanout_executor):
+                if executor is not None:
+                    executor.shutdown(wait=False)
+            RequestPipeline._executor = None
+            RequestPipeline._fanout_executor = None
+
+    @staticmethod
+    def _in_context(app, func, *args, **kwargs):
+        with app.app_context():
+            return func(*args, **kwargs)
+
+    @staticmethod
+    def fan_out(func, items, timeout=None):
+        """
+        Run func over items concurrently (e.g. one vector search per document)
+
+        Args:
+            func: Callable taking one item
+            items: Items to process
+            timeout: Seconds to wait for all items
+
+        Returns:
+            list: Results of the items that succeeded in time, in item order
+        """
+        app = current_app._get_current_object()
+        _, pool = RequestPipeline._pools()
+        futures = [
+            pool.submit(contextvars.copy_context().run, RequestPipeline._in_context, app, func, item)
+            for item in items
+        ]
+        done, not_done = wait(futures, timeout=timeout)
+        for future in not_done:
+            future.cancel()
+
+        results = []
+        for item, future in zip(items, futures):
+            if future not in done:
+                print(f"Fan-out item {item} timed out")
+                continue
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Fan-out item {item} failed: {e}")
+        return results
+
+    def __init__(self):
+        self.stages = {}
+        self.results = {}
+        self.timings = {}
+
+    def add(self, name, func, after=(), timeout=None, required=True, default=None, accept=None):
+        """
+        Add a stage
+
+        Args:
+            name: Stage name (its result is passed to later stages under this name)
+            func: Callable receiving the results of `after` as keyword arguments
+            after: Names of stages that must finish first (must already be added)
+            timeout: Deadline in seconds from the stage's start
+            required: Fail the pipeline if the stage fails or times out
+            default: Result of an optional stage that failed or timed out
+            accept: Gate check on the result; False rejects the request
+
+        Returns:
+            RequestPipeline: self, for chaining
+        """
+        unknown = [dep for dep in after if dep not in self.stages]
+        if name in self.stages or unknown:
+            raise ValueError(f'Invalid stage {name}: duplicate name or unknown dependencies {unknown}')
+        self.stages[name] = Stage(name, func, after, timeout, required, default, accept)
+        return self
+
+    def _record(self, stage, started, status):
+        elapsed = time.perf_counter() - started
+        self.timings[stage.name] = {'ms': round(elapsed * 1000, 1), 'status': status}
+        # Stages reach Server-Timing through g.stage_timings, with their status
+        Metrics.observe(f'stage.{stage.name}', elapsed, server_timing=False)
+
+    def run(self):
+        """
+        Run all stages
+
+        Returns:
+            dict: Result per stage name
+
+        Raises:
+            StageRejected: A gate stage rejected the request
+            StageTimeout: A required stage missed its deadline
+            Exception: The first error raised by a required stage
+        """
+        app = current_app._get_current_object()
+        pool, _ = RequestPipeline._pools()
+        waiting = dict(self.stages)
+        running = {}
+        rejected = None
+        failure = None
+
+        while True:
+            if rejected is None and failure is None:
+                for name, stage in list(waiting.items()):
+                    if all(dep in self.results for dep in stage.after):
+                        del waiting[name]
+                        inputs = {dep: self.results[dep] for dep in stage.after}
+                        started = time.perf_counter()
+                        deadline = started + stage.timeout if stage.timeout else None
+                        future = pool.submit(
+                            contextvars.copy_context().run, RequestPipeline._in_context, app, stage.func, **inputs
+                        )
+                        running[future] = (stage, started, deadline)
+
+            if not running:
+                break
+            # After a failure only an unfinished gate still matters: a rejection
+            # takes precedence over the error of a stage that ran beside it
+            if rejected is not None or (
+                failure is not None and not any(s.accept for s, _, _ in running.values())
+            ):
+                break
+
+            deadlines = [d for _, _, d in running.values() if d is not None]
+            timeout = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                stage, started, _ = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self._record(stage, started, 'error')
+                    if stage.required:
+                        failure = failure or e
+                    else:
+                        print(f"Optional stage {stage.name} failed: {e}")
+                        self.results[stage.name] = stage.default
+                    continue
+
+                if stage.accept is not None and not stage.accept(result):
+                    self._record(stage, started, 'rejected')
+                    rejected = StageRejected(stage.name, result)
+                    continue
+                self._record(stage, started, 'ok')
+                self.results[stage.name] = result
+
+            now = time.perf_counter()
+            for future, (stage, started, deadline) in list(running.items()):
+                if deadline is None or now < deadline:
+                    continue
+                # A running thread cannot be interrupted; its result is discarded
+                future.cancel()
+                del running[future]
+                self._record(stage, started, 'timeout')
+                if stage.required:
+                    failure = failure or StageTimeout(stage.name, stage.timeout)
+                else:
+                    print(f"Optional stage {stage.name} timed out after {stage.timeout}s")
+                    self.results[stage.name] = stage.default
+
+        for future, (stage, started, _) in running.items():
+            future.cancel()
+            self._record(stage, started, 'cancelled')
+        for name in waiting:
+            self.timings[name] = {'ms': 0.0, 'status': 'skipped'}
+
+        if has_app_context():
+            g.stage_timings = {**g.get('stage_timings', {}), **self.timings}
+
+        if rejected is not None:
+            raise rejected
+        if failure is not None:
+            raise failure
+        return self.results
@@ -0,0 +1,150 @@
+import hashlib
+import threading
+from configs.app_config import Config
+from services.system_services.metrics import Metrics
+
+
+class _Flight:
+    """One upstream call that concurrent identical requests wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    De-duplicates identical in-flight calls.
+    The first caller for a key (the leader) makes the call; callers with
+    the same key that arrive while it runs wait for and share its result
+    or its error. Nothing is cached: once the call finishes the key is
+    free again. A follower waits at most the given timeout and then makes
+    its own call. Coalescing is per process.
+    """
+
+    _flights = {}
+    _lock = threading.Lock()
+    _counts = {'leader': 0, 'coalesced': 0, 'wait_timeout': 0, 'error': 0}
+
+    @staticmethod
+    def _count(outcome):
+        with SingleFlight._lock:
+            SingleFlight._counts[outcome] += 1
+
+    @staticmethod
+    def do(key, func, wait_timeout=None):
+        """
+        Run func once for all concurrent callers with the same key
+
+        Args:
+            key: Identity of the call (equal keys must mean interchangeable results)
+            func: Callable making the call
+            wait_timeout: Seconds a follower waits before calling itself
+
+        Returns:
+            The result of func (possibly from another caller's call)
+        """
+        with SingleFlight._lock:
+            flight = SingleFlight._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = SingleFlight._flights[key] = _Flight()
+                SingleFlight._counts['leader'] += 1
+
+        if leader:
+            try:
+                flight.result = func()
+                return flight.result
+            except Exception as e:
+                flight.error = e
+                SingleFlight._count('error')
+                raise
+            finally:
+                with SingleFlight._lock:
+                    SingleFlight._flights.pop(key, None)
+                flight.done.set()
+
+        if not flight.done.wait(wait_timeout):
+            SingleFlight._count('wait_timeout')
+            return func()
+        SingleFlight._count('coalesced')
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    @staticmethod
+    def stats():
+        """Counts per outcome: leader calls, coalesced followers, follower wait timeouts, leader errors"""
+        with SingleFlight._lock:
+            return dict(SingleFlight._counts, in_flight=len(SingleFlight._flights))
+
+    @staticmethod
+    def render():
+        """Counters in Prometheus text format (for /metrics)"""
+        stats = SingleFlight.stats()
+        lines = [
+            '# HELP app_llm_single_flight_total LLM calls by single-flight outcome',
+            '# TYPE app_llm_single_flight_total counter',
+        ]
+        lines += [
+            f'app_llm_single_flight_total{{outcome="{outcome}"}} {stats[outcome]}'
+            for outcome in ('leader', 'coalesced', 'wait_timeout', 'error')
+        ]
+        lines += [
+            '# HELP app_llm_single_flight_in_flight Upstream LLM calls currently shared',
+            '# TYPE app_llm_single_flight_in_flight gauge',
+            f"app_llm_single_flight_in_flight {stats['in_flight']}",
+        ]
+        return '\n'.join(lines)
+
+
+class SingleFlightLLM:
+    """
+    Chat model wrapper whose invoke() goes through SingleFlight.
+    The key covers the model, its sampling parameters and endpoint, and the
+    fully rendered input (prompt string or message list, images included).
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def _key(self, input, kwargs):
+        llm = self.llm
+        identity = (
+            getattr(llm, 'model_name', None) or getattr(llm, 'model', None),
+            getattr(llm, 'temperature', None),
+            getattr(llm, 'max_tokens', None),
+            getattr(llm, 'openai_api_base', None),
+            repr(input),
+            repr(sorted(kwargs.items()))
+        )
+        return hashlib.sha256(repr(identity).encode('utf-8')).hexdigest()
+
+    def invoke(self, input, config=None, **kwargs):
+        return SingleFlight.do(
+            self._key(input, kwargs),
+            lambda: self.llm.invoke(input, config, **kwargs),
+            Config.LLM_SINGLE_FLIGHT_WAIT_SECONDS
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.llm, name)
+
+    @staticmethod
+    def wrap(service):
+        """
+        Route a service's `llm` through single-flight (idempotent)
+
+        Args:
+            service: RAGService or ChatService instance
+
+        Returns:
+            The same service
+        """
+        if Config.LLM_SINGLE_FLIGHT_ENABLED and not isinstance(service.llm, SingleFlightLLM):
+            service.llm = SingleFlightLLM(service.llm)
+        return service
+
+
+Metrics.register(SingleFlight.render)
@@ -0,0 +1,196 @@
+from models import db, UserDetailsModel, UserRoleMappingModel, RoleModel
+
+
+class UserDirectory:
+    """
+    Admin user listing.
+    Returns lightweight projections (no ORM objects) one keyset page at a
+    time: one query for the page and one for the page's role mappings,
+    whatever the page size.
+    """
+
+    @staticmethod
+    def _visible_domains(principal):
+        """
+        Domains whose users the principal may list
+
+        Returns:
+            set: Domain IDs, or None for all users
+        """
+        if principal.is_platform_admin():
+            return None
+        admin_domains = principal.admin_domains()
+        if not admin_domains and principal.is_admin():
+            return None  # Global admin
+        return admin_domains
+
+    @staticmethod
+    def _mapping_exists(*criteria):
+        return (
+            db.session.query(UserRoleMappingModel.user_role_id)
+            .join(RoleModel, RoleModel.role_id == UserRoleMappingModel.role_id)
+            .filter(
+                UserRoleMappingModel.user_id == UserDetailsModel.user_id,
+                UserRoleMappingModel.active_flag == True,
+                *criteria
+            )
+            .exists()
+        )
+
+    @staticmethod
+    def list_users(principal, cursor=None, limit=50, search=None, role=None, domain_id=None):
+        """
+        List users visible to an admin
+
+        Args:
+            principal: Current user's Principal
+            cursor: Last user_id of the previous page
+            limit: Page size
+            search: Case-insensitive substring of email or name
+            role: Only users holding this role
+            domain_id: Only users with an active role in this domain
+
+        Returns:
+            tuple: (list of user dicts, next cursor or None)
+        """
+        visible = UserDirectory._visible_domains(principal)
+        if visible is not None and not visible:
+            return [], None
+        if visible is not None and domain_id is not None and domain_id not in visible:
+            return [], None
+
+        query = db.session.query(
+            UserDetailsModel.user_id,
+            UserDetailsModel.name,
+            UserDetailsModel.email,
+            UserDetailsModel.active_flag,
+            UserDetailsModel.file_upload_enabled,
+            UserDetailsModel.two_factor_auth_enabled,
+            UserDetailsModel.created_at
+        )
+
+        if cursor is not None:
+            query = query.filter(UserDetailsModel.user_id > cursor)
+
+        if search:
+            pattern = f"%{search.strip()}%"
+            query = query.filter(db.or_(
+                UserDetailsModel.email.ilike(pattern),
+                UserDetailsModel.name.ilike(pattern)
+            ))
+
+        if visible is not None:
+            query = query.filter(UserDirectory._mapping_exists(UserRoleMappingModel.domain_id.in_(visible)))
+
+        criteria = []
+        if role:
+            criteria.append(RoleModel.role_name == role)
+        if domain_id is not None:
+            criteria.append(UserRoleMappingModel.domain_id == domain_id)
+        if criteria:
+            # Role and domain must match on the same mapping
+            query = query.filter(UserDirectory._mapping_exists(*criteria))
+
+        rows = query.order_by(UserDetailsModel.user_id).limit(limit + 1).all()
+        next_cursor = rows[limit - 1].user_id if len(rows) > limit else None
+        rows = rows[:limit]
+
+        roles, domains = UserDirectory.roles_and_domains([r.user_id for r in rows])
+        users = []
+        for r in rows:
+            user = UserDirectory.to_summary(r, roles)
+            user['domain_ids'] = sorted(domains.get(r.user_id, ()))
+            users.append(user)
+
+        return users, next_cursor
+
+    @staticmethod
+    def roles_and_domains(user_ids):
+        """
+        Active role names and domain IDs of many users in one query
+
+        Returns:
+            tuple: ({user_id: [role_name]}, {user_id: {domain_id}})
+        """
+        roles = {}
+        domains = {}
+        if not user_ids:
+            return roles, domains
+
+        mappings = (
+            db.session.query(UserRoleMappingModel.user_id, UserRoleMappingModel.domain_id, RoleModel.role_name)
+            .join(RoleModel, RoleModel.role_id == UserRoleMappingModel.role_id)
+            .filter(
+                UserRoleMappingModel.user_id.in_(user_ids),
+                UserRoleMappingModel.active_flag == True
+            )
+            .all()
+        )
+        for user_id, mapping_domain_id, role_name in mappings:
+            user_roles = roles.setdefault(user_id, [])
+            if role_name not in user_roles:
+                user_roles.append(role_name)
+            if mapping_domain_id is not None:
+                domains.setdefault(user_id, set()).add(mapping_domain_id)
+        return roles, domains
+
+    @staticmethod
+    def to_summary(row, roles):
+        """Same keys as UserDetailsModel.to_dict() from a projected row"""
+        return {
+            'user_id': row.user_id,
+            'name': row.name,
+            'email': row.email,
+            'roles': roles.get(row.user_id, []),
+            'active_flag': row.active_flag,
+            'file_upload_enabled': row.file_upload_enabled,
+            'two_factor_auth_enabled': row.two_factor_auth_enabled,
+            'created_at': row.created_at.isoformat() if row.created_at else None
+        }
+
+    @staticmethod
+    def count_admins():
+        """Number of distinct users holding an active 'admin' role"""
+        return (
+            db.session.query(db.func.count(db.distinct(UserRoleMappingModel.user_id)))
+            .join(RoleModel, RoleModel.role_id == UserRoleMappingModel.role_id)
+            .filter(RoleModel.role_name == 'admin', UserRoleMappingModel.active_flag == True)
+            .scalar()
+        )
+
+    @staticmethod
+    def delete_user(user_id):
+        """
+        Delete a user, refusing to delete the last administrator
+
+        Raises:
+            ValueError: If the user does not exist or is the last admin
+        """
+        user = UserDetailsModel.query.get(user_id)
+        if not user:
+            raise ValueError('User not found')
+
+        if user.is_admin() and UserDirectory.count_admins() <= 1:
+            raise ValueError('Cannot delete the last administrator')
+
+        db.session.delete(user)
+        db.session.commit()
+        return {'message': 'User deleted successfully'}
+
+    @staticmethod
+    def set_active(user_id, active):
+        """
+        Activate or deactivate a user, refusing to deactivate the last administrator
+
+        Raises:
+            ValueError: If the user does not exist or is the last admin
+        """
+        user = UserDetailsModel.query.get(user_id)
+        if not user:
+            raise ValueError('User not found')
+
+        if not active and user.active_flag and user.is_admin() and UserDirectory.count_admins() <= 1:
+            raise ValueError('Cannot deactivate the last administrator')
+
+        user.active_flag = bool(active)
+        db.session.commit()
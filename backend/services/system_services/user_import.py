@@ -0,0 +1,235 @@
+import io
+import csv
+import json
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import bcrypt
+from models import db, UserDetailsModel, UserRoleMappingModel, RoleModel
+from configs.app_config import Config
+from services.auth_services.principal import PLATFORM_ADMIN_ROLES
+
+
+def _hash(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)).decode('utf-8')
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+class UserImport:
+    """
+    Streaming bulk user import.
+    Rows are parsed incrementally from a CSV or NDJSON body and processed in
+    batches of USER_IMPORT_BATCH_SIZE: duplicate emails are found with one
+    query, passwords are hashed in parallel, and users plus role mappings are
+    inserted and committed once per batch. A batch the database rejects is
+    retried row by row, so only the offending rows fail. Memory is bounded
+    by the batch size, not by the file. Progress is reported as NDJSON lines, one per
+    rejected row, one per batch and a final summary.
+    """
+
+    FORMATS = ('csv', 'ndjson')
+
+    @staticmethod
+    def allowed_domains(principal):
+        """
+        Domains the importing admin may create users in
+
+        Returns:
+            set: Domain IDs, or None for any domain (including global users)
+        """
+        if principal.is_platform_admin():
+            return None
+        allowed = principal.admin_domains()
+        if not allowed:
+            raise ValueError('Not an admin of any domain')
+        return allowed
+
+    @staticmethod
+    def _rows(stream, fmt):
+        """Yield (row_number, dict) pairs without reading the whole body"""
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        if fmt == 'csv':
+            for number, row in enumerate(csv.DictReader(text), start=1):
+                yield number, row
+        else:
+            for number, line in enumerate(text, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield number, {'_error': f'Invalid JSON: {e}'}
+                    continue
+                yield number, row if isinstance(row, dict) else {'_error': 'Row must be a JSON object'}
+
+    @staticmethod
+    def _normalise(row, default_domain_id, allowed, role_ids):
+        """Validate one row; returns a clean dict or raises ValueError"""
+        if '_error' in row:
+            raise ValueError(row['_error'])
+
+        email = (row.get('email') or '').strip()
+        password = row.get('password') or ''
+        if not email or '@' not in email:
+            raise ValueError('Valid email is required')
+        if not password:
+            raise ValueError('Password is required')
+
+        roles = row.get('roles') or row.get('role') or ['user']
+        if isinstance(roles, str):
+            roles = [r.strip() for r in roles.split(';') if r.strip()]
+        unknown = [r for r in roles if r not in role_ids]
+        if unknown:
+            raise ValueError(f'Unknown roles: {unknown}')
+
+        domain_id = row.get('domain_id') or default_domain_id
+        domain_id = int(domain_id) if domain_id not in (None, '') else None
+        if allowed is not None:
+            if domain_id is None:
+                if len(allowed) != 1:
+                    raise ValueError('Domain ID required (you manage multiple domains)')
+                domain_id = next(iter(allowed))
+            if domain_id not in allowed:
+                raise ValueError('Cannot create user in this domain')
+            if not PLATFORM_ADMIN_ROLES.isdisjoint(roles):
+                raise ValueError('Only a Platform Admin can grant Platform Admin')
+
+        return {
+            'email': email,
+            'password': password,
+            'name': (row.get('full_name') or row.get('name') or email.split('@')[0]).strip(),
+            'roles': roles,
+            'domain_id': domain_id,
+            'file_upload_enabled': _flag(row.get('file_upload_enabled')),
+            'two_factor_auth_enabled': _flag(row.get('two_factor_auth_enabled'))
+        }
+
+    @staticmethod
+    def _insert(batch, hashes, role_ids):
+        """Insert one batch of users and their role mappings in one transaction"""
+        now = datetime.utcnow()
+        db.session.bulk_insert_mappings(UserDetailsModel, [{
+            'email': item['email'],
+            'name': item['name'],
+            'user_password': hashed,
+            'active_flag': True,
+            'file_upload_enabled': item['file_upload_enabled'],
+            'two_factor_auth_enabled': item['two_factor_auth_enabled'],
+            'created_at': now
+        } for (_, item), hashed in zip(batch, hashes)])
+
+        ids = dict(
+            db.session.query(UserDetailsModel.email, UserDetailsModel.user_id)
+            .filter(UserDetailsModel.email.in_([item['email'] for _, item in batch]))
+            .all()
+        )
+        db.session.bulk_insert_mappings(UserRoleMappingModel, [{
+            'user_id': ids[item['email']],
+            'role_id': role_ids[role_name],
+            'domain_id': item['domain_id'],
+            'active_flag': True
+        } for _, item in batch for role_name in item['roles']])
+        db.session.commit()
+
+    @staticmethod
+    def _flush(batch, pool, role_ids, summary):
+        """Process a parsed batch; yields report lines"""
+        # Emails already registered (earlier batches are committed, so they count too)
+        existing = {
+            email for (email,) in
+            db.session.query(UserDetailsModel.email)
+            .filter(UserDetailsModel.email.in_([item['email'] for _, item in batch]))
+        }
+        accepted = []
+        for number, item in batch:
+            if item['email'] in existing:
+                summary['failed'] += 1
+                yield {'row': number, 'email': item['email'], 'error': 'Email already registered'}
+            else:
+                accepted.append((number, item))
+        if not accepted:
+            return
+
+        hashes = list(pool.map(_hash, [item['password'] for _, item in accepted]))
+        yield from UserImport._commit(accepted, hashes, role_ids, summary)
+
+    @staticmethod
+    def _commit(rows, hashes, role_ids, summary):
+        """Insert rows in one transaction; on failure retry them one by one (yields the rejected rows)"""
+        try:
+            UserImport._insert(rows, hashes, role_ids)
+            summary['created'] += len(rows)
+            return
+        except Exception as e:
+            db.session.rollback()
+            error = e
+
+        if len(rows) > 1:
+            # Isolate the bad rows so the rest of the batch still lands
+            for row, hashed in zip(rows, hashes):
+                yield from UserImport._commit([row], [hashed], role_ids, summary)
+            return
+
+        number, item = rows[0]
+        summary['failed'] += 1
+        # The driver's message, without the statement and parameters SQLAlchemy appends
+        yield {'row': number, 'email': item['email'], 'error': str(getattr(error, 'orig', None) or error)}
+
+    @staticmethod
+    def run(stream, fmt, principal, default_domain_id=None, batch_size=None):
+        """
+        Import users from a CSV or NDJSON stream
+
+        Args:
+            stream: Binary file-like body (e.g. request.stream)
+            fmt: 'csv' (header row; roles separated by ';') or 'ndjson'
+            principal: Importing admin's Principal
+            default_domain_id: Domain for rows without a domain_id
+            batch_size: Rows per transaction
+
+        Returns:
+            generator: Error, progress and summary records
+
+        Raises:
+            ValueError: Before any row is read, for a bad format or an admin without domains
+        """
+        if fmt not in UserImport.FORMATS:
+            raise ValueError(f'Unsupported format: {fmt}')
+        allowed = UserImport.allowed_domains(principal)
+        return UserImport._stream(stream, fmt, allowed, default_domain_id, batch_size or Config.USER_IMPORT_BATCH_SIZE)
+
+    @staticmethod
+    def _stream(stream, fmt, allowed, default_domain_id, batch_size):
+        role_ids = dict(db.session.query(RoleModel.role_name, RoleModel.role_id).filter(RoleModel.active_flag == True))
+        summary = {'rows': 0, 'created': 0, 'failed': 0}
+
+        batch = []
+        seen = set()  # Duplicates inside the current batch
+        with ThreadPoolExecutor(max_workers=Config.USER_IMPORT_HASH_WORKERS, thread_name_prefix='import-bcrypt') as pool:
+            for number, row in UserImport._rows(stream, fmt):
+                summary['rows'] += 1
+                try:
+                    item = UserImport._normalise(row, default_domain_id, allowed, role_ids)
+                    if item['email'] in seen:
+                        raise ValueError('Duplicate email in import')
+                except (ValueError, TypeError) as e:
+                    summary['failed'] += 1
+                    yield {'row': number, 'error': str(e)}
+                    continue
+
+                seen.add(item['email'])
+                batch.append((number, item))
+                if len(batch) >= batch_size:
+                    yield from UserImport._flush(batch, pool, role_ids, summary)
+                    yield {'progress': dict(summary)}
+                    batch, seen = [], set()
+
+            if batch:
+                yield from UserImport._flush(batch, pool, role_ids, summary)
+
+        yield {'summary': summary}
@@ -0,0 +1,136 @@
+import time
+import threading
+from itertools import compress
+from models import db
+from models import ComponentModel, ComponentRoleMappingModel, RoleModel
+from configs.app_config import Config
+
+
+class AccessMatrixSnapshot:
+    """
+    Immutable RBAC snapshot.
+    Active templates get a bit position (ordered by template_id); each role
+    and each domain is an integer bitset over those positions, so access
+    checks are a few AND operations instead of per-role queries.
+    """
+
+    def __init__(self, templates, mappings):
+        self.templates = templates
+        self.names = [t['name'] for t in templates]
+
+        self.domain_bits = {}
+        for i, template in enumerate(templates):
+            self.domain_bits[template['domain_id']] = self.domain_bits.get(template['domain_id'], 0) | (1 << i)
+
+        index = {t['template_id']: i for i, t in enumerate(templates)}
+        self.role_bits = {}
+        for role_name, template_id in mappings:
+            if template_id in index:
+                self.role_bits[role_name] = self.role_bits.get(role_name, 0) | (1 << index[template_id])
+
+    def mask_for_roles(self, role_names):
+        """Union of the bitsets of several roles"""
+        mask = 0
+        for role_name in role_names:
+            mask |= self.role_bits.get(role_name, 0)
+        return mask
+
+    @staticmethod
+    def _select(items, mask):
+        """Items at the positions of the set bits, in position order"""
+        # Work on the binary digits (lowest bit first): peeling bits off a
+        # 1,000-bit integer copies it once per bit
+        digits = bin(mask)[:1:-1]
+        if digits.count('1') * 4 < len(digits):
+            # Sparse: jump from set bit to set bit
+            result = []
+            i = digits.find('1')
+            while i != -1:
+                result.append(items[i])
+                i = digits.find('1', i + 1)
+            return result
+        return list(compress(items, map('1'.__eq__, digits)))
+
+    def templates_in(self, mask):
+        """Templates whose bits are set, in template_id order"""
+        return self._select(self.templates, mask)
+
+    def component_names(self, role_names):
+        """Names of the components any of the roles can access"""
+        return self._select(self.names, self.mask_for_roles(role_names))
+
+    def navigation(self, role_names, domain_id=None):
+        """Navigation items for roles within one domain"""
+        mask = self.mask_for_roles(role_names) & self.domain_bits.get(domain_id, 0)
+        return [dict(t['nav']) for t in self.templates_in(mask)]
+
+
+class AccessMatrix:
+    """
+    Process-wide compiled access matrix.
+    Rebuilt from two queries and swapped in atomically after invalidate()
+    (mapping, template or role changes) and at least every
+    ACCESS_MATRIX_TTL_SECONDS so other workers converge.
+    """
+
+    _lock = threading.Lock()
+    _snapshot = None
+    _built_at = 0.0
+    _generation = 0
+
+    @staticmethod
+    def invalidate():
+        """Force a rebuild on the next lookup"""
+        AccessMatrix._generation += 1
+        AccessMatrix._snapshot = None
+
+    @staticmethod
+    def _build():
+        templates = []
+        for template in ComponentModel.query.filter_by(active_flag=True).order_by(ComponentModel.template_id).all():
+            templates.append({
+                'template_id': template.template_id,
+                'name': template.template_name,
+                'domain_id': template.domain_id,
+                'nav': {
+                    'name': template.template_name,
+                    'label': template.template_name,
+                    'icon': template.template_icon or '🔐',
+                    'description': template.description,
+                    'admin_only': False,
+                    'mode': template.component_mode,
+                    'value': template.component_value,
+                    'domain_id': template.domain_id
+                }
+            })
+
+        mappings = (
+            db.session.query(RoleModel.role_name, ComponentRoleMappingModel.template_id)
+            .join(RoleModel, RoleModel.role_id == ComponentRoleMappingModel.role_id)
+            .filter(ComponentRoleMappingModel.active_flag == True, RoleModel.active_flag == True)
+            .all()
+        )
+        return AccessMatrixSnapshot(templates, mappings)
+
+    @staticmethod
+    def get():
+        """Get the current snapshot, rebuilding it if stale"""
+        snapshot = AccessMatrix._snapshot
+        if snapshot is not None and time.monotonic() - AccessMatrix._built_at <= Config.ACCESS_MATRIX_TTL_SECONDS:
+            return snapshot
+
+        with AccessMatrix._lock:
+            snapshot = AccessMatrix._snapshot
+            if snapshot is None or time.monotonic() - AccessMatrix._built_at > Config.ACCESS_MATRIX_TTL_SECONDS:
+                generation = AccessMatrix._generation
+                snapshot = AccessMatrix._build()
+                # An invalidate() during the build leaves the matrix marked stale
+                if generation == AccessMatrix._generation:
+                    AccessMatrix._snapshot = snapshot
+                    AccessMatrix._built_at = time.monotonic()
+        return snapshot
+
+    @staticmethod
+    def get_user_components(principal):
+        """Component names accessible through any of the user's roles"""
+        return AccessMatrix.get().component_names(principal.roles)
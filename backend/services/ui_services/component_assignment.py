@@ -0,0 +1,82 @@
+from models import db
+from models import ComponentModel, ComponentRoleMappingModel, RoleModel
+
+
+class ComponentAssignment:
+    """
+    Set-based component-to-role assignment.
+    Resolves every component name with one query and upserts all mappings
+    in one transaction, instead of four queries and a commit per component.
+    Callers invalidate the AccessMatrix once afterwards.
+    """
+
+    @staticmethod
+    def bulk_assign(role_name, component_assignments):
+        """
+        Grant or revoke many components for a role
+
+        Args:
+            role_name: Role name
+            component_assignments: Dict of component name (template_name) -> has_access
+
+        Returns:
+            list: Mapping dicts for applied components, {'component_name', 'error'} for unknown ones
+        """
+        role = RoleModel.query.filter_by(role_name=role_name).first()
+        if not role:
+            raise ValueError(f'Role not found: {role_name}')
+
+        names = list(component_assignments)
+        templates = dict(
+            db.session.query(ComponentModel.template_name, ComponentModel.template_id)
+            .filter(ComponentModel.template_name.in_(names))
+            .all()
+        ) if names else {}
+
+        wanted = {templates[name]: bool(component_assignments[name]) for name in names if name in templates}
+        existing = dict(
+            db.session.query(ComponentRoleMappingModel.template_id, ComponentRoleMappingModel.active_flag)
+            .filter(
+                ComponentRoleMappingModel.role_id == role.role_id,
+                ComponentRoleMappingModel.template_id.in_(list(wanted))
+            )
+            .all()
+        ) if wanted else {}
+
+        try:
+            # At most one UPDATE per target flag
+            for flag in (True, False):
+                changed = [tid for tid, has_access in wanted.items()
+                           if has_access is flag and tid in existing and existing[tid] != flag]
+                if changed:
+                    ComponentRoleMappingModel.query.filter(
+                        ComponentRoleMappingModel.role_id == role.role_id,
+                        ComponentRoleMappingModel.template_id.in_(changed)
+                    ).update({'active_flag': flag}, synchronize_session=False)
+
+            new = [tid for tid in wanted if tid not in existing]
+            if new:
+                db.session.bulk_insert_mappings(ComponentRoleMappingModel, [
+                    {'role_id': role.role_id, 'template_id': tid, 'active_flag': wanted[tid]}
+                    for tid in new
+                ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        mappings = {
+            mapping.template_id: mapping.to_dict()
+            for mapping in ComponentRoleMappingModel.query.filter(
+                ComponentRoleMappingModel.role_id == role.role_id,
+                ComponentRoleMappingModel.template_id.in_(list(wanted))
+            )
+        } if wanted else {}
+
+        results = []
+        for name in names:
+            if name in templates and templates[name] in mappings:
+                results.append(mappings[templates[name]])
+            else:
+                results.append({'component_name': name, 'error': f'Component template not found: {name}'})
+        return results
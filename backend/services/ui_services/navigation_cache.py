@@ -0,0 +1,60 @@
+import json
+import hashlib
+import threading
+from .access_matrix import AccessMatrix
+
+
+class NavigationEntry:
+    """Pre-serialised navigation response for one (role, domain)"""
+    __slots__ = ('items', 'body', 'etag')
+
+    def __init__(self, items):
+        self.items = items
+        self.body = json.dumps({'navigation': items}, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+
+class NavigationCache:
+    """
+    Precomputed (role_name, domain_id) -> navigation map.
+    Entries are derived from the current AccessMatrix snapshot and dropped
+    together with it, so mapping/template/role changes only need
+    AccessMatrix.invalidate().
+    """
+
+    _lock = threading.Lock()
+    _snapshot = None
+    _entries = {}
+
+    @staticmethod
+    def invalidate():
+        """Force a rebuild on the next lookup"""
+        AccessMatrix.invalidate()
+
+    @staticmethod
+    def get(active_role, domain_id=None):
+        """
+        Get the navigation for an active role and domain
+
+        Args:
+            active_role: Role name from the JWT
+            domain_id: Domain from the JWT (None for global components)
+
+        Returns:
+            NavigationEntry: items, serialised body and strong ETag
+        """
+        snapshot = AccessMatrix.get()
+        key = (active_role, domain_id)
+
+        if NavigationCache._snapshot is snapshot:
+            entry = NavigationCache._entries.get(key)
+            if entry is not None:
+                return entry
+
+        entry = NavigationEntry(snapshot.navigation((active_role,), domain_id))
+        with NavigationCache._lock:
+            if NavigationCache._snapshot is not snapshot:
+                NavigationCache._snapshot = snapshot
+                NavigationCache._entries = {}
+            NavigationCache._entries[key] = entry
+        return entry
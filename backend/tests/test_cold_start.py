@@ -0,0 +1,27 @@
+"""Cold-start budget for create_app() (see profile_startup.py)"""
+import os
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('models')
+
+from profile_startup import profile, heavy_imports
+
+# Generous for CI machines; a heavy import in the factory costs seconds, not milliseconds
+BUDGET_MS = float(os.getenv('COLD_START_BUDGET_MS', 1500))
+
+
+def test_create_app_imports_no_heavy_packages():
+    _, modules = profile()
+    assert heavy_imports(modules) == []
+
+
+def test_create_app_within_cold_start_budget():
+    cold_start_ms, _ = profile()
+    assert cold_start_ms <= BUDGET_MS, f'create_app() took {cold_start_ms:.1f} ms (budget {BUDGET_MS:.0f} ms)'
+
+
+def test_preload_imports_heavy_packages():
+    pytest.importorskip('chromadb')
+    _, modules = profile(preload=True)
+    assert 'chromadb' in heavy_imports(modules)
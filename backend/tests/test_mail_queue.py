@@ -0,0 +1,119 @@
+"""MailQueue against a local SMTP server (aiosmtpd)"""
+import time
+import socket
+import threading
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('aiosmtpd')
+
+from aiosmtpd.controller import Controller
+from configs.app_config import Config
+from services.auth_services.mail_queue import MailQueue
+from services.system_services.metrics import Metrics
+
+
+class Recorder:
+    """aiosmtpd handler keeping every delivered message"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append((envelope.mail_from, list(envelope.rcpt_tos)))
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+@pytest.fixture
+def smtp(monkeypatch):
+    port = free_port()
+    monkeypatch.setattr(Config, 'SMTP_SERVER', '127.0.0.1')
+    monkeypatch.setattr(Config, 'SMTP_PORT', port)
+    monkeypatch.setattr(Config, 'SMTP_USE_TLS', False)
+    monkeypatch.setattr(Config, 'SMTP_USE_AUTH', False)
+    monkeypatch.setattr(Config, 'SMTP_SENDER_EMAIL', 'noreply@example.com')
+    monkeypatch.setattr(Config, 'MAIL_RETRY_BACKOFF_SECONDS', 0.05)
+    MailQueue.reset()
+
+    recorder = Recorder()
+    controller = Controller(recorder, hostname='127.0.0.1', port=port)
+    yield recorder, controller
+    MailQueue.shutdown()
+    MailQueue.reset()
+    try:
+        controller.stop()
+    except AssertionError:
+        pass  # Never started
+
+
+def test_queued_mail_is_delivered_over_one_connection(smtp):
+    recorder, controller = smtp
+    controller.start()
+    before = MailQueue.metrics()
+
+    for i in range(20):
+        assert MailQueue.enqueue(f'user{i}@example.com', 'Subject', '<p>Hi</p>')
+    assert wait_for(lambda: len(recorder.messages) == 20)
+
+    after = MailQueue.metrics()
+    assert sorted(rcpt[0] for _, rcpt in recorder.messages) == sorted(f'user{i}@example.com' for i in range(20))
+    assert all(sender == 'noreply@example.com' for sender, _ in recorder.messages)
+    assert after['sent'] - before['sent'] == 20
+    assert after['reconnects'] - before['reconnects'] == 1
+
+
+def test_failed_send_is_retried_once_the_server_is_up(smtp):
+    recorder, controller = smtp
+    before = MailQueue.metrics()
+
+    assert MailQueue.enqueue('late@example.com', 'Subject', '<p>Hi</p>')
+    assert wait_for(lambda: MailQueue.metrics()['retries'] > before['retries'])
+    controller.start()
+    assert wait_for(lambda: len(recorder.messages) == 1)
+    assert recorder.messages[0][1] == ['late@example.com']
+    assert MailQueue.metrics()['failed'] == before['failed']
+
+
+def test_concurrent_enqueues_are_all_counted(smtp):
+    recorder, controller = smtp
+    controller.start()
+    before = MailQueue.metrics()
+
+    def enqueue_many():
+        for i in range(25):
+            MailQueue.enqueue(f'user{i}@example.com', 'Subject', '<p>Hi</p>')
+
+    threads = [threading.Thread(target=enqueue_many) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert wait_for(lambda: len(recorder.messages) == 200)
+
+    after = MailQueue.metrics()
+    assert after['enqueued'] - before['enqueued'] == 200
+    assert after['sent'] - before['sent'] == 200
+
+
+def test_counters_are_exported_on_metrics():
+    assert MailQueue.render in Metrics.collectors
+    text = MailQueue.render()
+    assert '# TYPE app_mail_queue_total counter' in text
+    assert 'app_mail_queue_total{outcome="sent"}' in text
+    assert 'app_mail_queue_depth ' in text
@@ -0,0 +1,94 @@
+"""OTP backend contract: every backend passes the same tests"""
+import time
+import multiprocessing
+import pytest
+
+pytest.importorskip('dotenv')
+
+from services.auth_services.otp_backends import MemoryOTPBackend, SQLiteOTPBackend
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryOTPBackend(max_attempts=3)
+    return SQLiteOTPBackend(str(tmp_path / 'otp.sqlite3'), max_attempts=3)
+
+
+def test_otp_verifies_once(backend):
+    backend.store_otp('a@example.com', '123456', ttl_seconds=60)
+    assert backend.verify_otp('a@example.com', '123456')
+    assert not backend.verify_otp('a@example.com', '123456')
+
+
+def test_unknown_key_fails(backend):
+    assert not backend.verify_otp('nobody@example.com', '123456')
+
+
+def test_wrong_guesses_lock_the_key_out(backend):
+    backend.store_otp('b@example.com', '111111', ttl_seconds=60)
+    for _ in range(backend.max_attempts):
+        assert not backend.verify_otp('b@example.com', '000000')
+    assert not backend.verify_otp('b@example.com', '111111')
+
+
+def test_fewer_wrong_guesses_keep_the_otp(backend):
+    backend.store_otp('c@example.com', '222222', ttl_seconds=60)
+    for _ in range(backend.max_attempts - 1):
+        assert not backend.verify_otp('c@example.com', '000000')
+    assert backend.verify_otp('c@example.com', '222222')
+
+
+def test_expired_otp_fails(backend):
+    backend.store_otp('d@example.com', '333333', ttl_seconds=0)
+    time.sleep(0.01)
+    assert not backend.verify_otp('d@example.com', '333333')
+
+
+def test_storing_again_replaces_the_otp_and_attempts(backend):
+    backend.store_otp('e@example.com', '444444', ttl_seconds=60)
+    for _ in range(backend.max_attempts - 1):
+        backend.verify_otp('e@example.com', '000000')
+    backend.store_otp('e@example.com', '555555', ttl_seconds=60)
+    assert not backend.verify_otp('e@example.com', '444444')
+    assert backend.verify_otp('e@example.com', '555555')
+
+
+def test_cleanup_removes_expired_otps_only(backend):
+    backend.store_otp('f@example.com', '666666', ttl_seconds=0)
+    backend.store_otp('g@example.com', '777777', ttl_seconds=60)
+    time.sleep(0.01)
+    backend.cleanup()
+    assert not backend.verify_otp('f@example.com', '666666')
+    assert backend.verify_otp('g@example.com', '777777')
+
+
+def _verify_in_child(path, key, otp, results):
+    results.put(SQLiteOTPBackend(path).verify_otp(key, otp))
+
+
+def test_sqlite_otp_is_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'otp.sqlite3')
+    SQLiteOTPBackend(path).store_otp('shared@example.com', '888888', ttl_seconds=60)
+
+    results = multiprocessing.Queue()
+    child = multiprocessing.Process(target=_verify_in_child, args=(path, 'shared@example.com', '888888', results))
+    child.start()
+    child.join()
+    assert results.get(timeout=10)
+
+
+def test_sqlite_concurrent_verifications_succeed_once(tmp_path):
+    path = str(tmp_path / 'otp.sqlite3')
+    SQLiteOTPBackend(path).store_otp('race@example.com', '999999', ttl_seconds=60)
+
+    results = multiprocessing.Queue()
+    children = [
+        multiprocessing.Process(target=_verify_in_child, args=(path, 'race@example.com', '999999', results))
+        for _ in range(8)
+    ]
+    for child in children:
+        child.start()
+    for child in children:
+        child.join()
+    assert sum(1 for _ in children if results.get(timeout=10)) == 1
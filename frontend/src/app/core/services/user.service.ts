@@ -1,6 +1,7 @@
 import { Injectable } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
-import { Observable } from 'rxjs';
+import { EMPTY, Observable } from 'rxjs';
+import { expand, reduce } from 'rxjs/operators';
 import { API_ENDPOINTS } from '../../../environments/api_controller';
 import { User } from './auth.service';
 import { Role } from './role.service';
@@ -12,7 +13,18 @@ export class UserService {
     constructor(private http: HttpClient) { }
 
     getAllUsers(): Observable<User[]> {
-        return this.http.get<User[]>(API_ENDPOINTS.USERS.BASE);
+        // The listing is paginated: follow X-Next-Cursor until the last page
+        const page = (cursor?: string) => this.http.get<User[]>(API_ENDPOINTS.USERS.BASE, {
+            observe: 'response',
+            params: cursor ? { cursor } : {}
+        });
+        return page().pipe(
+            expand(response => {
+                const next = response.headers.get('X-Next-Cursor');
+                return next ? page(next) : EMPTY;
+            }),
+            reduce((users, response) => users.concat(response.body ?? []), [] as User[])
+        );
     }
 
     getUserById(id: number): Observable<User> {